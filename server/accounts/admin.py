@@ -1,16 +1,24 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
+from feedback.admin_filters import CompanyRelatedListFilter
+from request.services.protected_media import staff_media_url
+from request.services.thumbnails import thumbnail_paths
+from request.services.ws_cache import invalidate_ws_users
 from .models import User
 
 @admin.register(User)
 class UserAdmin(DjangoUserAdmin):
     ordering = ("-date_joined",)
     list_display = ("id", "username", "name", "photo_preview", "role", "company", "department", "is_staff", "is_active", "date_joined")
-    list_filter = ("role", "company", "department", "is_staff", "is_active", "date_joined")
+    list_filter = ("role", "company", ("department", CompanyRelatedListFilter), "is_staff", "is_active", "date_joined")
     search_fields = ("username", "name", "company__name", "department__name")
     list_per_page = 25
+    # company/department nullable - select_related() по умолчанию их не подтягивает;
+    # department__company - для __str__ отдела
+    list_select_related = ("company", "department__company")
     date_hierarchy = "date_joined"
     
     readonly_fields = ("photo_preview_large", "date_joined", "last_login")
@@ -52,26 +60,38 @@ class UserAdmin(DjangoUserAdmin):
     def photo_preview(self, obj):
         """Миниатюра фото в списке"""
         if obj.photo:
-            return format_html('<img src="{}" style="width: 40px; height: 40px; object-fit: cover; border-radius: 50%;" />', obj.photo.url)
+            # Превью 160px вместо полного фото на каждую строку списка
+            name = thumbnail_paths(obj.photo, obj.thumbnails).get("small", obj.photo.name)
+            return format_html('<img src="{}" loading="lazy" style="width: 40px; height: 40px; object-fit: cover; border-radius: 50%;" />', staff_media_url(name))
         return "—"
     photo_preview.short_description = "Photo"
     
     def photo_preview_large(self, obj):
         """Превью фото в детальном просмотре"""
         if obj.photo:
-            return format_html('<img src="{}" style="max-width: 300px; max-height: 300px; border-radius: 8px;" />', obj.photo.url)
+            name = thumbnail_paths(obj.photo, obj.thumbnails).get("medium", obj.photo.name)
+            return format_html(
+                '<a href="{}" target="_blank"><img src="{}" style="max-width: 300px; max-height: 300px; border-radius: 8px;" /></a>',
+                staff_media_url(obj.photo.name),
+                staff_media_url(name),
+            )
         return "No photo"
     photo_preview_large.short_description = "Photo Preview"
     
     actions = ["activate_users", "deactivate_users"]
     
     def activate_users(self, request, queryset):
+        user_ids = list(queryset.values_list("id", flat=True))
         updated = queryset.update(is_active=True)
+        transaction.on_commit(lambda: invalidate_ws_users(user_ids))
         self.message_user(request, f"{updated} user(s) activated.")
     activate_users.short_description = "Activate selected users"
     
     def deactivate_users(self, request, queryset):
+        user_ids = list(queryset.values_list("id", flat=True))
         updated = queryset.update(is_active=False)
+        # update() не шлет post_save - сбрасываем кеш WebSocket-авторизации вручную
+        transaction.on_commit(lambda: invalidate_ws_users(user_ids))
         self.message_user(request, f"{updated} user(s) deactivated.")
     deactivate_users.short_description = "Deactivate selected users"
 
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+TRGM_INDEXES = {
+    "accounts_user_name_trgm_idx": "UPPER(name::text) gin_trgm_ops",
+    "accounts_user_username_trgm_idx": "UPPER(username::text) gin_trgm_ops",
+}
+
+
+def create_trgm_indexes(apps, schema_editor):
+    # Триграммные индексы под icontains-поиск; SQLite (dev) их не поддерживает
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, expression in TRGM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON accounts_user USING gin ({expression})"
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRGM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_alter_user_company_alter_user_department'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('feedback', '0005_alter_event_ends_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['company', 'role', 'name'], name='accounts_us_company_b61b6f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['department', 'name'], name='accounts_us_departm_0bc988_idx'),
+        ),
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_search_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('feedback', '0007_event_company_starts_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['photo'], name='accounts_us_photo_f2a85c_idx'),
+        ),
+    ]
@@ -11,6 +11,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     username = models.CharField(max_length=150, unique=True)
     name = models.CharField(max_length=255, blank=True, default="")
     photo = models.ImageField(upload_to='user_photos/')
+    # WebP-превью фото, заполняет celery (request.services.thumbnails)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
 
     role = models.CharField(
         max_length=20,
@@ -29,5 +31,14 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = "username"
 
+    class Meta:
+        indexes = [
+            # Списки сотрудников компании / участников ивента, отсортированные по имени
+            models.Index(fields=["company", "role", "name"]),
+            models.Index(fields=["department", "name"]),
+            # Проверка доступа к фото в /api/media/
+            models.Index(fields=["photo"]),
+        ]
+
     def __str__(self):
         return self.username
@@ -4,6 +4,8 @@ import io
 import logging
 from PIL import Image
 
+from server.metrics import observe_ai_call
+
 logger = logging.getLogger(__name__)
 AI_BASE_URL = os.environ["AI_BASE_URL"]
 
@@ -102,20 +104,21 @@ def verify_face_authorization(stored_photo_field, uploaded_photo_file) -> dict:
             'photo2': (uploaded_photo_file.name, uploaded_content, 'image/jpeg')
         }
         
-        # Timeout 45 секунд - достаточно для AI обработки, но меньше Gunicorn timeout (300s)
-        r = requests.post(f"{AI_BASE_URL}/authorization", files=files, timeout=45)
-        
-        # Separate 4xx (client/input errors) from 5xx (server errors)
-        if 400 <= r.status_code < 500:
-            try:
-                detail = r.json().get('detail', r.text)
-            except Exception:
-                detail = r.text
-            logger.warning(f"AI service returned {r.status_code}: {detail}")
-            raise AIClientError(r.status_code, detail)
-        
-        r.raise_for_status()
-        return r.json()
+        with observe_ai_call("authorization", client_errors=(AIClientError,)):
+            # Timeout 45 секунд - достаточно для AI обработки, но меньше Gunicorn timeout (300s)
+            r = requests.post(f"{AI_BASE_URL}/authorization", files=files, timeout=45)
+
+            # Separate 4xx (client/input errors) from 5xx (server errors)
+            if 400 <= r.status_code < 500:
+                try:
+                    detail = r.json().get('detail', r.text)
+                except Exception:
+                    detail = r.text
+                logger.warning(f"AI service returned {r.status_code}: {detail}")
+                raise AIClientError(r.status_code, detail)
+
+            r.raise_for_status()
+            return r.json()
     
     except AIClientError:
         raise
@@ -62,3 +62,20 @@ def process_photo_login_feedback(user_id, photo_data):
             "success": False,
             "error": str(e)
         }
+
+
+@shared_task
+def generate_user_photo_thumbnails(user_id):
+    """WebP-превью фото пользователя (админка, аватары)"""
+    from accounts.models import User
+    from request.services.thumbnails import delete_unused, make_thumbnails, thumbnails_stale, user_thumbnails_dir
+
+    user = User.objects.filter(pk=user_id).only("id", "photo", "thumbnails").first()
+    if not user or not thumbnails_stale(user.photo, user.thumbnails):
+        return {"success": True, "skipped": True}
+
+    thumbnails = make_thumbnails(user.photo, user_thumbnails_dir(user.id))
+    # Фото могли сменить, пока рендерили - тогда запишет следующая задача
+    if User.objects.filter(pk=user.id, photo=user.photo.name).update(thumbnails=thumbnails):
+        delete_unused(user.thumbnails, thumbnails)
+    return {"success": True, "sizes": thumbnails["sizes"]}
@@ -1,3 +1,26 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from feedback.models import Company, Department
+from .models import User
+
+
+class AdminChangelistQueriesTests(TestCase):
+    """Список пользователей в админке - фиксированное число запросов, без N+1"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "pw")
+        for i in range(3):
+            company = Company.objects.create(name=f"Company {i}")
+            department = Department.objects.create(company=company, name=f"Dept {i}")
+            for j in range(10):
+                User.objects.create_user(f"user{i}_{j}", "pw", company_id=company.id, department_id=department.id)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_user_changelist(self):
+        with self.assertNumQueries(11):
+            response = self.client.get(reverse("admin:accounts_user_changelist"))
+        self.assertEqual(response.status_code, 200)
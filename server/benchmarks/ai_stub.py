@@ -0,0 +1,144 @@
+"""
+Local stand-in for the AI service.
+
+Implements the two endpoints the server calls, ``POST /predict`` (emotion
+of one photo) and ``POST /authorization`` (do two photos show the same
+person), with configurable latency, jitter and error rates. Request bodies
+are read and discarded, answers are random but reproducible with ``--seed``.
+
+    python benchmarks/ai_stub.py --port 8090 --latency-ms 150 --jitter-ms 50 --error-rate 0.01
+    AI_BASE_URL=http://127.0.0.1:8090 python manage.py runserver
+
+The stub can also run inside another process (see ``start_in_thread``),
+which is what api_bench.py does.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMOTIONS = ["happy", "neutral", "sad", "surprised", "angry", "fear"]
+# Частоты эмоций, близкие к продовым
+EMOTION_WEIGHTS = [35, 30, 12, 10, 8, 5]
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 100
+    jitter_ms: float = 30
+    # Доля ответов 500 и 400 ("лицо не найдено")
+    error_rate: float = 0.0
+    client_error_rate: float = 0.0
+    # Доля verdict=NO у /authorization
+    mismatch_rate: float = 0.0
+    seed: int = 42
+
+
+def random_top3(rng):
+    """top3 in the shape the AI service returns: [{"label", "prob"}], sorted by prob"""
+    labels = rng.sample(EMOTIONS, 3)
+    weights = sorted((rng.random() for _ in labels), reverse=True)
+    total = sum(weights) + rng.random()
+    return [{"label": label, "prob": round(w / total, 4)} for label, w in zip(labels, weights)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "AIStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+
+        config, rng, lock = self.server.config, self.server.rng, self.server.rng_lock
+        with lock:
+            delay = max(0.0, config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+            roll = rng.random()
+            top3 = random_top3(rng)
+            mismatch = rng.random() < config.mismatch_rate
+            similarity = round(rng.uniform(0.2, 0.5) if mismatch else rng.uniform(0.7, 0.99), 4)
+        time.sleep(delay)
+
+        if self.path not in ("/predict", "/authorization"):
+            self._reply(404, {"detail": "Not found"})
+        elif roll < config.error_rate:
+            self._reply(500, {"detail": "Stub: internal error"})
+        elif roll < config.error_rate + config.client_error_rate:
+            self._reply(400, {"detail": "No face detected"})
+        elif self.path == "/predict":
+            self._reply(200, {"emotion": top3[0]["label"], "top3": top3})
+        else:
+            self._reply(200, {
+                "verdict": "NO" if mismatch else "YES",
+                "similarity": similarity,
+                "similarity_percent": round(similarity * 100, 2),
+            })
+
+
+def make_server(config, host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config
+    server.rng = random.Random(config.seed)
+    server.rng_lock = threading.Lock()
+    return server
+
+
+def start_in_thread(config, host="127.0.0.1", port=0):
+    """Start the stub in a daemon thread; returns (server, base_url). Stop with server.shutdown()."""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_stub_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=100, help="Mean AI response time")
+    parser.add_argument("--jitter-ms", type=float, default=30, help="Uniform +/- spread around the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 answers")
+    parser.add_argument("--client-error-rate", type=float, default=0.0, help="Share of 400 'No face detected' answers")
+    parser.add_argument("--mismatch-rate", type=float, default=0.0, help="Share of verdict=NO from /authorization")
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def config_from_args(args):
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        client_error_rate=args.client_error_rate,
+        mismatch_rate=args.mismatch_rate,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(config_from_args(args), args.host, args.port)
+    print(f"AI stub listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,531 @@
+"""
+API benchmark: photo login, photo feedback, HR analytics and request chat.
+
+Starts the AI stub (ai_stub.py) in a thread, seeds benchmark data into the
+database the settings point to (SQLite with DJANGO_DEBUG=1, PostgreSQL
+otherwise) and drives the DRF views in-process through the test client,
+so every request runs the full middleware/auth/view/ORM path while its
+SQL queries are counted. Network and ASGI server time are not included.
+``chat_send_ws`` sends the same chat message as ``chat_send`` over
+``ws/chat/<id>/`` (the ASGI app through asgiref's ApplicationCommunicator,
+also in-process) and measures the time until ``message.ack``.
+
+Run from the server/ directory:
+
+    DJANGO_DEBUG=1 python benchmarks/api_bench.py --iterations 200 --output before.json
+    DJANGO_DEBUG=1 python benchmarks/api_bench.py --iterations 200 --output after.json
+    python benchmarks/api_bench.py --compare before.json after.json
+
+Results are printed as JSON (see benchmarks/README.md).
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from ai_stub import EMOTION_WEIGHTS, EMOTIONS, add_stub_arguments, config_from_args, random_top3, start_in_thread
+
+BENCH_PREFIX = "bench_api_"
+PHOTO_NAME = f"user_photos/{BENCH_PREFIX}face.jpg"
+
+SCENARIOS = ["photo_login", "feedback_photo", "hr_analytics", "hr_inbox", "chat_messages", "chat_send", "chat_send_ws"]
+
+
+def setup_django(ai_base_url):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+    # Клиенты AI читают адрес при импорте - выставляем до django.setup()
+    os.environ["AI_BASE_URL"] = ai_base_url
+    # Без брокера .delay() в photo-login ждет переподключения; с брокером запускайте с =0
+    os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "1")
+    # Тестовый клиент ходит на localhost; без DEBUG пустой ALLOWED_HOSTS дает 400 на все запросы
+    os.environ.setdefault("DJANGO_ALLOWED_HOSTS", "localhost")
+    # chat_send_ws рассылает через channel layer; CHANNEL_LAYER_BACKEND=core - с Redis
+    os.environ.setdefault("CHANNEL_LAYER_BACKEND", "memory")
+    import django
+    django.setup()
+
+
+def make_jpeg(seed, size=(640, 480)):
+    from PIL import Image
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    buffer = io.BytesIO()
+    Image.blend(image, noise, 0.5).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+# --- Данные ---
+
+def seed_data(args):
+    """Create (or reuse) the benchmark company; returns ids the scenarios need."""
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.db import transaction
+    from django.utils import timezone
+    from accounts.models import User
+    from feedback.models import Company, Department, Feedback
+    from request.models import Request, RequestMessage, RequestType
+    from request.services.counters import recompute_counters
+
+    rng = random.Random(args.seed)
+    hr_username = f"{BENCH_PREFIX}hr"
+    created = not User.objects.filter(username=hr_username).exists()
+
+    if created:
+        # Одна транзакция: прерванный сид не оставляет половину данных
+        with transaction.atomic():
+            company, _ = Company.objects.get_or_create(name=f"{BENCH_PREFIX}company")
+            if not default_storage.exists(PHOTO_NAME):
+                default_storage.save(PHOTO_NAME, ContentFile(make_jpeg(args.seed)))
+            departments = [
+                Department.objects.create(company=company, name=f"{BENCH_PREFIX}dept_{i}") for i in range(args.departments)
+            ]
+            User.objects.create(
+                username=hr_username, name="Bench HR", role=User.Role.HR, company=company, department=departments[0]
+            )
+            User.objects.bulk_create([
+                User(
+                    username=f"{BENCH_PREFIX}employee_{i}",
+                    name=f"Bench Employee {i}",
+                    role=User.Role.EMPLOYEE,
+                    company=company,
+                    department=departments[i % len(departments)],
+                    photo=PHOTO_NAME,
+                )
+                for i in range(args.employees)
+            ], batch_size=1000)
+            employees = list(User.objects.filter(username__startswith=f"{BENCH_PREFIX}employee_").order_by("id"))
+
+            feedbacks = Feedback.objects.bulk_create([
+                Feedback(
+                    user=employee,
+                    emotion=rng.choices(EMOTIONS, EMOTION_WEIGHTS)[0],
+                    top3=random_top3(rng),
+                    company=company,
+                    department_id=employee.department_id,
+                )
+                for employee in (rng.choice(employees) for _ in range(args.feedbacks))
+            ], batch_size=2000)
+            # created_at - auto_now_add; раскладываем по дням одним UPDATE на день
+            now = timezone.now()
+            by_day = {}
+            for feedback in feedbacks:
+                by_day.setdefault(rng.randrange(args.days), []).append(feedback.pk)
+            for day, ids in by_day.items():
+                for start in range(0, len(ids), 900):
+                    Feedback.objects.filter(pk__in=ids[start:start + 900]).update(created_at=now - timedelta(days=day))
+
+            hr = User.objects.get(username=hr_username)
+            request_type = RequestType.objects.create(name=f"{BENCH_PREFIX}type", description="API benchmark")
+            Request.objects.bulk_create([
+                Request(type=request_type, employee=employees[i % len(employees)], hr=hr) for i in range(args.requests)
+            ])
+            chats = list(Request.objects.filter(hr=hr).select_related("employee").order_by("id"))
+            RequestMessage.objects.bulk_create([
+                RequestMessage(
+                    request=chat,
+                    sender=chat.employee if n % 2 == 0 else hr,
+                    text=f"Benchmark message {n} " + "lorem ipsum " * rng.randrange(1, 20),
+                )
+                for chat in chats for n in range(args.messages)
+            ], batch_size=2000)
+            recompute_counters(Request.objects.filter(hr=hr))
+
+    hr = User.objects.get(username=hr_username)
+    chats = list(Request.objects.filter(hr=hr).select_related("employee").order_by("id"))
+    employee_ids = list(
+        User.objects.filter(username__startswith=f"{BENCH_PREFIX}employee_").order_by("id").values_list("id", flat=True)
+    )
+    return {
+        "hr": hr,
+        "employee_ids": employee_ids,
+        "chats": [(chat.id, chat.employee) for chat in chats],
+        "seeded": created,
+    }
+
+
+def cleanup():
+    from django.core.files.storage import default_storage
+    from accounts.models import User
+    from feedback.models import Company
+    from request.models import RequestType
+
+    # Фидбеки и заявки удаляются каскадом вместе с пользователями
+    deleted, _ = User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+    RequestType.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    Company.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    default_storage.delete(PHOTO_NAME)
+    print(f"Deleted {deleted} benchmark object(s)")
+
+
+# --- Сценарии ---
+
+def client_for(user):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    # raise_request_exception=False: 500 от вьюхи считаем ошибкой, а не падаем
+    client = APIClient(raise_request_exception=False, HTTP_HOST="localhost")
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+class WSResult:
+    """Outcome of one WebSocket send, shaped like a response for run_scenario"""
+
+    def __init__(self, status_code, elapsed_ms, db_queries, db_ms):
+        self.status_code = status_code
+        # От отправки фрейма до message.ack, без ожидания метрик и перехода между потоками
+        self.elapsed_ms = elapsed_ms
+        # Запросы consumer идут в потоке database_sync_to_async, а не в потоке
+        # бенчмарка - берем их из метрик consumer (server.metrics)
+        self.db_queries = db_queries
+        self.db_ms = db_ms
+
+
+def _chat_socket(application, path, query_string):
+    """
+    In-process WebSocket to the ASGI app. asgiref's communicator instead of
+    channels.testing: that package imports daphne, which is not installed.
+    """
+    from asgiref.testing import ApplicationCommunicator
+
+    scope = {"type": "websocket", "path": path, "query_string": query_string.encode(), "headers": [], "subprotocols": []}
+    return ApplicationCommunicator(application, scope)
+
+
+class WebSocketChats:
+    """
+    Chat sockets for ``chat_send_ws``: one communicator per thread and chat,
+    all running on one event loop in a background thread.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.local = threading.local()
+        self.communicators = []
+
+    def _run(self, coro, timeout=60):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def send(self, request_id, user, text):
+        sockets = self.local.__dict__.setdefault("sockets", {})
+        if request_id not in sockets:
+            sockets[request_id] = self._run(self._connect(request_id, user))
+        return self._run(self._send(sockets[request_id], text))
+
+    async def _connect(self, request_id, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from server.asgi import application
+
+        communicator = _chat_socket(application, f"/ws/chat/{request_id}/", f"token={AccessToken.for_user(user)}")
+        await communicator.send_input({"type": "websocket.connect"})
+        if (await communicator.receive_output(timeout=10))["type"] != "websocket.accept":
+            raise RuntimeError(f"WebSocket connection to request {request_id} was rejected")
+        self.communicators.append(communicator)
+        return communicator
+
+    @staticmethod
+    def _db_totals():
+        from prometheus_client import REGISTRY
+
+        labels = {"consumer": "ChatConsumer", "event": "receive"}
+        return tuple(
+            REGISTRY.get_sample_value(name, labels) or 0
+            for name in ("ws_event_db_queries_count", "ws_event_db_queries_sum", "ws_event_db_seconds_sum")
+        )
+
+    async def _send(self, communicator, text):
+        client_id = uuid.uuid4().hex
+        before = self._db_totals()
+        started = time.perf_counter()
+        frame = {"type": "message.send", "client_id": client_id, "text": text}
+        await communicator.send_input({"type": "websocket.receive", "text": json.dumps(frame)})
+        while True:
+            # Отправитель получает и свою рассылку (chat.message) - пропускаем
+            frame = json.loads((await communicator.receive_output(timeout=30))["text"])
+            if frame.get("client_id") == client_id and frame.get("type") in ("message.ack", "error"):
+                break
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # ack уходит до конца обработчика - ждем, пока consumer запишет метрики фрейма
+        for _ in range(1000):
+            after = self._db_totals()
+            if after[0] > before[0]:
+                break
+            await asyncio.sleep(0)
+        events = after[0] - before[0]
+        return WSResult(
+            200 if frame["type"] == "message.ack" else 400,
+            elapsed_ms,
+            (after[1] - before[1]) / events if events else None,
+            (after[2] - before[2]) / events * 1000 if events else None,
+        )
+
+    def close(self):
+        async def disconnect():
+            for communicator in self.communicators:
+                await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+                await communicator.wait(timeout=5)
+
+        self._run(disconnect())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def build_scenarios(data, photo, ws):
+    """name -> function(i) performing the i-th request of the scenario and returning the response"""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.utils import timezone
+    from accounts.models import User
+
+    today = timezone.localdate()
+    analytics_params = {"start_date": (today - timedelta(days=30)).isoformat(), "end_date": today.isoformat()}
+    employees = {}
+    local = threading.local()
+
+    def employee(i):
+        user_id = data["employee_ids"][i % len(data["employee_ids"])]
+        if user_id not in employees:
+            employees[user_id] = User.objects.get(pk=user_id)
+        return employees[user_id]
+
+    def client(user):
+        # Клиент на поток и пользователя
+        cache = local.__dict__.setdefault("clients", {})
+        if user.pk not in cache:
+            cache[user.pk] = client_for(user)
+        return cache[user.pk]
+
+    def upload():
+        return SimpleUploadedFile("face.jpg", photo, content_type="image/jpeg")
+
+    def chat(i):
+        return data["chats"][i % len(data["chats"])]
+
+    return {
+        "photo_login": lambda i: client(employee(i)).post(
+            "/api/auth/photo-login", {"photo": upload()}, format="multipart"),
+        "feedback_photo": lambda i: client(employee(i)).post(
+            "/api/employee/feedback", {"file": upload()}, format="multipart"),
+        "hr_analytics": lambda i: client(data["hr"]).get(
+            "/api/hr/analytics/feedbacks/", analytics_params),
+        "hr_inbox": lambda i: client(data["hr"]).get("/api/hr/requests/"),
+        "chat_messages": lambda i: client(data["hr"]).get(f"/api/hr/requests/{chat(i)[0]}/messages/"),
+        "chat_send": lambda i: client(chat(i)[1]).post(
+            f"/api/employee/requests/{chat(i)[0]}/messages/", {"text": f"bench {i}"}, format="json"),
+        "chat_send_ws": lambda i: ws.send(chat(i)[0], chat(i)[1], f"bench {i}"),
+    }
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(len(values) * p / 100))], 2)
+
+
+def run_scenario(call, iterations, warmup, concurrency):
+    from django.db import connection, connections
+    from django.test.utils import CaptureQueriesContext
+
+    for i in range(warmup):
+        call(i)
+
+    samples = []
+    lock = threading.Lock()
+    counter = iter(range(warmup, warmup + iterations))
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = call(i)
+                    elapsed = (time.perf_counter() - started) * 1000
+                query_count = len(queries)
+                db_ms = sum(float(q.get("time") or 0) for q in queries.captured_queries) * 1000
+                if isinstance(response, WSResult):
+                    elapsed = response.elapsed_ms
+                    if response.db_queries is not None:
+                        query_count, db_ms = response.db_queries, response.db_ms
+                with lock:
+                    samples.append((elapsed, query_count, db_ms, response.status_code))
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker()
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+    wall = time.perf_counter() - started
+
+    latencies = sorted(s[0] for s in samples)
+    query_counts = sorted(s[1] for s in samples)
+    statuses = Counter(s[3] for s in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(count for code, count in statuses.items() if code >= 500),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(samples) / wall, 1) if wall else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(latencies[-1], 2) if latencies else None,
+            "mean": round(statistics.mean(latencies), 2) if latencies else None,
+        },
+        "queries": {
+            "mean": round(statistics.mean(query_counts), 2) if query_counts else None,
+            "p50": percentile(query_counts, 50),
+            "max": query_counts[-1] if query_counts else None,
+        },
+        "db_time_ms_mean": round(statistics.mean(s[2] for s in samples), 2) if samples else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, stub_config, ai_base_url):
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    data = seed_data(args)
+    photo = make_jpeg(args.seed + 1)
+    ws = WebSocketChats()
+    scenarios = build_scenarios(data, photo, ws)
+    selected = args.scenarios or SCENARIOS
+
+    results = {}
+    try:
+        for name in selected:
+            results[name] = run_scenario(scenarios[name], args.iterations, args.warmup, args.concurrency)
+            print(f"{name}: p50={results[name]['latency_ms']['p50']} ms, "
+                  f"queries={results[name]['queries']['mean']}", file=sys.stderr)
+    finally:
+        ws.close()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git": git_revision(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "celery_eager": bool(settings.CELERY_TASK_ALWAYS_EAGER),
+            "channel_layer": settings.CHANNEL_LAYERS["default"]["BACKEND"],
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "data": {
+                "employees": len(data["employee_ids"]),
+                "feedbacks": args.feedbacks if data["seeded"] else "reused",
+                "requests": len(data["chats"]),
+                "messages_per_request": args.messages if data["seeded"] else "reused",
+            },
+            "ai_stub": {**stub_config.__dict__, "url": ai_base_url},
+        },
+        "scenarios": results,
+    }
+
+
+# --- Сравнение ---
+
+def compare(old_path, new_path):
+    """Print p50/p95/p99, throughput and query deltas between two result files"""
+    with open(old_path) as f:
+        old = json.load(f)["scenarios"]
+    with open(new_path) as f:
+        new = json.load(f)["scenarios"]
+
+    def delta(a, b):
+        if a is None or b is None:
+            return "n/a"
+        change = f" ({(b - a) / a * 100:+.0f}%)" if a else ""
+        return f"{a} -> {b}{change}"
+
+    for name in [n for n in new if n in old]:
+        print(name)
+        for p in ("p50", "p95", "p99"):
+            print(f"  {p} ms:     {delta(old[name]['latency_ms'][p], new[name]['latency_ms'][p])}")
+        print(f"  rps:        {delta(old[name]['throughput_rps'], new[name]['throughput_rps'])}")
+        print(f"  queries:    {delta(old[name]['queries']['mean'], new[name]['queries']['mean'])}")
+        print(f"  errors:     {delta(old[name]['errors'], new[name]['errors'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="*", choices=SCENARIOS, help="Default: all")
+    parser.add_argument("--iterations", type=int, default=100, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Threads sending requests; SQLite serializes writes, use PostgreSQL above 1")
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--feedbacks", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=30, help="Spread feedback over this many days")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=40, help="Messages per request")
+    parser.add_argument("--reseed", action="store_true", help="Delete and recreate benchmark data first")
+    parser.add_argument("--cleanup", action="store_true", help="Delete benchmark data and exit")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep INFO logs of the views")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    stub_config = config_from_args(args)
+    stub, ai_base_url = start_in_thread(stub_config)
+    setup_django(ai_base_url)
+    if not args.verbose:
+        import logging
+        logging.disable(logging.INFO)
+
+    try:
+        if args.cleanup or args.reseed:
+            cleanup()
+            if args.cleanup:
+                return
+        result = run(args, stub_config, ai_base_url)
+    finally:
+        stub.shutdown()
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Chat fan-out benchmark for the channel layer.
+
+Opens ``--rooms`` chat rooms with ``--listeners`` sockets each against a
+running ASGI server, sends ``message.send`` frames from one socket per room
+at ``--rate`` msg/s and measures how long it takes until every listener of
+the room receives the message.
+
+Run from the server/ directory against the same database the server uses:
+
+    python benchmarks/ws_fanout.py --url ws://127.0.0.1:8001 --rooms 50 --listeners 4
+
+Results are printed as JSON (see benchmarks/README.md).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+BENCH_PREFIX = "bench_ws_"
+
+
+def setup_django():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+    import django
+    django.setup()
+
+
+def prepare_rooms(rooms):
+    """Create a company, one HR, employees and requests; return [(request_id, employee_token, hr_token)]."""
+    from rest_framework_simplejwt.tokens import AccessToken
+    from accounts.models import User
+    from feedback.models import Company
+    from request.models import Request, RequestType
+
+    company, _ = Company.objects.get_or_create(name=f"{BENCH_PREFIX}company")
+    hr, _ = User.objects.get_or_create(
+        username=f"{BENCH_PREFIX}hr",
+        defaults={"name": "Bench HR", "role": User.Role.HR, "company": company},
+    )
+    request_type, _ = RequestType.objects.get_or_create(
+        name=f"{BENCH_PREFIX}type", defaults={"description": "WebSocket benchmark"}
+    )
+
+    result = []
+    hr_token = str(AccessToken.for_user(hr))
+    for i in range(rooms):
+        employee, _ = User.objects.get_or_create(
+            username=f"{BENCH_PREFIX}employee_{i}",
+            defaults={"name": f"Bench Employee {i}", "role": User.Role.EMPLOYEE, "company": company},
+        )
+        request_obj = (
+            Request.objects.filter(employee=employee, hr=hr).first()
+            or Request.objects.create(type=request_type, employee=employee, hr=hr)
+        )
+        result.append((request_obj.id, str(AccessToken.for_user(employee)), hr_token))
+    return result
+
+
+def cleanup():
+    from accounts.models import User
+    from feedback.models import Company
+    from request.models import RequestType
+
+    deleted, _ = User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+    RequestType.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    Company.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    print(f"Deleted {deleted} benchmark object(s)")
+
+
+class Stats:
+    def __init__(self):
+        self.sent_at = {}
+        self.latencies = []
+        self.delivered = 0
+        self.errors = 0
+
+
+async def listen(ws, stats, stop):
+    while not stop.is_set():
+        try:
+            raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+        except asyncio.TimeoutError:
+            continue
+        except Exception:
+            stats.errors += 1
+            return
+        received = time.perf_counter()
+        data = json.loads(raw)
+        if data.get("type") == "error":
+            stats.errors += 1
+            continue
+        sent = stats.sent_at.get(data.get("client_id"))
+        if sent is not None and "id" in data:
+            stats.latencies.append((received - sent) * 1000)
+            stats.delivered += 1
+
+
+async def send_loop(ws, stats, room_id, rate, duration):
+    interval = 1 / rate
+    deadline = time.perf_counter() + duration
+    # Случайная фаза: иначе все комнаты шлют одновременно и меряется очередь пачки
+    await asyncio.sleep(random.uniform(0, interval))
+    sent = 0
+    while time.perf_counter() < deadline:
+        client_id = f"{room_id}-{uuid.uuid4().hex[:12]}"
+        stats.sent_at[client_id] = time.perf_counter()
+        await ws.send(json.dumps({"type": "message.send", "client_id": client_id, "text": "bench"}))
+        sent += 1
+        await asyncio.sleep(interval)
+    return sent
+
+
+async def run(args, rooms):
+    import websockets
+
+    stats = Stats()
+    stop = asyncio.Event()
+    listeners, senders = [], []
+
+    connect_started = time.perf_counter()
+    for request_id, employee_token, hr_token in rooms:
+        url = f"{args.url}/ws/chat/{request_id}/"
+        senders.append((request_id, await websockets.connect(f"{url}?token={employee_token}")))
+        for i in range(args.listeners):
+            token = hr_token if i % 2 == 0 else employee_token
+            listeners.append(await websockets.connect(f"{url}?token={token}"))
+    connect_seconds = time.perf_counter() - connect_started
+
+    listen_tasks = [asyncio.create_task(listen(ws, stats, stop)) for ws in listeners]
+    # Отправитель тоже получает ack и broadcast - читаем, чтобы не копился буфер
+    drain_tasks = [asyncio.create_task(listen(ws, Stats(), stop)) for _, ws in senders]
+
+    started = time.perf_counter()
+    sent_counts = await asyncio.gather(*(
+        send_loop(ws, stats, request_id, args.rate, args.duration) for request_id, ws in senders
+    ))
+    # Ждем хвост доставки
+    await asyncio.sleep(args.drain)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*listen_tasks, *drain_tasks)
+    for ws in listeners + [ws for _, ws in senders]:
+        await ws.close()
+
+    sent = sum(sent_counts)
+    expected = sent * args.listeners
+    latencies = sorted(stats.latencies)
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))], 2)
+
+    return {
+        "channel_layer": args.label,
+        "rooms": len(rooms),
+        "sockets": len(listeners) + len(senders),
+        "connect_seconds": round(connect_seconds, 2),
+        "sent": sent,
+        "expected_deliveries": expected,
+        "delivered": stats.delivered,
+        "lost": expected - stats.delivered,
+        "errors": stats.errors,
+        "deliveries_per_second": round(stats.delivered / elapsed, 1),
+        "latency_ms": {
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "max": round(latencies[-1], 2) if latencies else None,
+            "mean": round(statistics.mean(latencies), 2) if latencies else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8001")
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--listeners", type=int, default=4, help="Listening sockets per room")
+    parser.add_argument("--rate", type=float, default=2, help="Messages per second per room")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to send for")
+    parser.add_argument("--drain", type=float, default=3, help="Seconds to wait for late deliveries")
+    parser.add_argument("--label", default=os.getenv("CHANNEL_LAYER_BACKEND", "core"),
+                        help="Name of the layer the server runs with, copied into the output")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    parser.add_argument("--cleanup", action="store_true", help="Delete benchmark users/requests and exit")
+    args = parser.parse_args()
+
+    setup_django()
+    if args.cleanup:
+        cleanup()
+        return
+
+    rooms = prepare_rooms(args.rooms)
+    result = asyncio.run(run(args, rooms))
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from django.db.models import Count, Avg
-from .models import Company, Department, Event, Feedback
+from django.db.models import Count, Avg, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .admin_actions import export_action
+from .admin_filters import AutocompleteListFilter, DateRangeListFilter
+from .admin_pagination import EstimatedCountPaginator
+from .models import Company, Department, Event, ExportJob, Feedback
 import logging
 from django.contrib import admin
 from django.utils.safestring import mark_safe
@@ -16,6 +20,7 @@ logger = logging.getLogger(__name__)
 class CompanyAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "users_count", "departments_count", "events_count", "feedbacks_count")
     search_fields = ("name",)
+    ordering = ("name",)
     list_per_page = 25
     
     def get_queryset(self, request):
@@ -53,6 +58,7 @@ class DepartmentAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "company", "users_count", "feedbacks_count")
     list_filter = ("company",)
     search_fields = ("name", "company__name")
+    ordering = ("company__name", "name")
     list_per_page = 25
     
     fieldsets = (
@@ -82,6 +88,7 @@ class EventAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "company", "local_starts_at", "local_ends_at", "safe_status", "safe_participants", "safe_feedbacks")
     list_filter = ("company", "starts_at")
     search_fields = ("title", "company__name")
+    ordering = ("-starts_at",)
     date_hierarchy = "starts_at"
     list_per_page = 25
     filter_horizontal = ("participants",)
@@ -92,6 +99,22 @@ class EventAdmin(admin.ModelAdmin):
         ("Participants", {"fields": ("participants",)}),
     )
     
+    def get_queryset(self, request):
+        # Счетчики подзапросами: считаются только для строк страницы,
+        # без декартова произведения участников и отзывов
+        participants = (
+            Event.participants.through.objects.filter(event_id=OuterRef("pk"))
+            .order_by().values("event_id").annotate(c=Count("id")).values("c")
+        )
+        feedbacks = (
+            Feedback.objects.filter(event_id=OuterRef("pk"))
+            .order_by().values("event_id").annotate(c=Count("id")).values("c")
+        )
+        return super().get_queryset(request).select_related("company").annotate(
+            _participants_count=Coalesce(Subquery(participants), Value(0)),
+            _feedbacks_count=Coalesce(Subquery(feedbacks), Value(0)),
+        )
+
     def local_starts_at(self, obj):
         """Отображение времени начала в локальной timezone"""
         try:
@@ -143,30 +166,71 @@ class EventAdmin(admin.ModelAdmin):
     safe_status.short_description = "Статус"
     
     def safe_participants(self, obj):
-        try:
-            count = obj.participants.all().count()
-            return mark_safe(f'<span style="color: #17a2b8;">👥 {count}</span>')
-        except:
-            return "—"
+        return mark_safe(f'<span style="color: #17a2b8;">👥 {obj._participants_count}</span>')
     safe_participants.short_description = "Участники"
+    safe_participants.admin_order_field = "_participants_count"
     
     def safe_feedbacks(self, obj):
-        try:
-            count = obj.feedbacks.all().count()
-            color = "#28a745" if count > 0 else "#6c757d"
-            return mark_safe(f'<span style="color: {color};">💬 {count}</span>')
-        except:
-            return "—"
+        count = obj._feedbacks_count
+        color = "#28a745" if count > 0 else "#6c757d"
+        return mark_safe(f'<span style="color: {color};">💬 {count}</span>')
     safe_feedbacks.short_description = "Отзывы"
+    safe_feedbacks.admin_order_field = "_feedbacks_count"
+
+
+# Метки эмоций AI-сервиса (поле "emotion" ответа /predict). Feedback.emotion -
+# свободный CharField, в БД значения не проверяются: при смене модели AI или
+# новых меток список нужно обновить, иначе в фильтре админки их не будет
+# (фильтр по URL ?emotion=<label> работает для любого значения)
+EMOTION_COLORS = {
+    "happy": "#4CAF50",
+    "sad": "#2196F3",
+    "angry": "#F44336",
+    "surprised": "#FF9800",
+    "fear": "#9C27B0",
+    "neutral": "#607D8B",
+}
+
+UNKNOWN_EMOTION = "unknown"
+
+
+class EmotionListFilter(admin.SimpleListFilter):
+    """Фиксированный список эмоций вместо SELECT DISTINCT emotion по всей таблице"""
+    title = "emotion"
+    parameter_name = "emotion"
+
+    def lookups(self, request, model_admin):
+        # "unknown" пишут accounts.tasks и views_feedback, если AI не вернул эмоцию
+        return [(emotion, emotion.capitalize()) for emotion in [*EMOTION_COLORS, UNKNOWN_EMOTION]]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(emotion=self.value())
+        return queryset
 
 
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ("id", "safe_user", "emotion_badge", "safe_company", "safe_department", "safe_event", "local_created_at")
-    list_filter = ("emotion", "company", "department", "event", "created_at")
-    search_fields = ("user__username", "user__first_name", "user__last_name", "event__title", "company__name", "department__name")
-    date_hierarchy = "created_at"
+    # Таблица на десятки миллионов строк: фильтры не грузят связанные таблицы целиком,
+    # диапазон дат вместо date_hierarchy, оценка планировщика вместо COUNT(*)
+    list_filter = (
+        EmotionListFilter,
+        ("company", AutocompleteListFilter),
+        ("department", AutocompleteListFilter),
+        ("event", AutocompleteListFilter),
+        ("created_at", DateRangeListFilter),
+    )
+    search_fields = ("user__username", "user__name", "event__title", "company__name", "department__name")
     list_per_page = 50
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    autocomplete_fields = ("user", "company", "department", "event")
+    actions = [
+        export_action(ExportJob.Kind.FEEDBACK, ExportJob.Format.CSV, "Export to CSV (background)"),
+        export_action(ExportJob.Kind.FEEDBACK, ExportJob.Format.XLSX, "Export to XLSX (background)"),
+    ]
     readonly_fields = ("created_at", "top3_display")
     
     fieldsets = (
@@ -180,8 +244,9 @@ class FeedbackAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        # Не делаем select_related("user") чтобы избежать ошибок с удаленными пользователями
-        return super().get_queryset(request).select_related("company", "department", "event")
+        # user - через prefetch, а не select_related: INNER JOIN спрятал бы отзывы
+        # удаленных пользователей, а prefetch одним запросом на страницу их оставляет
+        return super().get_queryset(request).select_related("company", "department", "event").prefetch_related("user")
     
     # --- Безопасные методы отображения ---
     
@@ -229,16 +294,8 @@ class FeedbackAdmin(admin.ModelAdmin):
         if not obj.emotion:
             return "—"
         
-        colors = {
-            "happy": "#4CAF50",
-            "sad": "#2196F3",
-            "angry": "#F44336",
-            "surprised": "#FF9800",
-            "fear": "#9C27B0",
-            "neutral": "#607D8B",
-        }
         emotion_lower = str(obj.emotion).lower()
-        color = colors.get(emotion_lower, "#757575")
+        color = EMOTION_COLORS.get(emotion_lower, "#757575")
         return mark_safe(
             f'<span style="background:{color};color:white;padding:3px 8px;border-radius:4px;font-weight:bold">'
             f'{escape(obj.emotion.upper())}</span>'
@@ -267,6 +324,46 @@ class FeedbackAdmin(admin.ModelAdmin):
     top3_display.short_description = "Top 3 Confidence"
 
 
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "format", "status", "progress", "created_at", "finished_at", "download")
+    list_filter = ("status", "kind", "format")
+    list_select_related = ("user",)
+    readonly_fields = (
+        "id", "user", "kind", "format", "params", "status", "rows_total", "rows_done",
+        "download", "error", "created_at", "started_at", "finished_at",
+    )
+    fields = readonly_fields
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        # Выгрузки запускаются действиями в списках фидбеков/заявок
+        return False
+
+    def progress(self, obj):
+        if obj.rows_total:
+            return f"{obj.rows_done}/{obj.rows_total}"
+        return obj.rows_done or "—"
+    progress.short_description = "Rows"
+
+    def download(self, obj):
+        from request.services.protected_media import staff_media_url
+
+        if obj.file:
+            return format_html('<a href="{}">📥 {}</a>', staff_media_url(obj.file.name), obj.file.name.split("/")[-1])
+        return "—"
+    download.short_description = "File"
+
+    def delete_model(self, request, obj):
+        obj.file.delete(save=False)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for job in queryset:
+            job.file.delete(save=False)
+        super().delete_queryset(request, queryset)
+
+
 # Настройка главной страницы админки
 admin.site.site_header = "Emotions AI Administration"
 admin.site.site_title = "Emotions AI Admin"
@@ -0,0 +1,27 @@
+from django.contrib import admin, messages
+from django.db import transaction
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .services.exports import changelist_params, create_export
+
+
+def export_action(kind, export_format, description):
+    """
+    Admin action: export the selected rows (or all filtered rows with
+    "select all") in the background. The worker gets the changelist filters
+    and the selection and rebuilds the queryset, the page returns immediately.
+    """
+    @admin.action(description=description)
+    def action(modeladmin, request, queryset):
+        with transaction.atomic():
+            job = create_export(request.user, kind, export_format, changelist=changelist_params(modeladmin, request))
+        url = reverse("admin:feedback_exportjob_change", args=[job.pk])
+        modeladmin.message_user(
+            request,
+            format_html('Export started: <a href="{}">{}</a>. The file will appear there when it is ready.', url, job.pk),
+            messages.SUCCESS,
+        )
+
+    action.__name__ = f"export_{export_format.lower()}"
+    return action
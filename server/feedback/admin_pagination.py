@@ -0,0 +1,32 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def planner_estimate(queryset):
+    """Row estimate of the PostgreSQL planner (EXPLAIN, the query is not executed)"""
+    try:
+        plan = queryset.order_by().values("pk").explain(format="json")
+        return int(json.loads(plan)[0]["Plan"]["Plan Rows"])
+    except (DatabaseError, ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для больших таблиц в админке. На PostgreSQL сначала берет оценку
+    планировщика; если она выше порога, точный COUNT(*) не выполняется.
+    Маленькие выборки и SQLite считаются точно.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if connections[qs.db].vendor == "postgresql":
+            estimate = planner_estimate(qs)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from feedback.services.exports import cleanup_expired_exports
+
+
+class Command(BaseCommand):
+    help = "Delete finished export jobs and their files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Remove jobs created more than this many days ago")
+
+    def handle(self, *args, **options):
+        removed = cleanup_expired_exports(timedelta(days=options["days"]))
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} export job(s)"))
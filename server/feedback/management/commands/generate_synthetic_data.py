@@ -0,0 +1,75 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback.services.synthetic import Generator, SyntheticConfig, cleanup, copy_available
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate deterministic synthetic companies, users, events, feedback and request threads "
+        "for scale testing. The same --seed, sizes and --end-date give the same data."
+    )
+
+    def add_arguments(self, parser):
+        defaults = SyntheticConfig()
+        parser.add_argument("--companies", type=int, default=defaults.companies)
+        parser.add_argument("--employees", type=int, default=defaults.employees, help="Employees per company")
+        parser.add_argument("--departments", type=int, default=defaults.departments, help="Departments per company")
+        parser.add_argument("--days", type=int, default=defaults.days, help="Time span of the data, ending at --end-date")
+        parser.add_argument("--end-date", type=date.fromisoformat, help="YYYY-MM-DD, default today")
+        parser.add_argument("--events", type=int, default=defaults.events, help="Events per company")
+        parser.add_argument("--participants", type=int, default=defaults.participants, help="Max participants per event")
+        parser.add_argument("--feedback-rate", type=float, default=defaults.feedback_rate,
+                            help="Feedback per employee per working day")
+        parser.add_argument("--event-response-rate", type=float, default=defaults.event_response_rate,
+                            help="Share of participants who leave feedback on a past event")
+        parser.add_argument("--requests-per-employee", type=float, default=defaults.requests_per_employee)
+        parser.add_argument("--messages", type=int, default=defaults.messages, help="Mean messages per request")
+        parser.add_argument("--max-messages", type=int, default=defaults.max_messages)
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--prefix", default=defaults.prefix, help="Prefix of generated company/user/type names")
+        parser.add_argument("--password", default=defaults.password, help="Password of all generated users")
+        parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+        parser.add_argument("--copy", choices=["auto", "always", "never"], default="auto",
+                            help="Use PostgreSQL COPY for feedback, messages and participants (auto: on PostgreSQL)")
+        parser.add_argument("--cleanup", action="store_true", help="Delete data generated with --prefix and exit")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            removed = cleanup(options["prefix"], log=self.stdout.write)
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} synthetic object(s)"))
+            return
+
+        if options["copy"] == "always" and not copy_available():
+            raise CommandError("COPY needs PostgreSQL")
+        config = SyntheticConfig(
+            companies=options["companies"],
+            employees=options["employees"],
+            departments=options["departments"],
+            days=options["days"],
+            end_date=options["end_date"],
+            events=options["events"],
+            participants=options["participants"],
+            feedback_rate=options["feedback_rate"],
+            event_response_rate=options["event_response_rate"],
+            requests_per_employee=options["requests_per_employee"],
+            messages=options["messages"],
+            max_messages=options["max_messages"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+            use_copy=options["copy"] != "never" and copy_available(),
+        )
+
+        started = time.monotonic()
+        try:
+            counts = Generator(config, log=self.stdout.write).run()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.monotonic() - started
+        summary = ", ".join(f"{count} {label}" for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary} in {elapsed:.0f}s"))
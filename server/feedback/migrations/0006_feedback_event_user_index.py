@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0005_alter_event_ends_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['event', 'user'], name='feedback_fe_event_i_bde912_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0006_feedback_event_user_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['company', 'starts_at'], name='feedback_ev_company_16e11f_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 
@@ -29,6 +31,12 @@ class Event(models.Model):
     ends_at = models.DateTimeField()
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="events", blank=True)
 
+    class Meta:
+        indexes = [
+            # Список ивентов компании для HR (фильтры по датам, keyset по starts_at)
+            models.Index(fields=["company", "starts_at"]),
+        ]
+
     def __str__(self):
         try:
             return f"{self.company.name} — {self.title}" if self.company else self.title
@@ -53,6 +61,8 @@ class Feedback(models.Model):
         indexes = [
             models.Index(fields=["created_at"]),
             models.Index(fields=["emotion"]),
+            # has_feedback / повторный фидбек на ивент
+            models.Index(fields=["event", "user"]),
         ]
 
     def __str__(self):
@@ -61,3 +71,50 @@ class Feedback(models.Model):
             return f"Feedback #{self.pk} - {user_str} ({self.emotion})"
         except:
             return f"Feedback #{self.pk}"
+
+
+class ExportJob(models.Model):
+    """
+    Фоновая выгрузка фидбеков/заявок в файл. Строки пишет celery
+    (services.exports), файл отдается через /api/media/ только автору.
+    """
+    class Kind(models.TextChoices):
+        FEEDBACK = "FEEDBACK", "Feedback"
+        REQUESTS = "REQUESTS", "Requests"
+
+    class Format(models.TextChoices):
+        CSV = "CSV", "CSV (gzip)"
+        XLSX = "XLSX", "XLSX"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        COMPLETED = "COMPLETED", "Completed"
+        FAILED = "FAILED", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="export_jobs")
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    format = models.CharField(max_length=8, choices=Format.choices, default=Format.CSV)
+    # Фильтры выгрузки (services.exports.build_queryset)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_done = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="exports/", null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # Список выгрузок пользователя
+            models.Index(fields=["user", "-created_at"]),
+            # Проверка доступа к файлу в /api/media/
+            models.Index(fields=["file"]),
+        ]
+
+    def __str__(self):
+        return f"Export {self.id} ({self.kind}, {self.status})"
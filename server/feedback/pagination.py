@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ParticipantCursorPagination(CursorPagination):
+    """Keyset-пагинация участников ивента по (name, id)"""
+    ordering = ("name", "id")
+    page_size = 50
+    page_size_query_param = "limit"
+    max_page_size = 200
+
+
+class EventCursorPagination(CursorPagination):
+    """Keyset-пагинация ивентов компании, новые первыми"""
+    ordering = ("-starts_at", "-id")
+    page_size = 30
+    page_size_query_param = "limit"
+    max_page_size = 100
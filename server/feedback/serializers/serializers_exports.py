@@ -0,0 +1,38 @@
+from rest_framework import serializers
+
+from ..models import ExportJob
+
+
+class ExportCreateSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=ExportJob.Kind.choices)
+    format = serializers.ChoiceField(choices=ExportJob.Format.choices, default=ExportJob.Format.CSV)
+    # Те же параметры, что у списка: /hr/analytics/feedbacks/ или /hr/requests/
+    filters = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False, default=dict)
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id", "kind", "format", "status", "rows_total", "rows_done", "progress",
+            "file", "error", "created_at", "started_at", "finished_at",
+        ]
+
+    def get_progress(self, obj) -> float:
+        if obj.status == ExportJob.Status.COMPLETED:
+            return 1.0
+        if not obj.rows_total:
+            return 0.0
+        return round(min(obj.rows_done / obj.rows_total, 1.0), 3)
+
+    def get_file(self, obj) -> str | None:
+        """Подписанная ссылка /api/media/ на готовый файл"""
+        from request.services.protected_media import signed_media_url
+
+        request = self.context.get("request")
+        if not obj.file or not request:
+            return None
+        return signed_media_url(obj.file.name, request.user.id)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from accounts.models import User
-from ..models import Feedback, Event
+from ..models import Feedback, Event, Department
+from ..services.participants import check_users, parse_participants_csv, set_participant_ids
 
 
 class EmployeeSerializer(serializers.ModelSerializer):
@@ -56,12 +57,18 @@ class EventListSerializer(serializers.ModelSerializer):
             "participants_count"
         ]
     
-    def get_participants_count(self, obj):
+    def get_participants_count(self, obj) -> int:
+        if hasattr(obj, "_participants_count"):
+            return obj._participants_count
         return obj.participants.count()
 
 
 class EventDetailSerializer(serializers.ModelSerializer):
-    """Детальный сериализатор ивента с ID участников"""
+    """
+    Детальный сериализатор ивента.
+    Полный список ID участников отдается только с context["include_participant_ids"],
+    для больших ивентов используется /participants/ с пагинацией.
+    """
     company_name = serializers.CharField(source="company.name", read_only=True)
     participants = serializers.SerializerMethodField()
     participants_count = serializers.SerializerMethodField()
@@ -85,6 +92,12 @@ class EventDetailSerializer(serializers.ModelSerializer):
     def get_participants_count(self, obj):
         return obj.participants.count()
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get("include_participant_ids"):
+            fields.pop("participants")
+        return fields
+
 
 class EventCreateUpdateSerializer(serializers.ModelSerializer):
     """Создание и обновление ивента"""
@@ -109,7 +122,7 @@ class EventCreateUpdateSerializer(serializers.ModelSerializer):
         fields = ["title", "starts_at", "ends_at", "participants"]
     
     def validate_participants(self, participant_ids):
-        """Проверяем что все участники существуют и являются Employee компании HR"""
+        """Проверяем что все участники существуют и являются Employee компании HR (один запрос)"""
         if not participant_ids:
             return []
         
@@ -117,33 +130,12 @@ class EventCreateUpdateSerializer(serializers.ModelSerializer):
         if not request or not request.user:
             raise serializers.ValidationError("User not authenticated")
         
-        # Проверяем существование пользователей
-        existing_users = User.objects.filter(id__in=participant_ids)
-        existing_ids = set(existing_users.values_list('id', flat=True))
-        
-        for pid in participant_ids:
-            if pid not in existing_ids:
-                raise serializers.ValidationError(
-                    f'User with ID {pid} does not exist'
-                )
+        errors = check_users(request.user.company_id, user_ids=participant_ids)
+        if errors:
+            raise serializers.ValidationError(errors[0])
         
-        # Проверяем что все из нашей компании и Employee
-        for user in existing_users:
-            if user.company_id != request.user.company_id:
-                raise serializers.ValidationError(
-                    f'User "{user.username}" (ID: {user.id}) is not from your company'
-                )
-            if user.role != User.Role.EMPLOYEE:
-                raise serializers.ValidationError(
-                    f'User "{user.username}" (ID: {user.id}) is not an employee'
-                )
-            if not user.is_active:
-                raise serializers.ValidationError(
-                    f'User "{user.username}" (ID: {user.id}) is not active'
-                )
-        
-        # Возвращаем объекты User для дальнейшего использования
-        return list(existing_users)
+        # Возвращаем уникальные ID, объекты User не загружаем
+        return sorted(set(participant_ids))
     
     def validate(self, attrs):
         """Валидация дат"""
@@ -180,7 +172,7 @@ class EventCreateUpdateSerializer(serializers.ModelSerializer):
         
         # Добавляем участников
         if participants:
-            event.participants.set(participants)
+            set_participant_ids(event, participants)
         
         return event
     
@@ -193,8 +185,73 @@ class EventCreateUpdateSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
         
-        # Обновляем участников если переданы
+        # Обновляем участников если переданы (применяем только разницу)
         if participants is not None:
-            instance.participants.set(participants)
+            set_participant_ids(instance, participants)
         
-        return instance
\ No newline at end of file
+        return instance
+
+
+class EventParticipantsBulkSerializer(serializers.Serializer):
+    """Массовое назначение участников ивента: ID, департаменты, вся компания или CSV"""
+    MODE_ADD = "add"
+    MODE_REMOVE = "remove"
+    MODE_REPLACE = "replace"
+
+    mode = serializers.ChoiceField(
+        choices=[MODE_ADD, MODE_REMOVE, MODE_REPLACE],
+        default=MODE_ADD,
+        help_text="add - добавить к текущим, remove - убрать, replace - заменить весь список",
+    )
+    user_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=True)
+    department_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=True)
+    whole_company = serializers.BooleanField(required=False, default=False)
+    file = serializers.FileField(
+        required=False,
+        help_text="CSV с колонкой id и/или username (или один столбец без заголовка)",
+    )
+
+    def validate(self, attrs):
+        request = self.context.get("request")
+        if not request or not request.user:
+            raise serializers.ValidationError("User not authenticated")
+        company_id = request.user.company_id
+
+        user_ids = set(attrs.get("user_ids") or [])
+        usernames = set()
+        department_ids = set(attrs.get("department_ids") or [])
+
+        csv_file = attrs.get("file")
+        if csv_file:
+            try:
+                csv_ids, csv_usernames = parse_participants_csv(csv_file)
+            except ValueError as e:
+                raise serializers.ValidationError({"file": str(e)})
+            user_ids.update(csv_ids)
+            usernames.update(csv_usernames)
+
+        if not (user_ids or usernames or department_ids or attrs.get("whole_company")):
+            raise serializers.ValidationError(
+                "Provide user_ids, department_ids, whole_company or a CSV file"
+            )
+
+        if department_ids:
+            found = set(Department.objects.filter(
+                id__in=department_ids, company_id=company_id
+            ).values_list("id", flat=True))
+            missing = sorted(department_ids - found)
+            if missing:
+                raise serializers.ValidationError({
+                    "department_ids": f"Departments not found in your company: {missing}"
+                })
+
+        # При удалении не важно, активен ли сотрудник - проверяем только существование в компании
+        if attrs["mode"] != self.MODE_REMOVE:
+            errors = check_users(company_id, user_ids=user_ids, usernames=usernames)
+            if errors:
+                raise serializers.ValidationError({"participants": errors[:20]})
+
+        attrs["user_ids"] = sorted(user_ids)
+        attrs["usernames"] = sorted(usernames)
+        attrs["department_ids"] = sorted(department_ids)
+        return attrs
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from django.utils import timezone
+
+
+def filter_feedbacks(feedbacks, params, require_dates=True):
+    """
+    Filters of the HR feedback analytics: date range, emotions,
+    departments, event and event presence.
+
+    Shared by the analytics endpoint and feedback exports. Raises
+    ValueError with the message for a 400 response.
+    """
+    start_date_str = params.get("start_date")
+    end_date_str = params.get("end_date")
+
+    if require_dates and (not start_date_str or not end_date_str):
+        raise ValueError("start_date and end_date are required (format: YYYY-MM-DD)")
+
+    # Парсинг дат, время - на полный день
+    try:
+        if start_date_str:
+            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
+            feedbacks = feedbacks.filter(
+                created_at__gte=timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+            )
+        if end_date_str:
+            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+            feedbacks = feedbacks.filter(
+                created_at__lte=timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
+            )
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD") from None
+
+    # Фильтр по эмоциям
+    emotions_str = params.get("emotions")
+    if emotions_str:
+        emotions_list = [e.strip() for e in emotions_str.split(",") if e.strip()]
+        if emotions_list:
+            feedbacks = feedbacks.filter(emotion__in=emotions_list)
+
+    # Фильтр по департаментам
+    departments_str = params.get("departments")
+    if departments_str:
+        try:
+            department_ids = [int(d.strip()) for d in departments_str.split(",") if d.strip()]
+        except ValueError:
+            raise ValueError("Invalid department IDs format") from None
+        if department_ids:
+            feedbacks = feedbacks.filter(department_id__in=department_ids)
+
+    # Фильтр по конкретному ивенту
+    event_id = params.get("event_id")
+    if event_id:
+        try:
+            feedbacks = feedbacks.filter(event_id=int(event_id))
+        except ValueError:
+            raise ValueError("Invalid event_id format") from None
+
+    # Фильтр по наличию ивента
+    has_event = params.get("has_event")
+    if has_event:
+        if has_event.lower() == "true":
+            feedbacks = feedbacks.filter(event__isnull=False)
+        elif has_event.lower() == "false":
+            feedbacks = feedbacks.filter(event__isnull=True)
+
+    return feedbacks
@@ -4,6 +4,8 @@ import logging
 from PIL import Image
 from io import BytesIO
 
+from server.metrics import observe_ai_call
+
 logger = logging.getLogger(__name__)
 AI_BASE_URL = os.environ["AI_BASE_URL"]
 
@@ -54,9 +56,10 @@ def analyze_face(image_file) -> dict:
         }
 
         logger.info(f"Sending request to {AI_BASE_URL}/predict")
-        r = requests.post(f"{AI_BASE_URL}/predict", files=files, timeout=120)
-        r.raise_for_status()
-        result = r.json()
+        with observe_ai_call("predict"):
+            r = requests.post(f"{AI_BASE_URL}/predict", files=files, timeout=120)
+            r.raise_for_status()
+            result = r.json()
         logger.info(f"AI response: {result}")
         return result
     
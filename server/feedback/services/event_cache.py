@@ -0,0 +1,70 @@
+import logging
+
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "employee_events:v1:{user_id}"
+# Верхняя граница жизни записи; актуальность по времени проверяется при чтении
+CACHE_TTL = 24 * 60 * 60
+
+
+def _key(user_id):
+    return CACHE_KEY.format(user_id=user_id)
+
+
+def _compute_windows(user, now):
+    """Active and upcoming events of the user as (id, starts_at_ts, ends_at_ts) tuples."""
+    from ..models import Event
+
+    rows = Event.objects.filter(
+        company_id=user.company_id,
+        participants=user,
+        ends_at__gte=now,
+    ).values_list("id", "starts_at", "ends_at")
+    return [(event_id, starts_at.timestamp(), ends_at.timestamp()) for event_id, starts_at, ends_at in rows]
+
+
+def get_active_event_ids(user, now=None):
+    """
+    IDs of events that are active for the user right now.
+
+    The per-user list of event windows is computed once and then served
+    from the cache; entries simply stop matching once ``ends_at`` passes,
+    so no write is needed when an event ends.
+    """
+    now = now or timezone.now()
+    windows = cache.get(_key(user.id))
+    if windows is None:
+        windows = _compute_windows(user, now)
+        ttl = CACHE_TTL
+        if windows:
+            # Нет смысла хранить дольше окончания последнего ивента
+            ttl = min(CACHE_TTL, max(int(max(e for _, _, e in windows) - now.timestamp()), 1))
+        cache.set(_key(user.id), windows, ttl)
+
+    ts = now.timestamp()
+    return [event_id for event_id, starts_at, ends_at in windows if starts_at <= ts <= ends_at]
+
+
+def invalidate_users(user_ids):
+    """Drop cached event windows for the given users."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+    logger.debug(f"Invalidated employee events cache for {len(user_ids)} user(s)")
+
+
+def event_participant_ids(event_id):
+    """IDs of the current participants of the event."""
+    from ..models import Event
+
+    through = Event.participants.through
+    return list(through.objects.filter(event_id=event_id).values_list("user_id", flat=True))
+
+
+def invalidate_event(event_id):
+    """Drop cached event windows for all current participants of the event."""
+    invalidate_users(event_participant_ids(event_id))
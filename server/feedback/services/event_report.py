@@ -0,0 +1,92 @@
+import logging
+
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "event_report:v1:{event_id}"
+# Отчет сбрасывается при новом фидбеке/изменении участников, TTL - страховка
+CACHE_TTL = 24 * 60 * 60
+
+
+def _key(event_id):
+    return CACHE_KEY.format(event_id=event_id)
+
+
+def _empty_report():
+    return {
+        "participants_count": 0,
+        "responders_count": 0,
+        "completion_rate": 0.0,
+        "emotions": {},
+    }
+
+
+def _compute_reports(event_ids):
+    """
+    Completion stats for many events with one grouped query.
+
+    Each participant row of the through table is annotated with the emotion
+    of the participant's latest feedback on that event (NULL if none) and
+    grouped by (event, emotion).
+    """
+    from ..models import Event, Feedback
+
+    through = Event.participants.through
+    latest_emotion = Feedback.objects.filter(
+        event_id=OuterRef("event_id"),
+        user_id=OuterRef("user_id"),
+    ).order_by("-created_at").values("emotion")[:1]
+
+    rows = (
+        through.objects.filter(event_id__in=event_ids)
+        .annotate(emotion=Subquery(latest_emotion))
+        .values("event_id", "emotion")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+    reports = {event_id: _empty_report() for event_id in event_ids}
+    for row in rows:
+        report = reports[row["event_id"]]
+        report["participants_count"] += row["count"]
+        if row["emotion"] is not None:
+            report["responders_count"] += row["count"]
+            report["emotions"][row["emotion"]] = row["count"]
+
+    for report in reports.values():
+        if report["participants_count"]:
+            report["completion_rate"] = round(
+                report["responders_count"] / report["participants_count"], 4
+            )
+    return reports
+
+
+def get_event_reports(event_ids):
+    """Reports for the given events: cached ones from the cache, the rest computed in one query."""
+    event_ids = list(event_ids)
+    cached = cache.get_many([_key(event_id) for event_id in event_ids])
+
+    reports = {}
+    missing = []
+    for event_id in event_ids:
+        report = cached.get(_key(event_id))
+        if report is None:
+            missing.append(event_id)
+        else:
+            reports[event_id] = report
+
+    if missing:
+        computed = _compute_reports(missing)
+        cache.set_many({_key(event_id): report for event_id, report in computed.items()}, CACHE_TTL)
+        reports.update(computed)
+        logger.debug(f"Event reports: {len(reports) - len(missing)} cached, {len(missing)} computed")
+
+    return reports
+
+
+def invalidate_reports(event_ids):
+    event_ids = {event_id for event_id in event_ids if event_id}
+    if event_ids:
+        cache.delete_many([_key(event_id) for event_id in event_ids])
@@ -0,0 +1,310 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import date, datetime
+
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.admin import helpers
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.files import File
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# Строк на один fetch серверного курсора и на одно обновление прогресса
+EXPORT_CHUNK_SIZE = 2000
+# Лимит листа Excel без строки заголовка
+XLSX_MAX_ROWS = 1_048_575
+# Одновременных незавершенных выгрузок на пользователя
+MAX_ACTIVE_EXPORTS = 3
+
+# (заголовок, поле для values_list) - без загрузки моделей целиком
+FEEDBACK_COLUMNS = [
+    ("id", "id"),
+    ("created_at", "created_at"),
+    ("user_id", "user_id"),
+    ("username", "user__username"),
+    ("user_name", "user__name"),
+    ("emotion", "emotion"),
+    ("top3", "top3"),
+    ("company", "company__name"),
+    ("department", "department__name"),
+    ("event_id", "event_id"),
+    ("event_title", "event__title"),
+]
+REQUEST_COLUMNS = [
+    ("id", "id"),
+    ("created_at", "created_at"),
+    ("status", "status"),
+    ("type", "type__name"),
+    ("employee_id", "employee_id"),
+    ("employee_username", "employee__username"),
+    ("employee_name", "employee__name"),
+    ("hr_username", "hr__username"),
+    ("messages_count", "messages_count"),
+    ("last_message_at", "last_message_at"),
+    ("closed_at", "closed_at"),
+]
+COLUMNS = {
+    ExportJob.Kind.FEEDBACK: FEEDBACK_COLUMNS,
+    ExportJob.Kind.REQUESTS: REQUEST_COLUMNS,
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+# --- Фильтры ---
+
+def _scoped_queryset(kind, user, params):
+    """Queryset of an API export: the HR's company feedback or the HR's own requests"""
+    if kind == ExportJob.Kind.FEEDBACK:
+        from ..models import Feedback
+        from .analytics import filter_feedbacks
+
+        return filter_feedbacks(
+            Feedback.objects.filter(company_id=user.company_id), params, require_dates=False
+        )
+
+    from request.models import Request
+    from request.services.inbox import filter_requests, filter_statuses
+
+    return filter_statuses(filter_requests(Request.objects.filter(hr_id=user.id), params), params)
+
+
+def validate_params(kind, user, params):
+    """Check API filters before the job is queued; raises ValueError with the 400 message."""
+    _scoped_queryset(kind, user, params)
+
+
+def changelist_params(modeladmin, request):
+    """
+    State of an admin action for the worker: changelist filters from the
+    URL (search, list_filter, date_hierarchy) and the selected pks, or
+    ``None`` with "select all". Plain JSON - the worker rebuilds the queryset
+    through the same ModelAdmin (see ``_changelist_queryset``).
+    """
+    select_across = request.POST.get("select_across") == "1"
+    return {
+        "model": modeladmin.model._meta.label,
+        "filters": {key: request.GET.getlist(key) for key in request.GET},
+        "selected": None if select_across else request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+    }
+
+
+def _changelist_queryset(job):
+    state = job.params["admin"]
+    model = apps.get_model(state["model"])
+    modeladmin = admin.site._registry.get(model)
+    if modeladmin is None:
+        raise ExportError(f"{state['model']} is not registered in the admin")
+
+    # Запрос страницы списка от имени автора выгрузки: те же фильтры, поиск
+    # и ограничения get_queryset, что видел пользователь
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")
+    request.GET = QueryDict(mutable=True)
+    for key, values in state["filters"].items():
+        request.GET.setlist(key, values)
+    request.user = job.user
+    if not (job.user.is_active and job.user.is_staff and modeladmin.has_view_or_change_permission(request)):
+        raise ExportError("No permission to export this list")
+
+    try:
+        changelist = modeladmin.get_changelist_instance(request)
+        queryset = changelist.get_queryset(request)
+    except IncorrectLookupParameters:
+        raise ExportError("Invalid admin filters") from None
+    if state["selected"] is not None:
+        queryset = queryset.filter(pk__in=state["selected"])
+    return queryset
+
+
+def build_queryset(job):
+    """values_list queryset of the export rows, ordered by id"""
+    if "admin_query" in job.params:
+        # Формат до перехода на параметры списка - без фильтров выгрузилось бы все
+        raise ExportError("Outdated admin export, start it again")
+    if "admin" in job.params:
+        queryset = _changelist_queryset(job)
+    else:
+        queryset = _scoped_queryset(job.kind, job.user, job.params.get("filters") or {})
+    lookups = [lookup for _, lookup in COLUMNS[job.kind]]
+    # Аннотации/prefetch из админки для выгрузки не нужны
+    return queryset.order_by("id").values_list(*lookups)
+
+
+# --- Запуск ---
+
+def create_export(user, kind, export_format=ExportJob.Format.CSV, filters=None, changelist=None):
+    """
+    Create a job and queue it after commit.
+
+    API exports pass ``filters`` (scoped to the user at run time), admin
+    actions pass ``changelist_params()`` of the changelist.
+    """
+    params = {"admin": changelist} if changelist is not None else {"filters": filters or {}}
+    job = ExportJob.objects.create(user=user, kind=kind, format=export_format, params=params)
+    transaction.on_commit(lambda: _queue(job.id))
+    return job
+
+
+def _queue(job_id):
+    from ..tasks import run_export_job
+
+    try:
+        run_export_job.delay(str(job_id))
+    except Exception as e:
+        logger.error(f"Failed to queue export {job_id}: {e}")
+        ExportJob.objects.filter(pk=job_id).update(
+            status=ExportJob.Status.FAILED, error="Could not queue the export", finished_at=timezone.now()
+        )
+
+
+def active_exports_count(user):
+    return ExportJob.objects.filter(
+        user=user, status__in=[ExportJob.Status.PENDING, ExportJob.Status.RUNNING]
+    ).count()
+
+
+# --- Запись файла ---
+
+# Ячейки, которые Excel/LibreOffice считают формулой
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell(value, for_xlsx=False):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value)
+        # openpyxl не принимает aware datetime
+        return value.replace(tzinfo=None) if for_xlsx else value.isoformat()
+    if isinstance(value, date):
+        return value if for_xlsx else value.isoformat()
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _with_progress(job, rows):
+    """Yield rows and store the progress once per chunk"""
+    done = 0
+    for row in rows:
+        yield row
+        done += 1
+        if done % EXPORT_CHUNK_SIZE == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_done=done)
+    job.rows_done = done
+
+
+def _write_csv(path, headers, rows):
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow([_cell(value) for value in row])
+
+
+def _write_xlsx(path, headers, rows):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportError("XLSX export requires openpyxl") from None
+
+    # write_only: строки сразу уходят во временный XML, память не растет
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("export")
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([_cell(value, for_xlsx=True) for value in row])
+    workbook.save(path)
+
+
+def run_export(job_id):
+    """
+    Write the export file. Rows are streamed from a server-side cursor
+    (``iterator``) straight into the compressed file, so memory does not
+    depend on the number of rows.
+    """
+    job = ExportJob.objects.select_related("user").filter(pk=job_id).first()
+    if not job or job.status in (ExportJob.Status.COMPLETED, ExportJob.Status.FAILED):
+        return job
+
+    suffix = ".xlsx" if job.format == ExportJob.Format.XLSX else ".csv.gz"
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        job.status = ExportJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.rows_done = 0
+        queryset = build_queryset(job)
+        job.rows_total = queryset.count()
+        job.save(update_fields=["status", "started_at", "rows_done", "rows_total"])
+
+        headers = [header for header, _ in COLUMNS[job.kind]]
+        rows = _with_progress(job, queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+        if job.format == ExportJob.Format.XLSX:
+            if job.rows_total > XLSX_MAX_ROWS:
+                raise ExportError(f"XLSX is limited to {XLSX_MAX_ROWS} rows, use CSV")
+            _write_xlsx(tmp_path, headers, rows)
+        else:
+            _write_csv(tmp_path, headers, rows)
+
+        filename = f"{job.kind.lower()}_{timezone.localtime(job.created_at):%Y%m%d_%H%M}{suffix}"
+        with open(tmp_path, "rb") as f:
+            job.file.save(f"{job.id}/{filename}", File(f), save=False)
+        job.status = ExportJob.Status.COMPLETED
+    except Exception as e:
+        logger.error(f"Export {job.id} failed: {e}", exc_info=not isinstance(e, ExportError))
+        job.status = ExportJob.Status.FAILED
+        job.error = str(e)[:1000]
+    finally:
+        os.unlink(tmp_path)
+
+    job.finished_at = timezone.now()
+    with transaction.atomic():
+        job.save(update_fields=["status", "rows_done", "file", "error", "finished_at"])
+        _notify(job)
+    return job
+
+
+def _notify(job):
+    """WebSocket event to the author's inbox socket (через outbox)"""
+    from request.services.outbox import enqueue_user_event
+    from request.services.protected_media import signed_media_url
+
+    enqueue_user_event(job.user_id, {
+        "type": "export.finished",
+        "export_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "rows": job.rows_done,
+        "file": signed_media_url(job.file.name, job.user_id) if job.file else None,
+        "error": job.error or None,
+    })
+
+
+def cleanup_expired_exports(max_age):
+    """Delete finished jobs older than ``max_age`` together with their files."""
+    cutoff = timezone.now() - max_age
+    removed = 0
+    for job in ExportJob.objects.filter(created_at__lt=cutoff).exclude(status=ExportJob.Status.RUNNING).iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        removed += 1
+    return removed
@@ -0,0 +1,254 @@
+import csv
+import io
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.models import User
+from ..models import Event
+from .event_cache import invalidate_event, invalidate_users
+from .event_report import invalidate_reports
+
+logger = logging.getLogger(__name__)
+
+# Ограничение на размер CSV со списком участников (один столбец id/username)
+MAX_CSV_SIZE = 2 * 1024 * 1024
+BULK_BATCH_SIZE = 1000
+
+
+def eligible_employees(company_id):
+    """Employees who may be assigned to events of the given company."""
+    return User.objects.filter(
+        company_id=company_id,
+        role=User.Role.EMPLOYEE,
+        is_active=True,
+    )
+
+
+def select_users(company_id, *, user_ids=(), usernames=(), department_ids=(), whole_company=False):
+    """
+    Build a single queryset for a participant selection.
+
+    The selectors are OR-ed together: explicit IDs, usernames (from CSV),
+    whole departments or the whole company. Nothing is evaluated here, the
+    queryset is used as a subquery by add/remove helpers.
+    """
+    qs = User.objects.filter(company_id=company_id)
+    if whole_company:
+        return qs
+
+    condition = Q()
+    if user_ids:
+        condition |= Q(id__in=list(user_ids))
+    if usernames:
+        condition |= Q(username__in=list(usernames))
+    if department_ids:
+        condition |= Q(department_id__in=list(department_ids))
+    if not condition:
+        return qs.none()
+    return qs.filter(condition)
+
+
+def parse_participants_csv(uploaded_file):
+    """
+    Parse a CSV with participants.
+
+    Supported layouts: a header row with ``id`` and/or ``username`` columns,
+    or a single column of IDs/usernames without a header.
+
+    Returns:
+        tuple (user_ids, usernames)
+    """
+    if uploaded_file.size and uploaded_file.size > MAX_CSV_SIZE:
+        raise ValueError(f"CSV file is too large (max {MAX_CSV_SIZE // 1024} KB)")
+
+    user_ids, usernames = set(), set()
+    text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = None
+        for row in reader:
+            cells = [c.strip() for c in row if c.strip()]
+            if not cells:
+                continue
+
+            if header is None:
+                lowered = [c.lower() for c in cells]
+                if "id" in lowered or "username" in lowered:
+                    header = lowered
+                    continue
+                header = []
+
+            if header:
+                values = dict(zip(header, cells))
+                raw_id = values.get("id")
+                raw_username = values.get("username")
+            else:
+                raw_id, raw_username = cells[0], None
+                if not raw_id.isdigit():
+                    raw_id, raw_username = None, cells[0]
+
+            if raw_id:
+                if not raw_id.isdigit():
+                    raise ValueError(f'Invalid user ID "{raw_id}" in CSV')
+                user_ids.add(int(raw_id))
+            elif raw_username:
+                usernames.add(raw_username.lower())
+    except UnicodeDecodeError:
+        raise ValueError("CSV file must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+    return sorted(user_ids), sorted(usernames)
+
+
+def check_users(company_id, *, user_ids=(), usernames=()):
+    """
+    Validate explicit IDs/usernames with a single query.
+
+    Returns a list of error strings (empty if everything is fine).
+    """
+    user_ids, usernames = set(user_ids), set(usernames)
+    if not user_ids and not usernames:
+        return []
+
+    rows = User.objects.filter(
+        Q(id__in=user_ids) | Q(username__in=usernames)
+    ).values_list("id", "username", "company_id", "role", "is_active")
+
+    errors = []
+    found_ids, found_usernames = set(), set()
+    for user_id, username, user_company_id, role, is_active in rows:
+        found_ids.add(user_id)
+        found_usernames.add(username)
+        if user_company_id != company_id:
+            errors.append(f'User "{username}" (ID: {user_id}) is not from your company')
+        elif role != User.Role.EMPLOYEE:
+            errors.append(f'User "{username}" (ID: {user_id}) is not an employee')
+        elif not is_active:
+            errors.append(f'User "{username}" (ID: {user_id}) is not active')
+
+    for user_id in sorted(user_ids - found_ids):
+        errors.append(f"User with ID {user_id} does not exist")
+    for username in sorted(usernames - found_usernames):
+        errors.append(f'User "{username}" does not exist')
+    return errors
+
+
+def _through_table():
+    through = Event.participants.through
+    qn = connection.ops.quote_name
+    return (
+        qn(through._meta.db_table),
+        qn(through._meta.get_field("event").column),
+        qn(through._meta.get_field("user").column),
+    )
+
+
+def add_participants(event, users_qs):
+    """
+    Add users from ``users_qs`` to the event with one INSERT ... SELECT.
+
+    Only eligible employees (active, same company) are inserted; rows that
+    already exist are skipped by the unique (event, user) constraint.
+
+    Returns the number of inserted rows.
+    """
+    selection = users_qs.filter(
+        role=User.Role.EMPLOYEE,
+        is_active=True,
+        company_id=event.company_id,
+    ).values("id")
+    sql, params = selection.query.sql_with_params()
+    table, event_col, user_col = _through_table()
+
+    # "WHERE true" нужен SQLite для разбора INSERT ... SELECT ... ON CONFLICT
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({event_col}, {user_col}) "
+            f"SELECT %s, selection.id FROM ({sql}) selection WHERE true "
+            f"ON CONFLICT ({event_col}, {user_col}) DO NOTHING",
+            [event.id, *params],
+        )
+        added = max(cursor.rowcount, 0)
+
+    # Сырой SQL не вызывает m2m_changed - сбрасываем кеш ивентов вручную
+    if added:
+        transaction.on_commit(lambda: invalidate_event(event.id))
+        transaction.on_commit(lambda: invalidate_reports([event.id]))
+    return added
+
+
+def remove_participants(event, users_qs):
+    """Remove users from ``users_qs`` from the event. Returns the number of removed rows."""
+    through = Event.participants.through
+    rows = through.objects.filter(
+        event_id=event.id,
+        user_id__in=users_qs.values("id"),
+    )
+    user_ids = list(rows.values_list("user_id", flat=True))
+    deleted, _ = rows.delete()
+    if user_ids:
+        transaction.on_commit(lambda: invalidate_users(user_ids))
+        transaction.on_commit(lambda: invalidate_reports([event.id]))
+    return deleted
+
+
+def replace_participants(event, users_qs):
+    """Make ``users_qs`` the exact participant set, touching only the difference."""
+    through = Event.participants.through
+    rows = through.objects.filter(event_id=event.id).exclude(
+        user_id__in=users_qs.filter(
+            role=User.Role.EMPLOYEE,
+            is_active=True,
+            company_id=event.company_id,
+        ).values("id")
+    )
+    removed_ids = list(rows.values_list("user_id", flat=True))
+    removed, _ = rows.delete()
+    if removed_ids:
+        transaction.on_commit(lambda: invalidate_users(removed_ids))
+        transaction.on_commit(lambda: invalidate_reports([event.id]))
+    added = add_participants(event, users_qs)
+    return added, removed
+
+
+def set_participant_ids(event, user_ids):
+    """
+    Set participants from an already validated list of IDs.
+
+    Computes the diff against the through table and applies it with
+    bulk_create(ignore_conflicts) / a single DELETE, so unchanged rows are
+    never rewritten.
+
+    Returns:
+        tuple (added, removed)
+    """
+    through = Event.participants.through
+    wanted = set(user_ids)
+    current = set(
+        through.objects.filter(event_id=event.id).values_list("user_id", flat=True)
+    )
+
+    to_add = wanted - current
+    to_remove = current - wanted
+
+    with transaction.atomic():
+        removed = 0
+        if to_remove:
+            removed, _ = through.objects.filter(
+                event_id=event.id, user_id__in=to_remove
+            ).delete()
+        if to_add:
+            through.objects.bulk_create(
+                [through(event_id=event.id, user_id=user_id) for user_id in to_add],
+                batch_size=BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+
+        transaction.on_commit(lambda: invalidate_users(to_add | to_remove))
+        transaction.on_commit(lambda: invalidate_reports([event.id]))
+
+    logger.info(f"Event {event.id} participants updated: +{len(to_add)} -{removed}")
+    return len(to_add), removed
@@ -0,0 +1,517 @@
+import json
+import math
+import random
+import time
+from bisect import bisect
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+
+# Синтетические данные для нагрузочных тестов (команда generate_synthetic_data).
+# Все случайные решения берутся из random.Random(seed), поэтому при тех же
+# параметрах и end_date получаются те же строки.
+
+EMOTIONS = ["happy", "neutral", "sad", "surprised", "angry", "fear"]
+EMOTION_WEIGHTS = [35, 30, 12, 10, 8, 5]
+# Фидбек в течение рабочего дня: пик утром (photo-login) и после обеда
+HOURS = list(range(7, 21))
+HOUR_WEIGHTS = [3, 12, 20, 10, 6, 5, 8, 6, 5, 5, 6, 5, 3, 1]
+# Доля обычного дня, которая приходится на выходные
+WEEKEND_FACTOR = 0.08
+# Вариантов top3 на эмоцию: JSON каждого сериализуется один раз на компанию
+TOP3_VARIANTS = 64
+# Строк в одном write() внутри COPY
+COPY_CHUNK_ROWS = 2000
+
+MESSAGE_PHRASES = [
+    "Добрый день!",
+    "Hello, I have a question about my request.",
+    "Прикладываю заявление.",
+    "Could you check the dates, please?",
+    "Спасибо, получил.",
+    "We need one more document from you.",
+    "Когда будет готово?",
+    "Approved, see the details below.",
+    "Уточните, пожалуйста, номер приказа.",
+    "Thanks!",
+]
+FILLER_WORDS = "отпуск справка vacation salary certificate график schedule приказ office remote сроки".split()
+
+
+@dataclass
+class SyntheticConfig:
+    companies: int = 3
+    employees: int = 1000
+    departments: int = 10
+    days: int = 180
+    end_date: date = None
+    events: int = 50
+    participants: int = 300
+    # Фидбеков на сотрудника в рабочий день и доля участников, оставивших фидбек на ивент
+    feedback_rate: float = 0.3
+    event_response_rate: float = 0.6
+    requests_per_employee: float = 0.5
+    messages: int = 30
+    max_messages: int = 2000
+    seed: int = 1
+    prefix: str = "synth_"
+    password: str = "synthetic"
+    batch_size: int = 5000
+    use_copy: bool = False
+
+
+def copy_available():
+    return connection.vendor == "postgresql"
+
+
+@contextmanager
+def _explicit_created_at(*models):
+    """bulk_create перезаписывает auto_now_add-поля текущим временем - на время генерации отключаем"""
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class PreparedJson:
+    """JSON value serialized once, for values repeated across many rows"""
+    __slots__ = ("value", "copy_text")
+
+    def __init__(self, value):
+        self.value = value
+        self.copy_text = _copy_json(value)
+
+
+# Текстовый формат COPY: \N - NULL, спецсимволы экранируются обратным слэшем
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_COPY_FORMATS = {
+    type(None): lambda value: "\\N",
+    str: lambda value: value.translate(_COPY_ESCAPES),
+    bool: lambda value: "t" if value else "f",
+}
+
+
+def _copy_value(value):
+    # int, datetime и т.п. - str() дает то, что принимает PostgreSQL
+    return _COPY_FORMATS.get(type(value), str)(value)
+
+
+def _copy_json(value):
+    if isinstance(value, PreparedJson):
+        return value.copy_text
+    return json.dumps(value, ensure_ascii=False).translate(_COPY_ESCAPES)
+
+
+def _copy_defaults(model, fields):
+    """
+    Values for the NOT NULL columns missing from ``fields`` that have no
+    database default, taken from the Python defaults of the fields.
+    """
+    defaults = {}
+    for field in model._meta.concrete_fields:
+        if field.attname in fields or field.name in fields or field.primary_key or field.null or field.has_db_default():
+            continue
+        if not field.has_default():
+            raise ValueError(f"{model._meta.label}.{field.name} is NOT NULL without a default, pass it explicitly")
+        defaults[field.name] = field.get_default()
+    return defaults
+
+
+class RowWriter:
+    """
+    Buffered inserts of plain tuples into one table.
+
+    With ``use_copy`` rows go through PostgreSQL ``COPY ... FROM STDIN``,
+    otherwise through ``bulk_create``. Only for tables nobody references
+    by the generated ids (COPY does not return primary keys).
+    """
+
+    def __init__(self, model, fields, batch_size, use_copy, log):
+        self.model = model
+        self.fields = fields
+        # COPY не подставляет default-ы Django: NOT NULL-колонки без default в БД
+        # заполняем питоновским default-ом поля (bulk_create делает это сам)
+        self.defaults = _copy_defaults(model, fields) if use_copy else {}
+        self.columns = [*fields, *self.defaults]
+        self.json_fields = {
+            i for i, name in enumerate(self.columns)
+            if model._meta.get_field(name).get_internal_type() == "JSONField"
+        }
+        self.copy_formats = [_copy_json if i in self.json_fields else _copy_value for i in range(len(fields))]
+        self.copy_suffix = "".join(
+            "\t" + (_copy_json(value) if i + len(fields) in self.json_fields else _copy_value(value))
+            for i, value in enumerate(self.defaults.values())
+        ) + "\n"
+        self.batch_size = batch_size * 10 if use_copy else batch_size
+        self.use_copy = use_copy
+        self.log = log
+        self.rows = []
+        self.written = 0
+        self.started = time.monotonic()
+        self.reported = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.use_copy:
+            self._copy()
+        else:
+            self.model.objects.bulk_create(
+                [self.model(**dict(zip(self.fields, self._plain(row)))) for row in self.rows],
+                batch_size=self.batch_size,
+            )
+        self.written += len(self.rows)
+        self.rows = []
+        if self.written - self.reported >= 500_000:
+            self.reported = self.written
+            self._report()
+
+    def _plain(self, row):
+        if not self.json_fields:
+            return row
+        return [v.value if isinstance(v, PreparedJson) else v for v in row]
+
+    def _copy(self):
+        columns = ", ".join(connection.ops.quote_name(self.model._meta.get_field(f).column) for f in self.columns)
+        sql = f"COPY {connection.ops.quote_name(self.model._meta.db_table)} ({columns}) FROM STDIN"
+        # Текст COPY собираем сами (write_row на строку медленнее генерации самих
+        # данных) и шлем кусками: сервер разбирает кусок, пока готовится следующий
+        formats, suffix = self.copy_formats, self.copy_suffix
+        with connection.cursor() as cursor:
+            # cursor.cursor - курсор psycopg под оберткой Django
+            with cursor.cursor.copy(sql) as copy:
+                for start in range(0, len(self.rows), COPY_CHUNK_ROWS):
+                    copy.write("".join([
+                        "\t".join([fmt(value) for fmt, value in zip(formats, row)]) + suffix
+                        for row in self.rows[start:start + COPY_CHUNK_ROWS]
+                    ]))
+
+    def close(self):
+        self.flush()
+        self._report()
+        return self.written
+
+    def _report(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.written / elapsed * 60 if elapsed else 0
+        self.log(f"  {self.model._meta.label}: {self.written} rows ({rate:,.0f} rows/min)")
+
+
+class Generator:
+    def __init__(self, config, log=print):
+        self.config = config
+        self.log = log
+        end_date = config.end_date or timezone.localdate()
+        # Окно данных: [start, end), по локальному времени TIME_ZONE
+        self.end = timezone.make_aware(datetime.combine(end_date, datetime.min.time()))
+        self.start = self.end - timedelta(days=config.days)
+        self.password = make_password(config.password)
+        self.counts = {}
+
+    def writer(self, model, fields):
+        return RowWriter(model, fields, self.config.batch_size, self.config.use_copy, self.log)
+
+    def run(self):
+        from request.models import Request, RequestMessage
+        from ..models import Company, Feedback
+
+        prefix = self.config.prefix
+        if Company.objects.filter(name__startswith=prefix).exists():
+            raise ValueError(f"Companies named {prefix}* already exist, run with --cleanup first")
+
+        request_types = self._request_types()
+        with _explicit_created_at(Feedback, Request, RequestMessage):
+            for index in range(self.config.companies):
+                # Свой поток случайных чисел на компанию: размер одной не сдвигает остальные
+                rng = random.Random(f"{self.config.seed}:{index}")
+                self.log(f"Company {index + 1}/{self.config.companies}")
+                self._company(index, rng, request_types)
+
+        if connection.vendor == "postgresql":
+            # Свежая статистика для планировщика (и для оценок количества в админке)
+            with connection.cursor() as cursor:
+                for model in (Feedback, Request, RequestMessage):
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+        return self.counts
+
+    def _count(self, label, value):
+        self.counts[label] = self.counts.get(label, 0) + value
+
+    def _request_types(self):
+        from request.models import RequestType
+
+        names = ["Vacation", "Certificate", "Sick leave", "Equipment", "Other"]
+        return [
+            RequestType.objects.get_or_create(
+                name=f"{self.config.prefix}{name}", defaults={"description": "Synthetic data"}
+            )[0].id
+            for name in names
+        ]
+
+    # --- Компания, отделы, пользователи ---
+
+    def _company(self, index, rng, request_types):
+        from accounts.models import User
+        from ..models import Company, Department
+
+        config = self.config
+        company = Company.objects.create(name=f"{config.prefix}company_{index}")
+        departments = Department.objects.bulk_create([
+            Department(company=company, name=f"Department {d}") for d in range(config.departments)
+        ])
+        # Настроение отдела: множители весов эмоций (накопленные веса - для bisect)
+        moods = {
+            d.id: list(accumulate(w * rng.uniform(0.6, 1.6) for w in EMOTION_WEIGHTS)) for d in departments
+        }
+
+        hr_count = max(1, config.employees // 250)
+        users = []
+        for n in range(config.employees + hr_count):
+            is_hr = n < hr_count
+            users.append(User(
+                username=f"{config.prefix}c{index}_{'hr' if is_hr else 'e'}{n}",
+                name=f"{'HR' if is_hr else 'Employee'} {index}-{n}",
+                role=User.Role.HR if is_hr else User.Role.EMPLOYEE,
+                company=company,
+                department=departments[n % len(departments)],
+                password=self.password,
+                date_joined=self.start,
+            ))
+        User.objects.bulk_create(users, batch_size=config.batch_size)
+        rows = list(User.objects.filter(company=company).order_by("id").values_list("id", "department_id", "role"))
+        hrs = [(user_id, dept) for user_id, dept, role in rows if role == User.Role.HR]
+        employees = [(user_id, dept) for user_id, dept, role in rows if role == User.Role.EMPLOYEE]
+        self._count("users", len(rows))
+
+        events = self._events(company, rng, employees)
+        self._feedbacks(company, rng, employees, moods, events)
+        self._requests(rng, employees, hrs, request_types)
+
+    # --- Ивенты ---
+
+    def _events(self, company, rng, employees):
+        """Create events and participants; returns [(event_id, starts_at, ends_at, [(user_id, dept)])]"""
+        from ..models import Event
+
+        config = self.config
+        span = (self.end - self.start).total_seconds()
+        plans = []
+        for n in range(config.events):
+            # ~10% ивентов - в ближайшие две недели (upcoming)
+            offset = rng.uniform(0, span) if rng.random() > 0.1 else span + rng.uniform(0, 14 * 86400)
+            day = self.start + timedelta(seconds=offset)
+            starts_at = day.replace(hour=rng.randrange(9, 18), minute=rng.choice([0, 30]), second=0, microsecond=0)
+            ends_at = starts_at + timedelta(minutes=rng.choice([60, 90, 120, 180, 240]))
+            size = min(len(employees), max(1, int(rng.uniform(0.3, 1.0) * config.participants)))
+            plans.append((Event(company=company, title=f"Event {n}", starts_at=starts_at, ends_at=ends_at),
+                          rng.sample(employees, size)))
+
+        created = Event.objects.bulk_create([event for event, _ in plans], batch_size=config.batch_size)
+        through = Event.participants.through
+        writer = self.writer(through, ["event_id", "user_id"])
+        for event, (_, participants) in zip(created, plans):
+            for user_id, _ in participants:
+                writer.add((event.id, user_id))
+        self._count("events", len(created))
+        self._count("event participants", writer.close())
+        return [(event.id, event.starts_at, event.ends_at, participants)
+                for event, (_, participants) in zip(created, plans)]
+
+    # --- Фидбек ---
+
+    def _top3(self, rng, emotion):
+        others = rng.sample([e for e in EMOTIONS if e != emotion], 2)
+        first = rng.uniform(0.4, 0.95)
+        second = rng.uniform(0, 1 - first) * 0.8
+        third = rng.uniform(0, 1 - first - second) * 0.8
+        return [
+            {"label": emotion, "prob": round(first, 4)},
+            {"label": others[0], "prob": round(max(second, third), 4)},
+            {"label": others[1], "prob": round(min(second, third), 4)},
+        ]
+
+    @staticmethod
+    def _emotion(random, mood):
+        return EMOTIONS[bisect(mood, random() * mood[-1])]
+
+    def _feedbacks(self, company, rng, employees, moods, events):
+        """
+        The hot loop of the generator (millions of rows): draws are made per
+        day in blocks, top3 comes from a pool serialized once per emotion.
+        """
+        from ..models import Feedback
+
+        config = self.config
+        writer = self.writer(
+            Feedback, ["user_id", "emotion", "top3", "company_id", "department_id", "event_id", "created_at"]
+        )
+        top3 = {
+            emotion: [PreparedJson(self._top3(rng, emotion)) for _ in range(TOP3_VARIANTS)] for emotion in EMOTIONS
+        }
+        hour_weights = list(accumulate(HOUR_WEIGHTS))
+        seconds = [timedelta(seconds=s) for s in range(3600)]
+        random, add, company_id = rng.random, writer.add, company.id
+
+        # Ежедневный фидбек (photo-login), по дням с учетом выходных
+        per_day = len(employees) * config.feedback_rate
+        for day in range(config.days):
+            day_start = self.start + timedelta(days=day)
+            mean = per_day * (WEEKEND_FACTOR if day_start.weekday() >= 5 else 1)
+            count = max(0, round(rng.gauss(mean, math.sqrt(mean)))) if mean else 0
+            hour_starts = [day_start + timedelta(hours=hour) for hour in HOURS]
+            users = rng.choices(employees, k=count)
+            hours = rng.choices(hour_starts, cum_weights=hour_weights, k=count)
+            for (user_id, dept), hour_start in zip(users, hours):
+                emotion = self._emotion(random, moods[dept])
+                add((
+                    user_id, emotion, top3[emotion][int(random() * TOP3_VARIANTS)], company_id, dept, None,
+                    hour_start + seconds[int(random() * 3600)],
+                ))
+
+        # Фидбек на прошедшие ивенты: один на участника
+        for event_id, starts_at, ends_at, participants in events:
+            if ends_at > self.end:
+                continue
+            window = (ends_at - starts_at).total_seconds() + 7200
+            for user_id, dept in participants:
+                if random() >= config.event_response_rate:
+                    continue
+                emotion = self._emotion(random, moods[dept])
+                created_at = starts_at + timedelta(seconds=rng.uniform(0, window))
+                add((user_id, emotion, top3[emotion][int(random() * TOP3_VARIANTS)], company_id, dept, event_id, created_at))
+
+        self._count("feedback", writer.close())
+
+    # --- Заявки и переписка ---
+
+    def _message_count(self, rng):
+        # Длинный хвост: большинство переписок короткие, единицы - на сотни сообщений
+        alpha = 1.5
+        scale = self.config.messages * (alpha - 1) / alpha
+        return max(1, min(self.config.max_messages, int(rng.paretovariate(alpha) * scale)))
+
+    def _text(self, rng):
+        text = rng.choice(MESSAGE_PHRASES)
+        if rng.random() < 0.5:
+            text += " " + " ".join(rng.choices(FILLER_WORDS, k=rng.randrange(3, 30)))
+        return text
+
+    def _requests(self, rng, employees, hrs, request_types):
+        from request.models import Request, RequestMessage
+        from request.services.messages import PREVIEW_LENGTH
+
+        config = self.config
+        span = (self.end - self.start).total_seconds()
+        total = round(len(employees) * config.requests_per_employee)
+        messages = self.writer(RequestMessage, ["request_id", "sender_id", "text", "created_at"])
+        created = 0
+
+        # Заявкам нужны id для сообщений - вставляем через bulk_create пачками
+        for batch_start in range(0, total, config.batch_size):
+            plans = []
+            for _ in range(min(config.batch_size, total - batch_start)):
+                employee_id, _ = rng.choice(employees)
+                hr_id, _ = rng.choice(hrs)
+                created_at = self.start + timedelta(seconds=rng.uniform(0, span))
+                thread, at, sender = [], created_at, employee_id
+                for _ in range(self._message_count(rng)):
+                    if at >= self.end:
+                        break
+                    thread.append((sender, self._text(rng), at))
+                    # Отвечает другая сторона, иногда тот же участник пишет подряд
+                    if rng.random() < 0.75:
+                        sender = hr_id if sender == employee_id else employee_id
+                    at += timedelta(seconds=rng.expovariate(1 / 7200))
+
+                last_at = thread[-1][2] if thread else created_at
+                if self.end - last_at > timedelta(days=14):
+                    status, closed_at = Request.Status.CLOSED, last_at + timedelta(hours=rng.uniform(1, 72))
+                else:
+                    status, closed_at = rng.choice([Request.Status.OPEN, Request.Status.IN_PROGRESS]), None
+                request = Request(
+                    type_id=rng.choice(request_types),
+                    employee_id=employee_id,
+                    hr_id=hr_id,
+                    status=status,
+                    created_at=created_at,
+                    closed_at=closed_at,
+                    # Счетчики сразу согласованы с перепиской (как после recompute_counters)
+                    messages_count=len(thread),
+                    last_message_at=last_at,
+                    last_message_preview=thread[-1][1][:PREVIEW_LENGTH] if thread else "",
+                )
+                plans.append((request, thread))
+
+            Request.objects.bulk_create([request for request, _ in plans], batch_size=config.batch_size)
+            for request, thread in plans:
+                for sender_id, text, at in thread:
+                    messages.add((request.id, sender_id, text, at))
+            created += len(plans)
+
+        self._count("requests", created)
+        self._count("messages", messages.close())
+
+
+def cleanup(prefix, log=print):
+    """
+    Delete everything generated with ``prefix``. The big tables are cleared
+    with plain DELETE statements: ORM deletion would load every row to send
+    post_delete signals.
+    """
+    from accounts.models import User
+    from request.models import Request, RequestMessage, RequestReadState, RequestType, UploadSession
+    from ..models import Company, Department, Event, Feedback
+    from .event_cache import invalidate_event
+    from .event_report import invalidate_reports
+
+    companies = Company.objects.filter(name__startswith=prefix)
+    company_ids = list(companies.values_list("id", flat=True))
+    if not company_ids:
+        return 0
+
+    # Как pre_delete у Event: кеш окон ивентов участников и отчеты
+    event_ids = list(Event.objects.filter(company_id__in=company_ids).values_list("id", flat=True))
+    for event_id in event_ids:
+        invalidate_event(event_id)
+    invalidate_reports(event_ids)
+
+    users = User.objects.filter(company_id__in=company_ids).values("id")
+    requests = Request.objects.filter(employee_id__in=users).values("id")
+    removed = 0
+    for queryset in (
+        RequestMessage.objects.filter(request_id__in=requests),
+        RequestReadState.objects.filter(request_id__in=requests),
+        UploadSession.objects.filter(request_id__in=requests),
+        Request.objects.filter(employee_id__in=users),
+        Feedback.objects.filter(company_id__in=company_ids),
+        Event.participants.through.objects.filter(event__company_id__in=company_ids),
+        Event.objects.filter(company_id__in=company_ids),
+    ):
+        sql, params = queryset.values("pk").query.sql_with_params()
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        pk = connection.ops.quote_name(queryset.model._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({sql})", params)
+            deleted = cursor.rowcount
+        removed += deleted
+        log(f"  {queryset.model._meta.label}: {deleted} deleted")
+
+    removed += User.objects.filter(company_id__in=company_ids).delete()[0]
+    removed += Department.objects.filter(company_id__in=company_ids).delete()[0]
+    removed += companies.delete()[0]
+    removed += RequestType.objects.filter(name__startswith=prefix).delete()[0]
+    return removed
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Event, Feedback
+from .services.event_cache import event_participant_ids, invalidate_event, invalidate_users
+from .services.event_report import invalidate_reports
+
+# Кеш сбрасываем после коммита: иначе параллельный запрос успеет прочитать
+# старые строки и снова положить их в кеш до конца транзакции.
+# Что удаляется вместе со строкой (участники, ивенты) - собираем сразу.
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created, **kwargs):
+    """Изменилось окно ивента - сбрасываем кеш его участников"""
+    if not created:
+        event_id = instance.id
+        transaction.on_commit(lambda: invalidate_event(event_id))
+
+
+@receiver(pre_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    # pre_delete: после удаления связи с участниками уже не найти
+    user_ids = event_participant_ids(instance.id)
+    transaction.on_commit(lambda: invalidate_users(user_ids))
+
+
+@receiver(m2m_changed, sender=Event.participants.through)
+def event_participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Добавление/удаление участников через ORM (admin, .set(), .add())"""
+    if reverse:
+        # user.events.add(...) - меняется набор ивентов одного пользователя
+        if action in ("post_add", "post_remove"):
+            user_ids, event_ids = [instance.pk], list(pk_set or [])
+        elif action == "pre_clear":
+            user_ids, event_ids = [instance.pk], list(instance.events.values_list("id", flat=True))
+        else:
+            return
+    elif action in ("post_add", "post_remove"):
+        user_ids, event_ids = list(pk_set or []), [instance.pk]
+    elif action == "pre_clear":
+        user_ids, event_ids = event_participant_ids(instance.pk), [instance.pk]
+    else:
+        return
+
+    transaction.on_commit(lambda: invalidate_users(user_ids))
+    transaction.on_commit(lambda: invalidate_reports(event_ids))
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def feedback_changed(sender, instance, **kwargs):
+    """Новый фидбек на ивент - отчет по ивенту пересчитается при следующем запросе"""
+    if instance.event_id:
+        event_ids = [instance.event_id]
+        transaction.on_commit(lambda: invalidate_reports(event_ids))
@@ -0,0 +1,19 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+# Отдельная очередь: длинные выгрузки не задерживают распознавание фото и превью.
+# Общие лимиты (180 с) для выгрузок миллионов строк малы
+@shared_task(queue="exports", soft_time_limit=3 * 3600, time_limit=3 * 3600 + 60)
+def run_export_job(job_id):
+    """Фоновая выгрузка фидбеков/заявок в CSV (gzip) или XLSX"""
+    from .services.exports import run_export
+
+    job = run_export(job_id)
+    if not job:
+        return {"success": False, "error": "not found"}
+    logger.info(f"Export {job.id}: {job.status}, {job.rows_done} rows")
+    return {"success": job.status == job.Status.COMPLETED, "rows": job.rows_done}
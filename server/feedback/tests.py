@@ -1,3 +1,90 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from .models import Company, Department, Event, Feedback
+
+
+class AdminChangelistQueriesTests(TestCase):
+    """
+    Страницы списков в админке - фиксированное число запросов, без N+1.
+
+    Общая часть каждой страницы: сессия, пользователь, 2 COUNT пагинатора,
+    2 запроса прав (jazzmin меню); плюс фильтры и date_hierarchy.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "pw")
+        now = timezone.now()
+        companies = [Company.objects.create(name=f"Company {i}") for i in range(3)]
+        departments = [Department.objects.create(company=c, name=f"Dept {c.id}") for c in companies]
+        users = [
+            User.objects.create_user(f"user{i}", "pw", company_id=companies[i % 3].id, department_id=departments[i % 3].id)
+            for i in range(6)
+        ]
+        for i in range(30):
+            event = Event.objects.create(
+                company=companies[i % 3], title=f"Event {i}",
+                starts_at=now - timedelta(days=i), ends_at=now - timedelta(days=i) + timedelta(hours=2),
+            )
+            event.participants.set(users[: i % 6 + 1])
+            for user in users[:2]:
+                Feedback.objects.create(
+                    user=user, event=event, emotion="happy", top3=[],
+                    company_id=user.company_id, department_id=user.department_id,
+                )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _get(self, model_name):
+        response = self.client.get(reverse(f"admin:feedback_{model_name}_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_event_changelist(self):
+        with self.assertNumQueries(10):
+            response = self._get("event")
+        self.assertContains(response, "👥 6")
+
+    def test_feedback_changelist(self):
+        with self.assertNumQueries(7):
+            self._get("feedback")
+
+    def test_company_changelist(self):
+        with self.assertNumQueries(7):
+            self._get("company")
+
+    def test_department_changelist(self):
+        with self.assertNumQueries(8):
+            self._get("department")
+
+    def test_feedback_changelist_filters(self):
+        """Autocomplete/диапазон дат: пустые поля формы игнорируются, выбранный ивент - один запрос"""
+        event = Event.objects.order_by("id").first()
+        today = timezone.localdate().isoformat()
+        url = reverse("admin:feedback_feedback_changelist")
+        with self.assertNumQueries(8):
+            response = self.client.get(url, {
+                "event__id__exact": event.id,
+                "company__id__exact": "",
+                "created_at__date_from": "2000-01-01",
+                "created_at__date_to": today,
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertContains(response, str(event))
+
+        response = self.client.get(url, {"created_at__date_from": "not-a-date"})
+        self.assertRedirects(response, f"{url}?e=1", fetch_redirect_response=False)
 
-# Create your tests here.
+    def test_event_autocomplete_for_filter(self):
+        response = self.client.get(reverse("admin:autocomplete"), {
+            "app_label": "feedback", "model_name": "feedback", "field_name": "event", "term": "Event 1",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["results"])
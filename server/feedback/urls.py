@@ -1,7 +1,11 @@
 from django.urls import path
 from .views.views_feedback import FeedbackPhotoView
-from .views.views_hr import CompanyEmployeesView, HRFeedbackAnalyticsView, HREventManageView, HREventDetailView
+from .views.views_hr import (
+    CompanyEmployeesView, HRFeedbackAnalyticsView, HREventManageView, HREventDetailView,
+    HREventReportView, HREventParticipantsView, HREventParticipantsBulkView,
+)
 from .views.views_employee import EmployeeEventsView
+from .views.views_exports import HRExportListView, HRExportDetailView
 
 
 
@@ -13,11 +17,18 @@ urlpatterns = [
     
     # HR analytics
     path("hr/analytics/feedbacks/", HRFeedbackAnalyticsView.as_view(), name="hr-feedbacks-analytics"),
+
+    # Фоновые выгрузки
+    path("hr/exports/", HRExportListView.as_view(), name="hr-exports"),
+    path("hr/exports/<uuid:pk>/", HRExportDetailView.as_view(), name="hr-export-detail"),
     
     
     # HR event management
     path("hr/company/employees", CompanyEmployeesView.as_view()),
     path("hr/events/", HREventManageView.as_view(), name="hr-events"),
+    path("hr/events/report/", HREventReportView.as_view(), name="hr-events-report"),
     path("hr/events/<int:pk>/", HREventDetailView.as_view(), name="hr-event-detail"),
+    path("hr/events/<int:pk>/participants/", HREventParticipantsView.as_view(), name="hr-event-participants"),
+    path("hr/events/<int:pk>/participants/bulk/", HREventParticipantsBulkView.as_view(), name="hr-event-participants-bulk"),
 
 ]
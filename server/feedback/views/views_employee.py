@@ -5,7 +5,10 @@ from ..serializers.serializers_employee import EventSerializer
 from rest_framework import status
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
-from ..models import Event
+from django.db.models import Count, Exists, OuterRef
+
+from ..models import Event, Feedback
+from ..services.event_cache import get_active_event_ids
 
 class EmployeeEventsView(APIView):
     """Список событий для сотрудника (только события своей компании где он participant)"""
@@ -50,13 +53,20 @@ class EmployeeEventsView(APIView):
         
         now = timezone.now()
         
-        # Получаем только активные события где пользователь - participant
+        # ID активных событий берем из кеша (окна ивентов фильтруются по текущему времени)
+        event_ids = get_active_event_ids(request.user, now)
+        if not event_ids:
+            return Response([])
+        
         events = Event.objects.filter(
+            id__in=event_ids,
             company=request.user.company,
-            participants=request.user,
-            starts_at__lte=now,
-            ends_at__gte=now
-        ).select_related('company').prefetch_related('participants').order_by('-starts_at')
+        ).select_related('company').annotate(
+            _participants_count=Count('participants'),
+            _has_feedback=Exists(
+                Feedback.objects.filter(event=OuterRef('pk'), user=request.user)
+            ),
+        ).order_by('-starts_at')
         
         serializer = EventSerializer(events, many=True, context={'request': request})
         return Response(serializer.data)
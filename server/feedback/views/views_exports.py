@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..models import ExportJob
+from ..permissions import IsHR
+from ..serializers.serializers_exports import ExportCreateSerializer, ExportJobSerializer
+from ..services.exports import MAX_ACTIVE_EXPORTS, active_exports_count, create_export, validate_params
+
+# Сколько последних выгрузок показываем в списке
+EXPORTS_LIST_LIMIT = 50
+
+
+class HRExportListView(APIView):
+    """Фоновые выгрузки фидбеков и заявок в файл"""
+    permission_classes = [IsAuthenticated, IsHR]
+
+    @extend_schema(
+        responses={200: ExportJobSerializer(many=True)},
+        description="My recent export jobs, newest first.",
+        summary="List my exports (HR only)"
+    )
+    def get(self, request):
+        jobs = ExportJob.objects.filter(user=request.user)[:EXPORTS_LIST_LIMIT]
+        return Response(ExportJobSerializer(jobs, many=True, context={"request": request}).data)
+
+    @extend_schema(
+        request=ExportCreateSerializer,
+        responses={
+            202: ExportJobSerializer,
+            400: OpenApiResponse(description="Invalid kind, format or filters"),
+            429: OpenApiResponse(description="Too many unfinished exports"),
+        },
+        description=(
+            "Start a background export. kind=FEEDBACK exports the company feedback and takes the filters of "
+            "/hr/analytics/feedbacks/ (dates optional); kind=REQUESTS exports requests assigned to me and takes "
+            "the filters of /hr/requests/. The file (gzip CSV or XLSX) is built by a worker; poll "
+            "/hr/exports/<id>/ or wait for the export.finished event on the inbox WebSocket."
+        ),
+        summary="Start an export (HR only)"
+    )
+    def post(self, request):
+        serializer = ExportCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            validate_params(data["kind"], request.user, data["filters"])
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if active_exports_count(request.user) >= MAX_ACTIVE_EXPORTS:
+            return Response(
+                {"detail": f"At most {MAX_ACTIVE_EXPORTS} exports can run at once"},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        with transaction.atomic():
+            job = create_export(request.user, data["kind"], data["format"], filters=data["filters"])
+        return Response(
+            ExportJobSerializer(job, context={"request": request}).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class HRExportDetailView(APIView):
+    """Статус и прогресс выгрузки, ссылка на файл"""
+    permission_classes = [IsAuthenticated, IsHR]
+
+    @extend_schema(
+        responses={200: ExportJobSerializer, 404: OpenApiResponse(description="Export not found")},
+        description="Status and progress of my export. file is a signed download URL once status is COMPLETED.",
+        summary="Get export status (HR only)"
+    )
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+        return Response(ExportJobSerializer(job, context={"request": request}).data)
@@ -2,11 +2,14 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 from ..permissions import IsHR
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from datetime import datetime
+from ..serializers.serializers_hr import EventParticipantsBulkSerializer
 
 
 class CompanyEmployeesView(APIView):
@@ -132,79 +135,17 @@ class HRFeedbackAnalyticsView(APIView):
     )
     def get(self, request):
         from ..models import Feedback
-        
-        # Проверка обязательных параметров
-        start_date_str = request.query_params.get("start_date")
-        end_date_str = request.query_params.get("end_date")
-        
-        if not start_date_str or not end_date_str:
-            return Response(
-                {"detail": "start_date and end_date are required (format: YYYY-MM-DD)"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Парсинг дат
+        from ..services.analytics import filter_feedbacks
+
+        # Базовый queryset - только фидбеки компании HR
         try:
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-            
-            # Устанавливаем время для полного дня
-            from django.utils import timezone
-            start_datetime = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
-            end_datetime = timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
-            
-        except ValueError:
-            return Response(
-                {"detail": "Invalid date format. Use YYYY-MM-DD"},
-                status=status.HTTP_400_BAD_REQUEST
+            feedbacks = filter_feedbacks(
+                Feedback.objects.filter(company=request.user.company),
+                request.query_params
             )
-        
-        # Базовый queryset - только фидбеки компании HR
-        feedbacks = Feedback.objects.filter(
-            company=request.user.company,
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime
-        )
-        
-        # Фильтр по эмоциям
-        emotions_str = request.query_params.get("emotions")
-        if emotions_str:
-            emotions_list = [e.strip() for e in emotions_str.split(",") if e.strip()]
-            if emotions_list:
-                feedbacks = feedbacks.filter(emotion__in=emotions_list)
-        
-        # Фильтр по департаментам
-        departments_str = request.query_params.get("departments")
-        if departments_str:
-            try:
-                department_ids = [int(d.strip()) for d in departments_str.split(",") if d.strip()]
-                if department_ids:
-                    feedbacks = feedbacks.filter(department_id__in=department_ids)
-            except ValueError:
-                return Response(
-                    {"detail": "Invalid department IDs format"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Фильтр по конкретному ивенту
-        event_id = request.query_params.get("event_id")
-        if event_id:
-            try:
-                feedbacks = feedbacks.filter(event_id=int(event_id))
-            except ValueError:
-                return Response(
-                    {"detail": "Invalid event_id format"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Фильтр по наличию ивента
-        has_event = request.query_params.get("has_event")
-        if has_event:
-            if has_event.lower() == "true":
-                feedbacks = feedbacks.filter(event__isnull=False)
-            elif has_event.lower() == "false":
-                feedbacks = feedbacks.filter(event__isnull=True)
-        
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         # Сортировка: старые первые
         feedbacks = feedbacks.select_related(
             "user", "company", "department", "event"
@@ -220,38 +161,137 @@ class HREventManageView(APIView):
     permission_classes = [IsAuthenticated, IsHR]
 
     @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="status",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Filter by time status: upcoming, active or past",
+                required=False
+            ),
+            OpenApiParameter(
+                name="start_date",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Events starting on or after this date (YYYY-MM-DD)",
+                required=False
+            ),
+            OpenApiParameter(
+                name="end_date",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Events starting on or before this date (YYYY-MM-DD)",
+                required=False
+            ),
+            OpenApiParameter(
+                name="search",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Search by title",
+                required=False
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Opaque cursor from next/previous links",
+                required=False
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Page size (default 30, max 100)",
+                required=False
+            ),
+        ],
         responses={
             200: {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "id": {"type": "integer"},
-                        "title": {"type": "string"},
-                        "starts_at": {"type": "string", "format": "date-time"},
-                        "ends_at": {"type": "string", "format": "date-time"},
-                        "company": {"type": "integer"},
-                        "company_name": {"type": "string"},
-                        "participants_count": {"type": "integer"}
-                    }
+                "type": "object",
+                "properties": {
+                    "next": {"type": "string", "nullable": True},
+                    "previous": {"type": "string", "nullable": True},
+                    "results": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "integer"},
+                                "title": {"type": "string"},
+                                "starts_at": {"type": "string", "format": "date-time"},
+                                "ends_at": {"type": "string", "format": "date-time"},
+                                "company": {"type": "integer"},
+                                "company_name": {"type": "string"},
+                                "participants_count": {"type": "integer"}
+                            }
+                        }
+                    },
                 }
             },
+            400: OpenApiResponse(description="Invalid parameters"),
             403: OpenApiResponse(description="Only HR can access this endpoint"),
         },
-        description="Get list of all events in HR's company",
+        description="Get events of HR's company page by page (cursor pagination, newest starts_at first). Supports filtering by status (upcoming/active/past), start date range and title search.",
         summary="Get company events (HR only)"
     )
     def get(self, request):
-        """Список всех ивентов компании"""
+        """Список ивентов компании с фильтрами и пагинацией"""
         from ..models import Event
+        from ..pagination import EventCursorPagination
+        from django.db.models import Count
+        from django.utils import timezone
         
-        events = Event.objects.filter(
-            company=request.user.company
-        ).select_related("company").prefetch_related("participants").order_by("-starts_at")
+        events = Event.objects.filter(company=request.user.company)
+        
+        # Фильтр по статусу относительно текущего времени
+        now = timezone.now()
+        event_status = request.query_params.get("status")
+        if event_status:
+            if event_status == "upcoming":
+                events = events.filter(starts_at__gt=now)
+            elif event_status == "active":
+                events = events.filter(starts_at__lte=now, ends_at__gte=now)
+            elif event_status == "past":
+                events = events.filter(ends_at__lt=now)
+            else:
+                return Response(
+                    {"detail": "Invalid status. Use upcoming, active or past"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        # Фильтр по дате начала
+        try:
+            start_date_str = request.query_params.get("start_date")
+            if start_date_str:
+                start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
+                events = events.filter(
+                    starts_at__gte=timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+                )
+            end_date_str = request.query_params.get("end_date")
+            if end_date_str:
+                end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+                events = events.filter(
+                    starts_at__lte=timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
+                )
+        except ValueError:
+            return Response(
+                {"detail": "Invalid date format. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        search = request.query_params.get("search", "").strip()
+        if search:
+            events = events.filter(title__icontains=search)
+        
+        # Участников не подгружаем - нужно только их количество
+        events = events.select_related("company").annotate(_participants_count=Count("participants"))
+        
+        paginator = EventCursorPagination()
+        page = paginator.paginate_queryset(events, request, view=self)
         
         from ..serializers.serializers_hr import EventListSerializer
-        serializer = EventListSerializer(events, many=True)
-        return Response(serializer.data)
+        serializer = EventListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @extend_schema(
         request={"application/json": {
@@ -306,6 +346,89 @@ class HREventManageView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class HREventReportView(APIView):
+    """Отчет по заполнению фидбеков для нескольких ивентов"""
+    permission_classes = [IsAuthenticated, IsHR]
+    MAX_EVENTS = 100
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="event_ids",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Comma-separated event IDs (e.g., 1,2,3), up to 100",
+                required=True
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Completion report per event",
+                response={
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "event_id": {"type": "integer"},
+                            "title": {"type": "string"},
+                            "starts_at": {"type": "string", "format": "date-time"},
+                            "ends_at": {"type": "string", "format": "date-time"},
+                            "participants_count": {"type": "integer"},
+                            "responders_count": {"type": "integer"},
+                            "completion_rate": {"type": "number", "description": "responders / participants, 0..1"},
+                            "emotions": {"type": "object", "additionalProperties": {"type": "integer"}},
+                        }
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Invalid parameters"),
+            403: OpenApiResponse(description="Only HR can access this endpoint"),
+        },
+        description="Get feedback completion stats for many events at once: participants count, how many participants submitted feedback, completion rate and emotion distribution of their feedback. Events outside HR's company are skipped. Stats are computed with one grouped query and cached per event until new feedback arrives or participants change.",
+        summary="Get events feedback report (HR only)"
+    )
+    def get(self, request):
+        from ..models import Event
+        from ..services.event_report import get_event_reports
+
+        event_ids_str = request.query_params.get("event_ids")
+        if not event_ids_str:
+            return Response(
+                {"detail": "event_ids is required (e.g., 1,2,3)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            event_ids = list(dict.fromkeys(int(e.strip()) for e in event_ids_str.split(",") if e.strip()))
+        except ValueError:
+            return Response(
+                {"detail": "Invalid event IDs format"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(event_ids) > self.MAX_EVENTS:
+            return Response(
+                {"detail": f"Too many events, max {self.MAX_EVENTS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        events = list(Event.objects.filter(
+            id__in=event_ids,
+            company=request.user.company
+        ).values("id", "title", "starts_at", "ends_at").order_by("-starts_at"))
+
+        reports = get_event_reports([e["id"] for e in events])
+
+        return Response([
+            {
+                "event_id": e["id"],
+                "title": e["title"],
+                "starts_at": e["starts_at"],
+                "ends_at": e["ends_at"],
+                **reports[e["id"]],
+            }
+            for e in events
+        ])
+
+
 class HREventDetailView(APIView):
     """Редактирование и удаление ивента"""
     permission_classes = [IsAuthenticated, IsHR]
@@ -317,19 +440,32 @@ class HREventDetailView(APIView):
         return obj
 
     @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="include",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Pass participant_ids to include the full list of participant IDs",
+                required=False
+            ),
+        ],
         responses={
-            200: OpenApiResponse(description="Event details with participant IDs"),
+            200: OpenApiResponse(description="Event details"),
             403: OpenApiResponse(description="Only HR can access this endpoint"),
             404: OpenApiResponse(description="Event not found"),
         },
-        description="Get detailed event info including all fields and participant IDs. Only events from HR's company.",
+        description="Get detailed event info with participants count. Only events from HR's company. The full participant ID list is returned only with include=participant_ids; use /hr/events/<id>/participants/ to page through participants.",
         summary="Get event detail (HR only)"
     )
     def get(self, request, pk):
         """Получение детальной информации об ивенте"""
         event = self.get_object(pk, request.user)
         from ..serializers.serializers_hr import EventDetailSerializer
-        serializer = EventDetailSerializer(event)
+        include = request.query_params.get("include", "")
+        serializer = EventDetailSerializer(
+            event,
+            context={"include_participant_ids": "participant_ids" in include.split(",")}
+        )
         return Response(serializer.data)
 
     @extend_schema(
@@ -400,4 +536,170 @@ class HREventDetailView(APIView):
         """Удаление ивента"""
         event = self.get_object(pk, request.user)
         event.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class HREventParticipantsView(APIView):
+    """Участники ивента с поиском и keyset-пагинацией"""
+    permission_classes = [IsAuthenticated, IsHR]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="search",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Search by name or username",
+                required=False
+            ),
+            OpenApiParameter(
+                name="departments",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Comma-separated department IDs (e.g., 1,2,3)",
+                required=False
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Opaque cursor from next/previous links",
+                required=False
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Page size (default 50, max 200)",
+                required=False
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Page of event participants ordered by name",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "next": {"type": "string", "nullable": True},
+                        "previous": {"type": "string", "nullable": True},
+                        "results": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "id": {"type": "integer"},
+                                    "username": {"type": "string"},
+                                    "name": {"type": "string"},
+                                    "company": {"type": "integer"},
+                                    "company_name": {"type": "string"},
+                                    "department": {"type": "integer"},
+                                    "department_name": {"type": "string"},
+                                }
+                            }
+                        },
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Invalid parameters"),
+            403: OpenApiResponse(description="Only HR can access this endpoint"),
+            404: OpenApiResponse(description="Event not found"),
+        },
+        description="Get participants of an event page by page (cursor pagination ordered by name). Supports search by name/username and filtering by departments. Only events from HR's company.",
+        summary="Get event participants (HR only)"
+    )
+    def get(self, request, pk):
+        from accounts.models import User
+        from ..models import Event
+        from ..pagination import ParticipantCursorPagination
+        from ..serializers.serializers_hr import EmployeeSerializer
+
+        event = get_object_or_404(Event.objects.only("id"), pk=pk, company=request.user.company)
+
+        participants = User.objects.filter(events=event).select_related("company", "department")
+
+        search = request.query_params.get("search", "").strip()
+        if search:
+            participants = participants.filter(Q(name__icontains=search) | Q(username__icontains=search))
+
+        departments_str = request.query_params.get("departments")
+        if departments_str:
+            try:
+                department_ids = [int(d.strip()) for d in departments_str.split(",") if d.strip()]
+            except ValueError:
+                return Response(
+                    {"detail": "Invalid department IDs format"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if department_ids:
+                participants = participants.filter(department_id__in=department_ids)
+
+        paginator = ParticipantCursorPagination()
+        page = paginator.paginate_queryset(participants, request, view=self)
+        return paginator.get_paginated_response(EmployeeSerializer(page, many=True).data)
+
+
+class HREventParticipantsBulkView(APIView):
+    """Массовое добавление/удаление участников ивента"""
+    permission_classes = [IsAuthenticated, IsHR]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    @extend_schema(
+        request={
+            "application/json": EventParticipantsBulkSerializer,
+            "multipart/form-data": EventParticipantsBulkSerializer,
+        },
+        responses={
+            200: OpenApiResponse(
+                description="Participants updated",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "mode": {"type": "string"},
+                        "added": {"type": "integer"},
+                        "removed": {"type": "integer"},
+                        "participants_count": {"type": "integer"},
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Validation error"),
+            403: OpenApiResponse(description="Only HR can access this endpoint"),
+            404: OpenApiResponse(description="Event not found"),
+        },
+        description="Bulk assign participants to an event. Selectors (user_ids, department_ids, whole_company, CSV file with id/username column) are combined. mode=add adds to current participants, mode=remove removes the selected users, mode=replace makes the selection the exact participant list. Only active employees of HR's company are assigned. Rows are written with set-based INSERT ... SELECT, so large events (thousands of participants) are handled in a few queries.",
+        summary="Bulk assign event participants (HR only)"
+    )
+    def post(self, request, pk):
+        from ..models import Event
+        from ..services.participants import (
+            select_users, add_participants, remove_participants, replace_participants,
+        )
+
+        event = get_object_or_404(Event, pk=pk, company=request.user.company)
+
+        serializer = EventParticipantsBulkSerializer(data=request.data, context={"request": request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        users = select_users(
+            event.company_id,
+            user_ids=data["user_ids"],
+            usernames=data["usernames"],
+            department_ids=data["department_ids"],
+            whole_company=data.get("whole_company", False),
+        )
+
+        added = removed = 0
+        with transaction.atomic():
+            if data["mode"] == EventParticipantsBulkSerializer.MODE_ADD:
+                added = add_participants(event, users)
+            elif data["mode"] == EventParticipantsBulkSerializer.MODE_REMOVE:
+                removed = remove_participants(event, users)
+            else:
+                added, removed = replace_participants(event, users)
+
+        return Response({
+            "mode": data["mode"],
+            "added": added,
+            "removed": removed,
+            "participants_count": event.participants.count(),
+        })
@@ -3,7 +3,11 @@ from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.urls import reverse
 from django.db.models import Count
+from feedback.admin_actions import export_action
+from feedback.models import ExportJob
 from .models import RequestType, Request, RequestMessage
+from .services.protected_media import staff_media_url
+from .services.thumbnails import thumbnail_paths
 
 
 @admin.register(RequestType)
@@ -21,12 +25,12 @@ class RequestTypeAdmin(admin.ModelAdmin):
     
     def requests_count(self, obj):
         """Количество заявок этого типа"""
-        count = obj.requests.count()
         return format_html(
             '<span style="background: #4CAF50; color: white; padding: 3px 8px; border-radius: 3px;">{}</span>',
-            count
+            obj.request_count
         )
     requests_count.short_description = "Total Requests"
+    requests_count.admin_order_field = "request_count"
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -40,6 +44,9 @@ class RequestMessageInline(admin.TabularInline):
     fields = ["created_at", "sender_info", "text", "file_link"]
     can_delete = False
     ordering = ["created_at"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("sender")
     
     def sender_info(self, obj):
         """Информация об отправителе с ролью"""
@@ -64,9 +71,16 @@ class RequestMessageInline(admin.TabularInline):
     def file_link(self, obj):
         """Ссылка на файл"""
         if obj.file:
+            thumb = thumbnail_paths(obj.file, obj.thumbnails).get("small")
+            if thumb:
+                return format_html(
+                    '<a href="{}" target="_blank"><img src="{}" loading="lazy" style="max-width: 160px; max-height: 160px; border-radius: 4px;" /></a>',
+                    staff_media_url(obj.file.name),
+                    staff_media_url(thumb)
+                )
             return format_html(
                 '<a href="{}" target="_blank" style="color: #4CAF50;">📎 {}</a>',
-                obj.file.url,
+                staff_media_url(obj.file.name),
                 obj.file.name.split('/')[-1]
             )
         return mark_safe('<span style="color: #999;">No file</span>')
@@ -96,9 +110,13 @@ class RequestAdmin(admin.ModelAdmin):
         "hr__name",
         "type__name"
     ]
-    readonly_fields = ["created_at", "closed_at", "request_summary"]
+    readonly_fields = ["created_at", "closed_at", "request_summary", "messages_count", "last_message_at", "last_message_preview"]
     inlines = [RequestMessageInline]
     list_per_page = 25
+    actions = [
+        export_action(ExportJob.Kind.REQUESTS, ExportJob.Format.CSV, "Export to CSV (background)"),
+        export_action(ExportJob.Kind.REQUESTS, ExportJob.Format.XLSX, "Export to XLSX (background)"),
+    ]
     date_hierarchy = "created_at"
     
     fieldsets = (
@@ -109,10 +127,19 @@ class RequestAdmin(admin.ModelAdmin):
             "fields": ("employee", "hr")
         }),
         ("🕒 Timeline", {
-            "fields": ("created_at", "closed_at")
+            "fields": ("created_at", "closed_at", "last_message_at")
+        }),
+        ("💬 Activity", {
+            "fields": ("messages_count", "last_message_preview")
         }),
     )
     
+    def get_queryset(self, request):
+        # type_info / employee_info / hr_info - без запросов на строку
+        return super().get_queryset(request).select_related(
+            "type", "employee__department", "hr__company"
+        )
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         """Фильтрация пользователей по ролям"""
         from accounts.models import User
@@ -184,13 +211,13 @@ class RequestAdmin(admin.ModelAdmin):
     hr_info.short_description = "Assigned HR"
     
     def messages_count(self, obj):
-        """Количество сообщений"""
-        count = obj.messages.count()
+        """Количество сообщений (денормализованный счетчик)"""
         return format_html(
             '<span style="background: #E3F2FD; color: #1976D2; padding: 3px 8px; border-radius: 3px; font-weight: bold;">💬 {}</span>',
-            count
+            obj.messages_count
         )
     messages_count.short_description = "Messages"
+    messages_count.admin_order_field = "messages_count"
     
     def duration_info(self, obj):
         """Длительность обработки"""
@@ -225,8 +252,8 @@ class RequestAdmin(admin.ModelAdmin):
     
     def request_summary(self, obj):
         """Краткая информация о заявке"""
-        messages = obj.messages.all().order_by("created_at")
-        first_message = messages.first()
+        # Только текст первого сообщения, а не все сообщения заявки
+        first_text = obj.messages.order_by("created_at", "id").values_list("text", flat=True).first()
         
         # Безопасное получение информации о пользователях
         try:
@@ -268,12 +295,12 @@ class RequestAdmin(admin.ModelAdmin):
                 obj.closed_at.strftime("%Y-%m-%d %H:%M")
             )
         
-        if first_message:
+        if first_text is not None:
             summary += format_html(
                 '<p style="margin-top: 10px; padding-top: 10px; border-top: 1px solid #ddd;">'
                 '<strong>Initial Message:</strong><br>'
                 '<em style="color: #666;">{}</em></p>',
-                first_message.text[:200] + "..." if len(first_message.text) > 200 else first_message.text
+                first_text[:200] + "..." if len(first_text) > 200 else first_text
             )
         
         summary += mark_safe('</div>')
@@ -305,6 +332,9 @@ class RequestMessageAdmin(admin.ModelAdmin):
             "fields": ("text", "file")
         }),
     )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("request__type", "sender")
     
     def request_link(self, obj):
         """Ссылка на заявку"""
@@ -357,7 +387,7 @@ class RequestMessageAdmin(admin.ModelAdmin):
         if obj.file:
             return format_html(
                 '<a href="{}" target="_blank" style="color: #4CAF50; font-size: 18px;">📎</a>',
-                obj.file.url
+                staff_media_url(obj.file.name)
             )
         return mark_safe('<span style="color: #ccc;">-</span>')
     has_file.short_description = "File"
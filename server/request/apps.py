@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RequestConfig(AppConfig):
     name = 'request'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from request.services.uploads import cleanup_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete unfinished attachment upload sessions and their partial files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="Remove sessions idle for longer than this")
+
+    def handle(self, *args, **options):
+        removed = cleanup_stale_uploads(timedelta(hours=options["hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} stale upload session(s)"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from accounts.models import User
+from accounts.tasks import generate_user_photo_thumbnails
+from request.models import RequestMessage
+from request.services.thumbnails import IMAGE_EXTENSIONS, thumbnails_stale
+from request.tasks import generate_message_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Queue WebP thumbnails for existing image attachments and user photos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--skip-messages", action="store_true")
+        parser.add_argument("--skip-users", action="store_true")
+        parser.add_argument("--sync", action="store_true", help="Render in this process instead of celery")
+
+    def handle(self, *args, **options):
+        images = Q()
+        for ext in IMAGE_EXTENSIONS:
+            images |= Q(file__iendswith=ext)
+        photos = Q()
+        for ext in IMAGE_EXTENSIONS:
+            photos |= Q(photo__iendswith=ext)
+
+        jobs = []
+        if not options["skip_messages"]:
+            qs = RequestMessage.objects.filter(images).only("id", "file", "thumbnails")
+            jobs.append(("message", qs, "file", generate_message_thumbnails))
+        if not options["skip_users"]:
+            qs = User.objects.filter(photos).only("id", "photo", "thumbnails")
+            jobs.append(("user", qs, "photo", generate_user_photo_thumbnails))
+
+        for label, qs, field, task in jobs:
+            queued = 0
+            for obj in qs.order_by("id").iterator(chunk_size=1000):
+                if not thumbnails_stale(getattr(obj, field), obj.thumbnails):
+                    continue
+                if options["sync"]:
+                    task(obj.id)
+                else:
+                    task.delay(obj.id)
+                queued += 1
+            self.stdout.write(self.style.SUCCESS(f"{'Rendered' if options['sync'] else 'Queued'} {queued} {label} thumbnail job(s)"))
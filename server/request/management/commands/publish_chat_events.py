@@ -0,0 +1,31 @@
+import time
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+from request.services.outbox import publish_pending
+
+
+class Command(BaseCommand):
+    help = "Publish queued chat WebSocket events from the outbox to the channel layer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--interval", type=float, default=0.1, help="Poll interval in seconds when idle")
+        parser.add_argument("--once", action="store_true", help="Drain the outbox and exit")
+
+    def handle(self, *args, **options):
+        channel_layer = get_channel_layer()
+        batch_size = options["batch_size"]
+        self.stdout.write("Chat event publisher started")
+
+        while True:
+            published = publish_pending(channel_layer, batch_size)
+            if published:
+                self.stdout.write(f"Published {published} event(s)")
+            # Полный батч - в очереди есть еще, берем сразу
+            if published >= batch_size:
+                continue
+            if options["once"] and not published:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from request.models import Request
+from request.services.counters import recompute_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized message counters (messages_count, last_message_at, preview) on requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", nargs="*", type=int, help="Only these request IDs")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        qs = Request.objects.order_by("id")
+        if options["ids"]:
+            qs = qs.filter(id__in=options["ids"])
+
+        batch_size = options["batch_size"]
+        updated = 0
+        last_id = 0
+        # Батчами по id, чтобы не держать долгую блокировку на всей таблице
+        while True:
+            ids = list(qs.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            updated += recompute_counters(Request.objects.filter(id__in=ids))
+            last_id = ids[-1]
+            self.stdout.write(f"Processed up to request #{last_id}")
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed counters for {updated} request(s)"))
@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class RequestMessageManager(models.Manager):
+    """
+    ``search_vector`` нужен только полнотекстовому поиску (services.search,
+    в WHERE) - в обычных выборках (история чата, replay, админка, экспорт)
+    колонку не загружаем.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
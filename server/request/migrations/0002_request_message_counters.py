@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:05
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, CharField, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, Replace, Substr
+
+
+def backfill_counters(apps, schema_editor):
+    # Та же логика, что и в manage.py repair_request_counters
+    Request = apps.get_model("request", "Request")
+    RequestMessage = apps.get_model("request", "RequestMessage")
+
+    messages = RequestMessage.objects.filter(request_id=OuterRef("pk"))
+    count_sq = messages.order_by().values("request_id").annotate(c=Count("id")).values("c")
+    last = messages.order_by("-created_at", "-id")
+    preview_sq = last.annotate(
+        preview=Case(
+            When(text="", then=Concat(Value("📎 "), Replace(Cast("file", CharField()), Value("request_files/"), Value("")))),
+            default=Substr("text", 1, 255),
+        )
+    ).values("preview")[:1]
+
+    Request.objects.update(
+        messages_count=Coalesce(Subquery(count_sq), Value(0)),
+        last_message_at=Coalesce(Subquery(last.values("created_at")[:1]), F("created_at")),
+        last_message_preview=Substr(Coalesce(Subquery(preview_sq), Value("")), 1, 255),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='last_message_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='messages_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['hr', 'last_message_at'], name='request_req_hr_id_3016aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['employee', 'last_message_at'], name='request_req_employe_827b8d_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0003_requestmessage_client_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatEventOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=100)),
+                ('event', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Chat Event (outbox)',
+                'verbose_name_plural': 'Chat Events (outbox)',
+            },
+        ),
+    ]
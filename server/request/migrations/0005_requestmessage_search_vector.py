@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:21
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Должен совпадать с services.search.SEARCH_CONFIG
+SEARCH_CONFIG = "russian"
+
+
+def create_search_trigger(apps, schema_editor):
+    # tsvector, триггер и GIN-индекс только для PostgreSQL; на SQLite (dev) поиск идет через icontains
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION request_message_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.text, ''));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER request_message_search_vector_trg
+        BEFORE INSERT OR UPDATE OF text ON request_requestmessage
+        FOR EACH ROW EXECUTE FUNCTION request_message_search_vector_update()
+    """)
+    schema_editor.execute(
+        f"UPDATE request_requestmessage SET search_vector = to_tsvector('{SEARCH_CONFIG}', coalesce(text, ''))"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS request_message_search_vector_idx "
+        "ON request_requestmessage USING gin (search_vector)"
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS request_message_search_vector_idx")
+    schema_editor.execute("DROP TRIGGER IF EXISTS request_message_search_vector_trg ON request_requestmessage")
+    schema_editor.execute("DROP FUNCTION IF EXISTS request_message_search_vector_update()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0004_chateventoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestmessage',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0005_requestmessage_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['hr', 'status', 'last_message_at'], name='request_req_hr_id_e54406_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0008_uploadsession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='requestmessage',
+            index=models.Index(fields=['file'], name='request_req_file_43fedb_idx'),
+        ),
+    ]
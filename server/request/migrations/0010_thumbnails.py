@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('request', '0009_media_access_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestmessage',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
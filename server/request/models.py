@@ -1,5 +1,11 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
+
+from .managers import RequestMessageManager
 
 
 class RequestType(models.Model):
@@ -47,11 +53,21 @@ class Request(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     closed_at = models.DateTimeField(null=True, blank=True)
 
+    # Денормализованные счетчики - обновляются при создании сообщения (services.messages)
+    messages_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(default=timezone.now)
+    last_message_preview = models.CharField(max_length=255, blank=True, default="")
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["employee", "status"]),
             models.Index(fields=["hr", "status"]),
+            # Инбоксы, отсортированные по последней активности
+            models.Index(fields=["hr", "last_message_at"]),
+            models.Index(fields=["employee", "last_message_at"]),
+            # Инбокс HR с фильтром по статусу
+            models.Index(fields=["hr", "status", "last_message_at"]),
         ]
 
     def __str__(self):
@@ -73,9 +89,133 @@ class RequestMessage(models.Model):
     text = models.TextField()
     file = models.FileField(upload_to="request_files/", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Ключ идемпотентности от клиента (отправка через WebSocket)
+    client_id = models.CharField(max_length=64, null=True, blank=True)
+    # Заполняется триггером PostgreSQL при вставке/изменении text (миграция 0005)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # WebP-превью вложения-картинки, заполняет celery (services.thumbnails)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+
+    objects = RequestMessageManager()
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # Проверка доступа к вложению в /api/media/
+            models.Index(fields=["file"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sender", "client_id"],
+                condition=models.Q(client_id__isnull=False),
+                name="request_message_unique_client_id",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Message in Request #{self.request.id} by {self.sender.username}"
+
+class RequestReadState(models.Model):
+    """
+    Курсор прочтения заявки участником. unread_count поддерживается
+    инкрементально при создании сообщения (services.read_state).
+    """
+    request = models.ForeignKey(
+        Request,
+        on_delete=models.CASCADE,
+        related_name="read_states"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="request_read_states"
+    )
+    last_read_message_id = models.PositiveBigIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Request Read State"
+        verbose_name_plural = "Request Read States"
+        constraints = [
+            models.UniqueConstraint(fields=["request", "user"], name="request_read_state_unique"),
+        ]
+        indexes = [
+            # Сводка непрочитанного: только строки с unread_count > 0
+            models.Index(
+                fields=["user"],
+                condition=models.Q(unread_count__gt=0),
+                name="request_read_state_unread_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Request #{self.request_id} read by user {self.user_id} ({self.unread_count} unread)"
+
+
+class UploadSession(models.Model):
+    """
+    Сессия докачиваемой загрузки вложения: чанки пишутся в частичный файл
+    по смещению, после complete файл прикрепляется к новому сообщению.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        COMPLETED = "COMPLETED", "Completed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    request = models.ForeignKey(
+        Request,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions"
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # Сколько байт уже принято (следующий чанк должен начинаться отсюда)
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    message = models.ForeignKey(
+        "RequestMessage",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Upload Session"
+        verbose_name_plural = "Upload Sessions"
+        indexes = [
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.offset}/{self.size}) for Request #{self.request_id}"
+
+
+class ChatEventOutbox(models.Model):
+    """
+    Outbox событий для WebSocket: пишется в той же транзакции, что и изменение,
+    рассылается командой publish_chat_events и удаляется после отправки.
+    """
+    group = models.CharField(max_length=100)
+    event = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Chat Event (outbox)"
+        verbose_name_plural = "Chat Events (outbox)"
 
     def __str__(self):
-        return f"Message in Request #{self.request.id} by {self.sender.username}"
\ No newline at end of file
+        return f"{self.event.get('type')} -> {self.group}"
@@ -0,0 +1,76 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class MessageIdPagination:
+    """
+    Cursor-пагинация сообщений заявки по id.
+
+    ?before=<id> - более старые сообщения, ?after=<id> - более новые,
+    без параметров - последняя страница. Сообщения всегда отдаются
+    в хронологическом порядке.
+    """
+    default_limit = 30
+    max_limit = 100
+
+    def _int_param(self, request, name):
+        value = request.query_params.get(name)
+        if value in (None, ""):
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValidationError({name: "Must be an integer"})
+        if value < 0:
+            raise ValidationError({name: "Must be a positive integer"})
+        return value
+
+    def paginate_queryset(self, queryset, request):
+        before = self._int_param(request, "before")
+        after = self._int_param(request, "after")
+        if before is not None and after is not None:
+            raise ValidationError({"detail": "Use either before or after, not both"})
+
+        limit = self._int_param(request, "limit") or self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        if after is not None:
+            page = list(queryset.filter(id__gt=after).order_by("id")[:limit + 1])
+            self.has_more = len(page) > limit
+            return page[:limit]
+
+        if before is not None:
+            queryset = queryset.filter(id__lt=before)
+        page = list(queryset.order_by("-id")[:limit + 1])
+        self.has_more = len(page) > limit
+        return list(reversed(page[:limit]))
+
+    def get_paginated_data(self, data):
+        return {"results": data, "has_more": self.has_more}
+
+
+def recent_messages(request_obj, limit=MessageIdPagination.default_limit):
+    """
+    Последняя страница сообщений заявки (в хронологическом порядке)
+    и признак наличия более старых. Кешируется на объекте заявки.
+    """
+    cached = getattr(request_obj, "_recent_messages", None)
+    if cached is None:
+        page = list(request_obj.messages.select_related("sender").order_by("-id")[:limit + 1])
+        cached = (list(reversed(page[:limit])), len(page) > limit)
+        request_obj._recent_messages = cached
+    return cached
+
+
+class SearchPagination(LimitOffsetPagination):
+    """Результаты поиска сортируются по релевантности - keyset здесь не подходит"""
+    default_limit = 20
+    max_limit = 50
+
+
+class RequestCursorPagination(CursorPagination):
+    """Keyset-пагинация инбокса, последняя активность первой"""
+    ordering = ("-last_message_at", "-id")
+    page_size = 30
+    page_size_query_param = "limit"
+    max_page_size = 100
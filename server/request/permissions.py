@@ -19,4 +19,5 @@ class IsEmployee(BasePermission):
 class IsRequestParticipant(BasePermission):
     """Проверяет что пользователь - участник заявки (employee или hr)"""
     def has_object_permission(self, request, view, obj):
-        return obj.employee == request.user or obj.hr == request.user
\ No newline at end of file
+        # Сравниваем id, чтобы не подгружать пользователей из БД
+        return request.user.id in (obj.employee_id, obj.hr_id)
\ No newline at end of file
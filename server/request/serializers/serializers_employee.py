@@ -1,4 +1,10 @@
+from django.db import transaction
 from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_field
+from ..pagination import recent_messages
+from ..services.messages import create_message
+from ..services.protected_media import signed_media_url
+from ..services.thumbnails import signed_thumbnail_urls, thumbnail_paths
 from ..models import Request, RequestMessage, RequestType
 from accounts.models import User
 
@@ -22,18 +28,35 @@ class RequestMessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.CharField(source="sender.username", read_only=True)
     sender_name = serializers.CharField(source="sender.name", read_only=True)
     is_mine = serializers.SerializerMethodField()
+    file = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = RequestMessage
-        fields = ["id", "sender", "sender_username", "sender_name", "text", "file", "created_at", "is_mine"]
+        fields = ["id", "sender", "sender_username", "sender_name", "text", "file", "thumbnails", "created_at", "is_mine"]
         read_only_fields = ["id", "sender", "created_at"]
 
-    def get_is_mine(self, obj):
+    def get_is_mine(self, obj) -> bool:
         request = self.context.get("request")
         if request and request.user:
-            return obj.sender == request.user
+            return obj.sender_id == request.user.id
         return False
 
+    def get_file(self, obj) -> str | None:
+        """Подписанная ссылка /api/media/ для текущего пользователя"""
+        request = self.context.get("request")
+        if not obj.file or not request:
+            return None
+        return signed_media_url(obj.file.name, request.user.id)
+
+    @extend_schema_field({"type": "object", "additionalProperties": {"type": "string"}})
+    def get_thumbnails(self, obj):
+        """WebP-превью картинки {small, medium}; пусто, пока celery их не отрендерил"""
+        request = self.context.get("request")
+        if not request:
+            return {}
+        return signed_thumbnail_urls(thumbnail_paths(obj.file, obj.thumbnails), request.user.id)
+
 
 class RequestListSerializer(serializers.ModelSerializer):
     """Список заявок для employee"""
@@ -42,14 +65,20 @@ class RequestListSerializer(serializers.ModelSerializer):
     hr_name = serializers.CharField(source="hr.name", read_only=True)
     messages_count = serializers.IntegerField(read_only=True)
     last_message_at = serializers.DateTimeField(read_only=True)
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Request
         fields = [
             "id", "type", "type_name", "hr", "hr_username", "hr_name",
-            "status", "created_at", "closed_at", "messages_count", "last_message_at"
+            "status", "created_at", "closed_at", "messages_count", "last_message_at",
+            "last_message_preview", "unread_count"
         ]
 
+    def get_unread_count(self, obj) -> int:
+        # Аннотация _unread_count из списка (services.read_state.unread_count_subquery)
+        return getattr(obj, "_unread_count", None) or 0
+
 
 class RequestDetailSerializer(serializers.ModelSerializer):
     """Детали заявки с сообщениями"""
@@ -57,16 +86,27 @@ class RequestDetailSerializer(serializers.ModelSerializer):
     type_description = serializers.CharField(source="type.description", read_only=True)
     hr_username = serializers.CharField(source="hr.username", read_only=True)
     hr_name = serializers.CharField(source="hr.name", read_only=True)
-    messages = RequestMessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
+    has_more_messages = serializers.SerializerMethodField()
 
     class Meta:
         model = Request
         fields = [
             "id", "type", "type_name", "type_description",
             "hr", "hr_username", "hr_name", "status",
-            "created_at", "closed_at", "messages"
+            "created_at", "closed_at", "messages", "has_more_messages"
         ]
 
+    @extend_schema_field(RequestMessageSerializer(many=True))
+    def get_messages(self, obj):
+        """Только последняя страница, более старые - через /messages/?before=<id>"""
+        messages, _ = recent_messages(obj)
+        return RequestMessageSerializer(messages, many=True, context=self.context).data
+
+    def get_has_more_messages(self, obj) -> bool:
+        _, has_more = recent_messages(obj)
+        return has_more
+
 
 class RequestCreateSerializer(serializers.ModelSerializer):
     """Создание заявки"""
@@ -90,6 +130,7 @@ class RequestCreateSerializer(serializers.ModelSerializer):
         
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         comment = validated_data.pop("comment")
         request_user = self.context.get("request").user
@@ -101,11 +142,7 @@ class RequestCreateSerializer(serializers.ModelSerializer):
         )
         
         # Создаем первое сообщение из комментария
-        RequestMessage.objects.create(
-            request=request_obj,
-            sender=request_user,
-            text=comment
-        )
+        create_message(request_obj, request_user, text=comment)
         
         return request_obj
 
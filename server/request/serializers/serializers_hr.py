@@ -1,4 +1,8 @@
 from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_field
+from ..pagination import recent_messages
+from ..services.protected_media import signed_media_url
+from ..services.thumbnails import signed_thumbnail_urls, thumbnail_paths
 from ..models import Request, RequestMessage
 
 
@@ -7,18 +11,35 @@ class RequestMessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.CharField(source="sender.username", read_only=True)
     sender_name = serializers.CharField(source="sender.name", read_only=True)
     is_mine = serializers.SerializerMethodField()
+    file = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = RequestMessage
-        fields = ["id", "sender", "sender_username", "sender_name", "text", "file", "created_at", "is_mine"]
+        fields = ["id", "sender", "sender_username", "sender_name", "text", "file", "thumbnails", "created_at", "is_mine"]
         read_only_fields = ["id", "sender", "created_at"]
 
-    def get_is_mine(self, obj):
+    def get_is_mine(self, obj) -> bool:
         request = self.context.get("request")
         if request and request.user:
-            return obj.sender == request.user
+            return obj.sender_id == request.user.id
         return False
 
+    def get_file(self, obj) -> str | None:
+        """Подписанная ссылка /api/media/ для текущего пользователя"""
+        request = self.context.get("request")
+        if not obj.file or not request:
+            return None
+        return signed_media_url(obj.file.name, request.user.id)
+
+    @extend_schema_field({"type": "object", "additionalProperties": {"type": "string"}})
+    def get_thumbnails(self, obj):
+        """WebP-превью картинки {small, medium}; пусто, пока celery их не отрендерил"""
+        request = self.context.get("request")
+        if not request:
+            return {}
+        return signed_thumbnail_urls(thumbnail_paths(obj.file, obj.thumbnails), request.user.id)
+
 
 class RequestListSerializer(serializers.ModelSerializer):
     """Список заявок для HR"""
@@ -27,14 +48,20 @@ class RequestListSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source="employee.name", read_only=True)
     messages_count = serializers.IntegerField(read_only=True)
     last_message_at = serializers.DateTimeField(read_only=True)
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Request
         fields = [
             "id", "type", "type_name", "employee", "employee_username", "employee_name",
-            "status", "created_at", "closed_at", "messages_count", "last_message_at"
+            "status", "created_at", "closed_at", "messages_count", "last_message_at",
+            "last_message_preview", "unread_count"
         ]
 
+    def get_unread_count(self, obj) -> int:
+        # Аннотация _unread_count из списка (services.read_state.unread_count_subquery)
+        return getattr(obj, "_unread_count", None) or 0
+
 
 class RequestDetailSerializer(serializers.ModelSerializer):
     """Детали заявки с сообщениями для HR"""
@@ -43,16 +70,27 @@ class RequestDetailSerializer(serializers.ModelSerializer):
     employee_username = serializers.CharField(source="employee.username", read_only=True)
     employee_name = serializers.CharField(source="employee.name", read_only=True)
     employee_department = serializers.CharField(source="employee.department.name", read_only=True)
-    messages = RequestMessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
+    has_more_messages = serializers.SerializerMethodField()
 
     class Meta:
         model = Request
         fields = [
             "id", "type", "type_name", "type_description",
             "employee", "employee_username", "employee_name", "employee_department",
-            "status", "created_at", "closed_at", "messages"
+            "status", "created_at", "closed_at", "messages", "has_more_messages"
         ]
 
+    @extend_schema_field(RequestMessageSerializer(many=True))
+    def get_messages(self, obj):
+        """Только последняя страница, более старые - через /messages/?before=<id>"""
+        messages, _ = recent_messages(obj)
+        return RequestMessageSerializer(messages, many=True, context=self.context).data
+
+    def get_has_more_messages(self, obj) -> bool:
+        _, has_more = recent_messages(obj)
+        return has_more
+
 
 class SendMessageSerializer(serializers.ModelSerializer):
     """Отправка сообщения в заявку для HR"""
@@ -0,0 +1,11 @@
+from rest_framework import serializers
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Отметка прочтения: до message_id включительно или до последнего сообщения"""
+    message_id = serializers.IntegerField(required=False, min_value=1)
+
+
+class ReadStateSerializer(serializers.Serializer):
+    last_read_message_id = serializers.IntegerField()
+    unread_count = serializers.IntegerField()
@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from ..models import Request, RequestMessage
+
+
+class MessageSearchResultSerializer(serializers.ModelSerializer):
+    """Найденное сообщение с подсветкой совпадений"""
+    sender_name = serializers.CharField(source="sender.name", read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = RequestMessage
+        fields = ["id", "request", "sender", "sender_name", "text", "headline", "rank", "created_at"]
+
+
+class RequestSearchResultSerializer(serializers.ModelSerializer):
+    """Заявка, найденная по имени/логину собеседника"""
+    type_name = serializers.CharField(source="type.name", read_only=True)
+    counterpart_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Request
+        fields = ["id", "type_name", "status", "counterpart_name", "last_message_at", "last_message_preview"]
+
+    def get_counterpart_name(self, obj) -> str:
+        counterpart = obj.hr if self.context.get("counterpart") == "hr" else obj.employee
+        return counterpart.name or counterpart.username
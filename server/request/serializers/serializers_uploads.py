@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from ..models import UploadSession
+
+
+class UploadInitSerializer(serializers.Serializer):
+    """Начало докачиваемой загрузки вложения"""
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+
+class UploadCompleteSerializer(serializers.Serializer):
+    """Текст сообщения, к которому прикрепляется загруженный файл"""
+    text = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "filename", "size", "offset", "status", "chunk_size", "message", "created_at"]
+
+    def get_chunk_size(self, obj) -> int:
+        from django.conf import settings
+        return settings.REQUEST_UPLOAD_CHUNK_SIZE
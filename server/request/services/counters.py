@@ -0,0 +1,26 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from ..models import RequestMessage
+from .messages import message_preview_expression
+
+
+def recompute_counters(requests_qs):
+    """
+    Recompute messages_count / last_message_at / last_message_preview
+    for the given requests with a single set-based UPDATE.
+
+    Returns the number of updated requests.
+    """
+    messages = RequestMessage.objects.filter(request_id=OuterRef("pk"))
+
+    count_sq = messages.order_by().values("request_id").annotate(c=Count("id")).values("c")
+    last = messages.order_by("-created_at", "-id")
+    # То же превью, что пишет create_message (services.messages.message_preview)
+    preview_sq = last.annotate(preview=message_preview_expression()).values("preview")[:1]
+
+    return requests_qs.update(
+        messages_count=Coalesce(Subquery(count_sq), Value(0)),
+        last_message_at=Coalesce(Subquery(last.values("created_at")[:1]), F("created_at")),
+        last_message_preview=Coalesce(Subquery(preview_sq), Value("")),
+    )
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.utils import timezone
+
+from ..models import Request
+
+
+def filter_requests(requests, params):
+    """
+    Type / employee / creation date filters of the HR inbox.
+
+    Shared by the inbox list and request exports. Raises ValueError with
+    the message for a 400 response.
+    """
+    for param, field in (("type", "type_id"), ("employee", "employee_id")):
+        value = params.get(param)
+        if value:
+            if not str(value).isdigit():
+                raise ValueError(f"Invalid {param} ID")
+            requests = requests.filter(**{field: int(value)})
+
+    # Фильтр по дате создания
+    try:
+        start_date_str = params.get("start_date")
+        if start_date_str:
+            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
+            requests = requests.filter(
+                created_at__gte=timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+            )
+        end_date_str = params.get("end_date")
+        if end_date_str:
+            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+            requests = requests.filter(
+                created_at__lte=timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
+            )
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD") from None
+    return requests
+
+
+def filter_statuses(requests, params):
+    """?status=OPEN,CLOSED filter; raises ValueError for unknown statuses."""
+    statuses_str = params.get("status")
+    if not statuses_str:
+        return requests
+    statuses = [s.strip().upper() for s in statuses_str.split(",") if s.strip()]
+    invalid = [s for s in statuses if s not in Request.Status.values]
+    if invalid:
+        raise ValueError(f"Invalid status: {', '.join(invalid)}. Use {', '.join(Request.Status.values)}")
+    return requests.filter(status__in=statuses)
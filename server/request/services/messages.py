@@ -0,0 +1,95 @@
+import os
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.db.models.functions import Concat, Reverse, Right, StrIndex, Substr
+
+from ..models import Request, RequestMessage
+
+PREVIEW_LENGTH = 255
+
+
+def message_preview(text, file=None):
+    """Short preview of a message for inbox lists."""
+    if text:
+        return text[:PREVIEW_LENGTH]
+    if file:
+        return f"📎 {os.path.basename(file.name)}"[:PREVIEW_LENGTH]
+    return ""
+
+
+def message_preview_expression():
+    """
+    ``message_preview`` as an SQL expression over RequestMessage columns
+    (used by services.counters to recompute previews in the database).
+    """
+    # basename: все после последнего "/"
+    file_name = Case(
+        When(file__contains="/", then=Right("file", StrIndex(Reverse("file"), Value("/")) - 1)),
+        default=F("file"),
+        output_field=CharField(),
+    )
+    return Substr(
+        Case(
+            When(~Q(text=""), then=F("text")),
+            When(Q(file__isnull=False) & ~Q(file=""), then=Concat(Value("📎 "), file_name)),
+            default=Value(""),
+            output_field=CharField(),
+        ),
+        1,
+        PREVIEW_LENGTH,
+    )
+
+
+def create_message(request_obj, sender, text="", file=None, client_id=None, publish=True):
+    """
+    Create a message and update the request counters in one transaction.
+
+    Counters are updated with F-expressions so concurrent senders never
+    lose increments; read states of both participants are updated too
+    (see services.read_state). With ``publish`` the WebSocket events are
+    written to the outbox in the same transaction (see services.outbox).
+    Image attachments get WebP thumbnails from a celery task after commit.
+    """
+    from .outbox import enqueue_message
+    from .read_state import on_message_created
+    from .thumbnails import schedule_message_thumbnails, thumbnails_stale
+
+    with transaction.atomic():
+        message = RequestMessage.objects.create(
+            request=request_obj,
+            sender=sender,
+            text=text or "",
+            file=file,
+            client_id=client_id,
+        )
+        Request.objects.filter(pk=request_obj.pk).update(
+            messages_count=F("messages_count") + 1,
+            last_message_at=message.created_at,
+            last_message_preview=message_preview(message.text, message.file),
+        )
+        on_message_created(request_obj, message)
+        if publish:
+            enqueue_message(request_obj, message, sender=sender)
+        if thumbnails_stale(message.file, message.thumbnails):
+            schedule_message_thumbnails(message.id)
+    return message
+
+
+def create_message_idempotent(request_obj, sender, client_id, text="", file=None, publish=True):
+    """
+    Create a message unless this sender already sent one with ``client_id``.
+
+    Returns:
+        tuple (message, created)
+    """
+    existing = RequestMessage.objects.filter(sender_id=sender.id, client_id=client_id).first()
+    if existing:
+        return existing, False
+    try:
+        return create_message(
+            request_obj, sender, text=text, file=file, client_id=client_id, publish=publish
+        ), True
+    except IntegrityError:
+        # Параллельный повтор с тем же client_id успел раньше
+        return RequestMessage.objects.get(sender_id=sender.id, client_id=client_id), False
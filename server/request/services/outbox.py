@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import ChatEventOutbox
+from ..websocket.ws_utils import message_events, message_payload, status_events, thumbnails_events, user_group
+from .messages import message_preview
+
+logger = logging.getLogger(__name__)
+
+# Живые уведомления старше этого уже не нужны - клиент доберет их через replay
+STALE_AFTER = timedelta(minutes=5)
+
+
+def _enqueue(events):
+    ChatEventOutbox.objects.bulk_create(
+        [ChatEventOutbox(group=group, event=event) for group, event in events]
+    )
+
+
+def enqueue_message(request_obj, message, sender=None):
+    """Queue WebSocket events for a new message; call inside the write transaction."""
+    payload = message_payload(message, sender=sender)
+    _enqueue(message_events(request_obj, payload, message_preview(message.text, message.file)))
+
+
+def enqueue_status(request_obj):
+    """Queue WebSocket events for a status change; call inside the write transaction."""
+    _enqueue(status_events(request_obj))
+
+
+def enqueue_thumbnails(request_obj, message_id, paths):
+    """Queue a WebSocket event once thumbnails of an attachment are rendered."""
+    _enqueue(thumbnails_events(request_obj, message_id, paths))
+
+
+def enqueue_user_event(user_id, data):
+    """Queue an event for one user's inbox socket (e.g. a finished export)."""
+    _enqueue([(user_group(user_id), {"type": "inbox.event", "data": data})])
+
+
+async def _send_group(channel_layer, rows):
+    # По порядку id: клиент продолжает с ?since=<последний id>. После ошибки
+    # останавливаемся, чтобы следующие события группы не ушли раньше нее
+    sent_ids = []
+    for row in rows:
+        try:
+            await channel_layer.group_send(row.group, row.event)
+        except Exception as e:
+            logger.error(f"Failed to publish chat event {row.id} to {row.group}: {e}")
+            break
+        sent_ids.append(row.id)
+    return sent_ids
+
+
+async def _send_all(channel_layer, rows):
+    """Send groups concurrently, the rows of one group one after another; returns sent ids"""
+    by_group = {}
+    for row in rows:
+        by_group.setdefault(row.group, []).append(row)
+    results = await asyncio.gather(*(_send_group(channel_layer, group_rows) for group_rows in by_group.values()))
+    return [row_id for sent_ids in results for row_id in sent_ids]
+
+
+def publish_pending(channel_layer, batch_size=500):
+    """
+    Send one batch of pending outbox events through the channel layer.
+
+    Delivery is at-least-once: rows are deleted only after group_send
+    succeeded, clients deduplicate by message id. Events of one group go
+    out in id order; a failed event holds back the rest of its group. SKIP LOCKED lets several
+    publishers run side by side on PostgreSQL.
+
+    Returns the number of published events.
+    """
+    from asgiref.sync import async_to_sync
+
+    with transaction.atomic():
+        rows = list(
+            ChatEventOutbox.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        stale_before = timezone.now() - STALE_AFTER
+        fresh = [row for row in rows if row.created_at >= stale_before]
+        if len(fresh) < len(rows):
+            logger.warning(f"Dropping {len(rows) - len(fresh)} stale chat event(s)")
+
+        sent_ids = async_to_sync(_send_all)(channel_layer, fresh) if fresh else []
+        failed = len(fresh) - len(sent_ids)
+        if failed:
+            logger.error(f"Failed to publish {failed} chat event(s), will retry")
+
+        # Отправленные и устаревшие удаляем, неотправленные остаются на следующий проход
+        done = set(sent_ids) | {row.id for row in rows if row.created_at < stale_before}
+        ChatEventOutbox.objects.filter(id__in=done).delete()
+    return len(sent_ids)
@@ -0,0 +1,99 @@
+import time
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+SIGNATURE_SALT = "request.protected_media"
+
+# Каталоги MEDIA_ROOT, которые отдаются только через /api/media/
+REQUEST_FILES_PREFIX = "request_files/"
+USER_PHOTOS_PREFIX = "user_photos/"
+EXPORTS_PREFIX = "exports/"
+# Превью: <prefix>thumbs/<id сообщения или пользователя>/<файл> (services.thumbnails)
+THUMBS_DIR = "thumbs/"
+
+
+def _signature(name, user_id, expires):
+    return salted_hmac(SIGNATURE_SALT, f"{name}:{user_id}:{expires}").hexdigest()
+
+
+def _expires_at(now=None):
+    """
+    Expiry rounded up to a TTL bucket: the same file keeps the same URL
+    for a while, so clients can cache it.
+    """
+    ttl = settings.PROTECTED_MEDIA_URL_TTL
+    now = int(now or time.time())
+    return (now // ttl + 2) * ttl
+
+
+def signed_media_url(name, user_id, absolute=True):
+    """Signed URL of a stored file for one viewer; None for an empty name."""
+    if not name:
+        return None
+    expires = _expires_at()
+    query = urlencode({"u": user_id, "exp": expires, "sig": _signature(name, user_id, expires)})
+    url = f"/api/media/{quote(name)}?{query}"
+    return f"{settings.BASE_BACKEND_URL}{url}" if absolute else url
+
+
+def staff_media_url(name):
+    """Unsigned URL for the admin: /api/media/ authorizes staff by the session cookie."""
+    if not name:
+        return None
+    return f"/api/media/{quote(name)}"
+
+
+def verify_signature(name, user_id, expires, signature):
+    if not (user_id.isdigit() and expires.isdigit()):
+        return False
+    if int(expires) < time.time():
+        return False
+    return constant_time_compare(_signature(name, int(user_id), int(expires)), signature)
+
+
+def has_access(name, user_id):
+    """
+    Whether the user may read the stored file, in one indexed query:
+    request attachments - participants of the request,
+    user photos - the user and active users of the same company.
+    Thumbnails are checked by the owner id in their path, export files
+    are available to their author only.
+    """
+    from accounts.models import User
+    from feedback.models import ExportJob
+    from ..models import RequestMessage
+
+    if name.startswith(REQUEST_FILES_PREFIX):
+        thumb_owner = _thumbnail_owner(name, REQUEST_FILES_PREFIX)
+        lookup = {"pk": thumb_owner} if thumb_owner else {"file": name}
+        return RequestMessage.objects.filter(**lookup).filter(
+            Q(request__employee_id=user_id) | Q(request__hr_id=user_id)
+        ).exists()
+
+    if name.startswith(USER_PHOTOS_PREFIX):
+        thumb_owner = _thumbnail_owner(name, USER_PHOTOS_PREFIX)
+        lookup = {"pk": thumb_owner} if thumb_owner else {"photo": name}
+        viewer_company = User.objects.filter(
+            pk=user_id, is_active=True, company_id__isnull=False
+        ).values("company_id")
+        return User.objects.filter(**lookup).filter(
+            Q(pk=user_id) | Q(company_id__in=viewer_company)
+        ).exists()
+
+    if name.startswith(EXPORTS_PREFIX):
+        return ExportJob.objects.filter(file=name, user_id=user_id).exists()
+
+    return False
+
+
+def _thumbnail_owner(name, prefix):
+    """Id of the message/user from a thumbnail path, None for originals"""
+    rest = name[len(prefix):]
+    if not rest.startswith(THUMBS_DIR):
+        return None
+    owner = rest[len(THUMBS_DIR):].split("/", 1)[0]
+    # Битый путь превью не должен совпасть с оригиналом
+    return int(owner) if owner.isdigit() else 0
@@ -0,0 +1,89 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+
+from ..models import RequestMessage, RequestReadState
+
+
+def _upsert(request_id, user_id, update, defaults):
+    """UPDATE the read state row, INSERT it if it does not exist yet (first message, reassigned HR)."""
+    if RequestReadState.objects.filter(request_id=request_id, user_id=user_id).update(**update):
+        return
+    try:
+        with transaction.atomic():
+            RequestReadState.objects.create(request_id=request_id, user_id=user_id, **defaults)
+    except IntegrityError:
+        # Строку успели создать параллельно - применяем обновление к ней
+        RequestReadState.objects.filter(request_id=request_id, user_id=user_id).update(**update)
+
+
+def on_message_created(request_obj, message):
+    """
+    Keep read states in sync with a new message: the sender has read
+    everything up to it, the other participant gets one more unread.
+    Call inside the transaction that created the message.
+    """
+    _upsert(
+        request_obj.id,
+        message.sender_id,
+        update={"last_read_message_id": Greatest(F("last_read_message_id"), message.id), "unread_count": 0},
+        defaults={"last_read_message_id": message.id, "unread_count": 0},
+    )
+    for user_id in {request_obj.employee_id, request_obj.hr_id} - {message.sender_id}:
+        _upsert(
+            request_obj.id,
+            user_id,
+            update={"unread_count": F("unread_count") + 1},
+            defaults={"unread_count": 1},
+        )
+
+
+def mark_read(request_obj, user, message_id=None):
+    """
+    Move the read cursor of ``user`` to ``message_id`` (default: the last
+    message) and recount unread messages after it.
+
+    The cursor never moves backwards. The recount only looks at messages
+    newer than the cursor of this one request.
+
+    Returns:
+        tuple (last_read_message_id, unread_count)
+    """
+    messages = RequestMessage.objects.filter(request_id=request_obj.id)
+    last_id = messages.order_by("-id").values_list("id", flat=True).first() or 0
+    # Курсор не может уйти дальше последнего сообщения заявки
+    message_id = last_id if message_id is None else min(message_id, last_id)
+
+    with transaction.atomic():
+        state, _ = RequestReadState.objects.select_for_update().get_or_create(
+            request_id=request_obj.id, user_id=user.id
+        )
+        state.last_read_message_id = max(state.last_read_message_id, message_id)
+        state.unread_count = messages.filter(
+            id__gt=state.last_read_message_id
+        ).exclude(sender_id=user.id).count()
+        state.save(update_fields=["last_read_message_id", "unread_count", "updated_at"])
+    return state.last_read_message_id, state.unread_count
+
+
+def unread_summary(user):
+    """
+    Unread counts of the user's requests from the partial (user) index.
+
+    Returns:
+        dict {"total": int, "requests": {request_id: unread_count}}
+    """
+    rows = RequestReadState.objects.filter(
+        user_id=user.id, unread_count__gt=0
+    ).values_list("request_id", "unread_count")
+    per_request = {str(request_id): count for request_id, count in rows}
+    return {"total": sum(per_request.values()), "requests": per_request}
+
+
+def unread_count_subquery(user):
+    """Subquery for annotating request lists with the user's unread count."""
+    return Subquery(
+        RequestReadState.objects.filter(
+            request_id=OuterRef("pk"), user_id=user.id
+        ).values("unread_count")[:1]
+    )
@@ -0,0 +1,49 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+
+from ..models import RequestMessage
+
+# Конфигурация полнотекстового поиска, та же что в триггере (миграция 0005)
+SEARCH_CONFIG = "russian"
+MIN_QUERY_LENGTH = 2
+COUNTERPART_LIMIT = 5
+
+
+def search_messages(requests_qs, q):
+    """
+    Messages of the given requests matching ``q``, best matches first.
+
+    On PostgreSQL uses the trigger-maintained ``search_vector`` (GIN index)
+    with websearch syntax ("quoted phrases", -exclusions, OR). Other
+    databases fall back to icontains, newest first.
+    """
+    messages = RequestMessage.objects.filter(
+        request__in=requests_qs.values("id")
+    ).select_related("sender")
+
+    if connection.vendor != "postgresql":
+        return messages.filter(text__icontains=q).annotate(
+            rank=Value(0.0, output_field=FloatField()),
+            headline=F("text"),
+        ).order_by("-id")
+
+    query = SearchQuery(q, config=SEARCH_CONFIG, search_type="websearch")
+    return messages.filter(search_vector=query).annotate(
+        rank=SearchRank(F("search_vector"), query),
+        headline=SearchHeadline(
+            "text", query, config=SEARCH_CONFIG, max_words=30, min_words=10, max_fragments=2
+        ),
+    ).order_by("-rank", "-id")
+
+
+def search_counterparts(requests_qs, q, counterpart):
+    """
+    Requests whose counterpart (``"employee"`` or ``"hr"``) name/username contains ``q``.
+
+    icontains compiles to UPPER(...) LIKE, which the pg_trgm indexes on
+    accounts_user (accounts migration 0007) serve without a full scan.
+    """
+    return requests_qs.filter(
+        Q(**{f"{counterpart}__name__icontains": q}) | Q(**{f"{counterpart}__username__icontains": q})
+    ).select_related("type", counterpart).order_by("-last_message_at")[:COUNTERPART_LIMIT]
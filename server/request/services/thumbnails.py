@@ -0,0 +1,121 @@
+import hashlib
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .protected_media import REQUEST_FILES_PREFIX, THUMBS_DIR, USER_PHOTOS_PREFIX, signed_media_url
+
+logger = logging.getLogger(__name__)
+
+# Длинная сторона превью в пикселях: small - список чатов/аватар, medium - пузырь в чате
+THUMBNAIL_SIZES = {"small": 160, "medium": 640}
+WEBP_QUALITY = 80
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+
+
+def is_image_name(name):
+    return os.path.splitext(name or "")[1].lower() in IMAGE_EXTENSIONS
+
+
+# Превью лежат рядом с оригиналами: <prefix>thumbs/<owner id>/<size>_<hash>.webp.
+# Id владельца в пути - по нему /api/media/ проверяет доступ (services.protected_media)
+def message_thumbnails_dir(message_id):
+    return f"{REQUEST_FILES_PREFIX}{THUMBS_DIR}{message_id}/"
+
+
+def user_thumbnails_dir(user_id):
+    return f"{USER_PHOTOS_PREFIX}{THUMBS_DIR}{user_id}/"
+
+
+def _render(image, max_side):
+    from PIL import Image
+
+    thumb = image.copy()
+    thumb.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    thumb.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def make_thumbnails(field_file, directory):
+    """
+    Render WebP thumbnails of an image file into ``directory``.
+
+    Names are content hashes, so a stored thumbnail never changes and may be
+    cached forever; rendering the same image twice reuses the stored files.
+
+    Returns:
+        dict {"source": <original name>, "sizes": {size: stored name}};
+        ``sizes`` is empty if the file is not a readable image
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    result = {"source": field_file.name, "sizes": {}}
+    try:
+        with field_file.open("rb") as f:
+            image = Image.open(f)
+            image = ImageOps.exif_transpose(image)
+            # Анимации (gif/webp) - превью по первому кадру
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning(f"Cannot make thumbnails for {field_file.name}: {e}")
+        return result
+
+    for size, max_side in THUMBNAIL_SIZES.items():
+        content = _render(image, max_side)
+        name = f"{directory}{size}_{hashlib.sha256(content).hexdigest()[:20]}.webp"
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(content))
+        result["sizes"][size] = name
+    return result
+
+
+def thumbnails_stale(field_file, thumbnails):
+    """True if the image was never rendered or has been replaced since"""
+    return bool(field_file) and is_image_name(field_file.name) and (thumbnails or {}).get("source") != field_file.name
+
+
+def delete_unused(old, new):
+    """Remove thumbnails of a replaced image; shared (same hash) files are kept"""
+    keep = set((new.get("sizes") or {}).values())
+    for name in set(((old or {}).get("sizes") or {}).values()) - keep:
+        default_storage.delete(name)
+
+
+def _schedule(task, object_id):
+    def send():
+        try:
+            task.delay(object_id)
+        except Exception as e:
+            logger.error(f"Failed to queue {task.name}({object_id}): {e}")
+
+    # Воркер должен увидеть закоммиченный файл и строку
+    transaction.on_commit(send)
+
+
+def schedule_message_thumbnails(message_id):
+    from ..tasks import generate_message_thumbnails
+    _schedule(generate_message_thumbnails, message_id)
+
+
+def schedule_user_thumbnails(user_id):
+    from accounts.tasks import generate_user_photo_thumbnails
+    _schedule(generate_user_photo_thumbnails, user_id)
+
+
+def thumbnail_paths(field_file, thumbnails):
+    """Stored thumbnail names, {} while they are not rendered for the current file"""
+    if not field_file or not thumbnails or thumbnails.get("source") != field_file.name:
+        return {}
+    return thumbnails.get("sizes") or {}
+
+
+def signed_thumbnail_urls(paths, user_id):
+    """{size: signed URL} for one viewer"""
+    return {size: signed_media_url(name, user_id) for size, name in (paths or {}).items()}
@@ -0,0 +1,145 @@
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Request, UploadSession
+from .messages import create_message
+
+logger = logging.getLogger(__name__)
+
+# Читаем тело запроса кусками - чанк целиком в память не попадает
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """Invalid chunk or session state. ``offset`` is set when the client must resume from it."""
+
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.offset = offset
+
+
+class _PartialFile(File):
+    """Собранный файл; temporary_file_path позволяет FileSystemStorage переместить его без копирования"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def partial_path(session):
+    return os.path.join(settings.REQUEST_UPLOAD_PARTIAL_DIR, f"{session.id}.part")
+
+
+def init_upload(request_obj, user, filename, size):
+    if request_obj.status == Request.Status.CLOSED:
+        raise UploadError("Cannot upload to closed request")
+    if size > settings.REQUEST_UPLOAD_MAX_SIZE:
+        raise UploadError(f"File is too large (max {settings.REQUEST_UPLOAD_MAX_SIZE // (1024 * 1024)} MB)")
+
+    session = UploadSession.objects.create(
+        request=request_obj,
+        user=user,
+        filename=os.path.basename(filename)[:255],
+        size=size,
+    )
+    os.makedirs(settings.REQUEST_UPLOAD_PARTIAL_DIR, exist_ok=True)
+    open(partial_path(session), "wb").close()
+    return session
+
+
+def write_chunk(session_id, offset, stream, length):
+    """
+    Append ``length`` bytes from ``stream`` at ``offset``.
+
+    The session row is locked while writing, so parallel retries of the same
+    chunk cannot interleave. A chunk that arrives short is discarded and the
+    acknowledged offset stays where it was.
+
+    Returns the updated session.
+    """
+    if length > settings.REQUEST_UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunk is too large (max {settings.REQUEST_UPLOAD_CHUNK_SIZE} bytes)")
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        if session.status != UploadSession.Status.PENDING:
+            raise UploadError("Upload is already completed", offset=session.offset)
+        if offset != session.offset:
+            raise UploadError("Offset mismatch", offset=session.offset)
+        if offset + length > session.size:
+            raise UploadError("Chunk exceeds declared file size", offset=session.offset)
+
+        written = 0
+        with open(partial_path(session), "r+b") as f:
+            f.seek(offset)
+            while written < length:
+                block = stream.read(min(READ_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+            if written < length:
+                f.truncate(offset)
+                raise UploadError("Incomplete chunk", offset=session.offset)
+            f.truncate(offset + written)
+
+        session.offset = offset + written
+        session.save(update_fields=["offset", "updated_at"])
+    return session
+
+
+def complete_upload(session_id, text=""):
+    """
+    Attach the assembled file to a new message of the request.
+
+    Returns:
+        tuple (message, created) - repeated complete calls return the same message
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().select_related("request", "user").get(pk=session_id)
+        if session.status == UploadSession.Status.COMPLETED:
+            return session.message, False
+        if session.offset != session.size:
+            raise UploadError("Upload is not finished", offset=session.offset)
+        if session.request.status == Request.Status.CLOSED:
+            raise UploadError("Cannot send message to closed request")
+
+        path = partial_path(session)
+        with open(path, "rb") as f:
+            message = create_message(
+                session.request,
+                session.user,
+                text=text,
+                file=_PartialFile(f, name=session.filename),
+            )
+        session.status = UploadSession.Status.COMPLETED
+        session.message = message
+        session.save(update_fields=["status", "message", "updated_at"])
+
+    # Если storage скопировал файл, а не переместил
+    if os.path.exists(path):
+        os.remove(path)
+    return message, True
+
+
+def cleanup_stale_uploads(older_than=timedelta(days=1)):
+    """Delete unfinished sessions and their partial files. Returns the number of removed sessions."""
+    stale = UploadSession.objects.filter(
+        status=UploadSession.Status.PENDING,
+        updated_at__lt=timezone.now() - older_than,
+    )
+    removed = 0
+    for session in stale.iterator():
+        try:
+            os.remove(partial_path(session))
+        except FileNotFoundError:
+            pass
+        session.delete()
+        removed += 1
+    logger.info(f"Removed {removed} stale upload session(s)")
+    return removed
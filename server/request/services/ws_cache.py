@@ -0,0 +1,74 @@
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+USER_KEY = "ws_user:v1:{user_id}"
+PARTICIPANTS_KEY = "request_participants:v1:{request_id}"
+# Короткий TTL: даже без инвалидации устаревшие данные живут недолго
+USER_TTL = 60
+PARTICIPANTS_TTL = 5 * 60
+
+# Поля, которых достаточно WebSocket-консьюмерам
+USER_FIELDS = ("id", "username", "name", "role", "company_id", "department_id", "is_active")
+
+
+def _user_key(user_id):
+    return USER_KEY.format(user_id=user_id)
+
+
+def _participants_key(request_id):
+    return PARTICIPANTS_KEY.format(request_id=request_id)
+
+
+def get_user_snapshot(user_id):
+    """
+    Cached minimal user row for WebSocket auth, or None if the user does not exist.
+
+    Returns an unsaved-looking ``User`` instance built from the snapshot - it is
+    only meant for reading ids/names in consumers, never for saving.
+    """
+    from accounts.models import User
+
+    snapshot = cache.get(_user_key(user_id))
+    if snapshot is None:
+        snapshot = User.objects.filter(pk=user_id).values(*USER_FIELDS).first() or {}
+        cache.set(_user_key(user_id), snapshot, USER_TTL)
+    if not snapshot:
+        return None
+
+    user = User(**snapshot)
+    user._state.adding = False
+    return user
+
+
+def get_participant_ids(request_id):
+    """Cached (employee_id, hr_id) of the request, or None if it does not exist."""
+    from ..models import Request
+
+    participants = cache.get(_participants_key(request_id))
+    if participants is None:
+        row = Request.objects.filter(pk=request_id).values_list("employee_id", "hr_id").first()
+        participants = tuple(row) if row else ()
+        cache.set(_participants_key(request_id), participants, PARTICIPANTS_TTL)
+    return participants or None
+
+
+def is_participant(request_id, user_id):
+    participants = get_participant_ids(request_id)
+    return bool(participants) and user_id in participants
+
+
+def invalidate_ws_users(user_ids):
+    """Drop cached WebSocket snapshots, e.g. after deactivation."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
+    logger.debug(f"Invalidated WebSocket user cache for {len(user_ids)} user(s)")
+
+
+def invalidate_participants(request_id):
+    """Drop cached participants of the request, e.g. after reassignment to another HR."""
+    cache.delete(_participants_key(request_id))
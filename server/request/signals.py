@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Request
+from .services.thumbnails import schedule_user_thumbnails, thumbnails_stale
+from .services.ws_cache import invalidate_participants, invalidate_ws_users
+
+# Кеш WebSocket сбрасываем после коммита: иначе подключение, пришедшее во время
+# транзакции, прочитает старую строку и снова закеширует ее на весь TTL
+
+
+@receiver(post_save, sender=Request)
+@receiver(post_delete, sender=Request)
+def request_changed(sender, instance, created=False, **kwargs):
+    """Заявку могли переназначить на другого HR - сбрасываем кеш участников"""
+    if not created:
+        request_id = instance.id
+        transaction.on_commit(lambda: invalidate_participants(request_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """Деактивация/изменение пользователя - сбрасываем снапшот для WebSocket"""
+    user_ids = [instance.pk]
+    transaction.on_commit(lambda: invalidate_ws_users(user_ids))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_photo_changed(sender, instance, update_fields=None, **kwargs):
+    """Новое фото - рендерим превью в celery"""
+    if update_fields is not None and "photo" not in update_fields:
+        return
+    if thumbnails_stale(instance.photo, instance.thumbnails):
+        schedule_user_thumbnails(instance.pk)
@@ -0,0 +1,30 @@
+import logging
+
+from celery import shared_task
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_message_thumbnails(message_id):
+    """
+    WebP-превью вложения-картинки. После рендера участникам чата уходит
+    событие message.thumbnails через outbox - клиент подменит заглушку.
+    """
+    from .models import RequestMessage
+    from .services.outbox import enqueue_thumbnails
+    from .services.thumbnails import make_thumbnails, message_thumbnails_dir, thumbnails_stale
+
+    message = RequestMessage.objects.select_related("request").filter(pk=message_id).first()
+    if not message or not thumbnails_stale(message.file, message.thumbnails):
+        return {"success": True, "skipped": True}
+
+    thumbnails = make_thumbnails(message.file, message_thumbnails_dir(message.id))
+    with transaction.atomic():
+        updated = RequestMessage.objects.filter(pk=message.id, file=message.file.name).update(thumbnails=thumbnails)
+        if updated and thumbnails["sizes"]:
+            enqueue_thumbnails(message.request, message.id, thumbnails["sizes"])
+
+    logger.info(f"Thumbnails for message {message_id}: {thumbnails['sizes']}")
+    return {"success": True, "sizes": thumbnails["sizes"]}
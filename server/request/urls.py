@@ -1,26 +1,47 @@
 from django.urls import path
 from .views.views_employee import (
     HRListView, RequestTypeListView, EmployeeRequestListView,
-    EmployeeRequestDetailView, EmployeeRequestMessageView
+    EmployeeRequestDetailView, EmployeeRequestMessageView, EmployeeRequestSearchView,
+    EmployeeRequestReadView, EmployeeUnreadSummaryView
 )
 from .views.views_hr import (
     HRRequestListView, HRRequestDetailView, HRRequestMessageView,
-    HRRequestStatusView, HRRequestCloseView
+    HRRequestStatusView, HRRequestCloseView, HRRequestSearchView,
+    HRRequestReadView, HRUnreadSummaryView
 )
+from .views.views_uploads import (
+    RequestUploadInitView, RequestUploadChunkView, RequestUploadCompleteView
+)
+from .views.views_media import ProtectedMediaView
 
 
 urlpatterns = [
     # Employee endpoints
     path("employee/requests/hr-list/", HRListView.as_view(), name="employee-hr-list"),
     path("employee/requests/types/", RequestTypeListView.as_view(), name="employee-request-types"),
+    path("employee/requests/search/", EmployeeRequestSearchView.as_view(), name="employee-request-search"),
+    path("employee/requests/unread/", EmployeeUnreadSummaryView.as_view(), name="employee-request-unread"),
     path("employee/requests/", EmployeeRequestListView.as_view(), name="employee-requests"),
     path("employee/requests/<int:pk>/", EmployeeRequestDetailView.as_view(), name="employee-request-detail"),
     path("employee/requests/<int:pk>/messages/", EmployeeRequestMessageView.as_view(), name="employee-request-message"),
+    path("employee/requests/<int:pk>/read/", EmployeeRequestReadView.as_view(), name="employee-request-read"),
+    path("employee/requests/<int:pk>/uploads/", RequestUploadInitView.as_view(role_field="employee"), name="employee-request-upload-init"),
+    path("employee/requests/<int:pk>/uploads/<uuid:upload_id>/", RequestUploadChunkView.as_view(role_field="employee"), name="employee-request-upload-chunk"),
+    path("employee/requests/<int:pk>/uploads/<uuid:upload_id>/complete/", RequestUploadCompleteView.as_view(role_field="employee"), name="employee-request-upload-complete"),
     
     # HR endpoints
     path("hr/requests/", HRRequestListView.as_view(), name="hr-requests"),
+    path("hr/requests/search/", HRRequestSearchView.as_view(), name="hr-request-search"),
+    path("hr/requests/unread/", HRUnreadSummaryView.as_view(), name="hr-request-unread"),
     path("hr/requests/<int:pk>/", HRRequestDetailView.as_view(), name="hr-request-detail"),
     path("hr/requests/<int:pk>/messages/", HRRequestMessageView.as_view(), name="hr-request-message"),
     path("hr/requests/<int:pk>/status/", HRRequestStatusView.as_view(), name="hr-request-status"),
     path("hr/requests/<int:pk>/close/", HRRequestCloseView.as_view(), name="hr-request-close"),
-]
\ No newline at end of file
+    path("hr/requests/<int:pk>/read/", HRRequestReadView.as_view(), name="hr-request-read"),
+    path("hr/requests/<int:pk>/uploads/", RequestUploadInitView.as_view(role_field="hr"), name="hr-request-upload-init"),
+    path("hr/requests/<int:pk>/uploads/<uuid:upload_id>/", RequestUploadChunkView.as_view(role_field="hr"), name="hr-request-upload-chunk"),
+    path("hr/requests/<int:pk>/uploads/<uuid:upload_id>/complete/", RequestUploadCompleteView.as_view(role_field="hr"), name="hr-request-upload-complete"),
+
+    # Protected media (request attachments, user photos)
+    path("media/<path:path>", ProtectedMediaView.as_view(), name="protected-media"),
+]
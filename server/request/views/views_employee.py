@@ -4,17 +4,19 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Max
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 
-from ..models import Request, RequestMessage, RequestType
+from ..models import Request, RequestType
 from ..permissions import IsEmployee, IsRequestParticipant
 from ..serializers.serializers_employee import (
     HRListSerializer, RequestTypeSerializer, RequestCreateSerializer,
-    RequestListSerializer, RequestDetailSerializer, SendMessageSerializer
+    RequestListSerializer, RequestDetailSerializer, SendMessageSerializer,
+    RequestMessageSerializer
 )
+from ..pagination import MessageIdPagination
+from ..serializers.serializers_read import MarkReadSerializer, ReadStateSerializer
 from accounts.models import User
-from ..websocket.ws_utils import notify_new_message
+from ..services.messages import create_message
 
 
 class HRListView(APIView):
@@ -58,16 +60,17 @@ class EmployeeRequestListView(APIView):
 
     @extend_schema(
         responses={200: RequestListSerializer(many=True)},
-        description="Get list of all requests created by the employee",
+        description="Get list of all requests created by the employee, most recent activity first",
         summary="Get my requests (Employee only)"
     )
     def get(self, request):
+        from ..services.read_state import unread_count_subquery
+
         requests = Request.objects.filter(
             employee=request.user
         ).select_related("type", "hr").annotate(
-            messages_count=Count("messages"),
-            last_message_at=Max("messages__created_at")
-        )
+            _unread_count=unread_count_subquery(request.user)
+        ).order_by("-last_message_at")
         
         serializer = RequestListSerializer(requests, many=True)
         return Response(serializer.data)
@@ -102,7 +105,7 @@ class EmployeeRequestDetailView(APIView):
 
     def get_object(self, pk, user):
         obj = get_object_or_404(
-            Request.objects.select_related("type", "hr").prefetch_related("messages__sender"),
+            Request.objects.select_related("type", "hr"),
             pk=pk,
             employee=user
         )
@@ -114,7 +117,7 @@ class EmployeeRequestDetailView(APIView):
             200: RequestDetailSerializer,
             404: OpenApiResponse(description="Request not found")
         },
-        description="Get request details with all messages",
+        description="Get request details with the latest page of messages. Older messages are loaded via GET /messages/?before=<id>.",
         summary="Get request details (Employee only)"
     )
     def get(self, request, pk):
@@ -136,14 +139,64 @@ class EmployeeRequestMessageView(APIView):
         self.check_object_permissions(self.request, obj)
         return obj
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="before",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Return messages older than this message id",
+                required=False
+            ),
+            OpenApiParameter(
+                name="after",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Return messages newer than this message id",
+                required=False
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Page size (default 30, max 100)",
+                required=False
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Page of messages in chronological order",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "results": {"type": "array", "items": {"type": "object"}},
+                        "has_more": {"type": "boolean", "description": "Whether more messages exist in the requested direction"},
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Invalid cursor parameters"),
+            404: OpenApiResponse(description="Request not found")
+        },
+        description="Get messages of a request page by page. Without parameters returns the latest page; before=<id> pages back in history, after=<id> fetches messages newer than the given id.",
+        summary="Get request messages (Employee only)"
+    )
+    def get(self, request, pk):
+        request_obj = self.get_object(pk, request.user)
+        paginator = MessageIdPagination()
+        page = paginator.paginate_queryset(
+            request_obj.messages.select_related("sender"), request
+        )
+        serializer = RequestMessageSerializer(page, many=True, context={"request": request})
+        return Response(paginator.get_paginated_data(serializer.data))
+
     @extend_schema(
         request=SendMessageSerializer,
         responses={
-            201: RequestDetailSerializer,
+            201: RequestMessageSerializer,
             400: OpenApiResponse(description="Validation error or request is closed"),
             404: OpenApiResponse(description="Request not found")
         },
-        description="Send a message to an existing request. Request must not be closed. You can send text, file, or both.",
+        description="Send a message to an existing request. Request must not be closed. You can send text, file, or both. Returns the created message only.",
         summary="Send message to request (Employee only)"
     )
     def post(self, request, pk):
@@ -158,19 +211,155 @@ class EmployeeRequestMessageView(APIView):
         
         serializer = SendMessageSerializer(data=request.data)
         if serializer.is_valid():
-            msg = RequestMessage.objects.create(
-                request=request_obj,
-                sender=request.user,
+            msg = create_message(
+                request_obj,
+                request.user,
                 **serializer.validated_data
             )
-            # Push в WebSocket
-            notify_new_message(request_obj.id, msg)
             
-            # Возвращаем обновленную заявку
-            detail_serializer = RequestDetailSerializer(
-                request_obj,
+            # Возвращаем только созданное сообщение
+            message_serializer = RequestMessageSerializer(
+                msg,
                 context={"request": request}
             )
-            return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
+            return Response(message_serializer.data, status=status.HTTP_201_CREATED)
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class EmployeeRequestSearchView(APIView):
+    """Полнотекстовый поиск по сообщениям своих заявок"""
+    permission_classes = [IsAuthenticated, IsEmployee]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Search query (min 2 characters). Supports \"phrases\", -exclusions and OR",
+                required=True
+            ),
+            OpenApiParameter(
+                name="request_id",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Search only within this request",
+                required=False
+            ),
+            OpenApiParameter(name="limit", type=int, location=OpenApiParameter.QUERY, required=False,
+                             description="Page size (default 20, max 50)"),
+            OpenApiParameter(name="offset", type=int, location=OpenApiParameter.QUERY, required=False),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Ranked page of matching messages; the first page also lists requests whose HR name matches",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "count": {"type": "integer"},
+                        "next": {"type": "string", "nullable": True},
+                        "previous": {"type": "string", "nullable": True},
+                        "results": {"type": "array", "items": {"type": "object"}},
+                        "requests": {"type": "array", "items": {"type": "object"}},
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Query is too short or request_id is invalid"),
+        },
+        description="Full-text search over messages of the employee's own requests, ranked by relevance. The first page also returns requests whose HR name/username contains the query.",
+        summary="Search my requests (Employee only)"
+    )
+    def get(self, request):
+        from ..pagination import SearchPagination
+        from ..serializers.serializers_search import (
+            MessageSearchResultSerializer, RequestSearchResultSerializer
+        )
+        from ..services.search import MIN_QUERY_LENGTH, search_counterparts, search_messages
+
+        q = request.query_params.get("q", "").strip()
+        if len(q) < MIN_QUERY_LENGTH:
+            return Response(
+                {"detail": f"Query must be at least {MIN_QUERY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        requests = Request.objects.filter(employee=request.user)
+        request_id = request.query_params.get("request_id")
+        if request_id:
+            if not request_id.isdigit():
+                return Response({"detail": "Invalid request_id"}, status=status.HTTP_400_BAD_REQUEST)
+            requests = requests.filter(id=int(request_id))
+
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(search_messages(requests, q), request, view=self)
+        response = paginator.get_paginated_response(
+            MessageSearchResultSerializer(page, many=True).data
+        )
+
+        matched_requests = []
+        if not paginator.offset and not request_id:
+            matched_requests = RequestSearchResultSerializer(
+                search_counterparts(requests, q, "hr"),
+                many=True,
+                context={"counterpart": "hr"}
+            ).data
+        response.data["requests"] = matched_requests
+        return response
+
+
+class EmployeeRequestReadView(APIView):
+    """Отметка сообщений заявки прочитанными"""
+    permission_classes = [IsAuthenticated, IsEmployee, IsRequestParticipant]
+
+    def get_object(self, pk, user):
+        obj = get_object_or_404(Request, pk=pk, employee=user)
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    @extend_schema(
+        request=MarkReadSerializer,
+        responses={
+            200: ReadStateSerializer,
+            404: OpenApiResponse(description="Request not found")
+        },
+        description="Mark messages of the request as read up to message_id (inclusive) or up to the last message if omitted. The read cursor never moves backwards.",
+        summary="Mark request as read (Employee only)"
+    )
+    def post(self, request, pk):
+        from ..services.read_state import mark_read
+
+        request_obj = self.get_object(pk, request.user)
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        last_read_message_id, unread_count = mark_read(
+            request_obj, request.user, serializer.validated_data.get("message_id")
+        )
+        return Response({"last_read_message_id": last_read_message_id, "unread_count": unread_count})
+
+
+class EmployeeUnreadSummaryView(APIView):
+    """Сводка непрочитанных сообщений по заявкам"""
+    permission_classes = [IsAuthenticated, IsEmployee]
+
+    @extend_schema(
+        responses={
+            200: OpenApiResponse(
+                description="Total unread messages and unread count per request (only requests with unread messages)",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "total": {"type": "integer"},
+                        "requests": {"type": "object", "additionalProperties": {"type": "integer"}},
+                    }
+                }
+            ),
+        },
+        description="Get unread badges for all requests of the user in one indexed query.",
+        summary="Get unread summary (Employee only)"
+    )
+    def get(self, request):
+        from ..services.read_state import unread_summary
+
+        return Response(unread_summary(request.user))
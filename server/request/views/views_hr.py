@@ -3,39 +3,142 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Max
 from django.utils import timezone
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 
-from ..models import Request, RequestMessage
+from ..models import Request
 from ..permissions import IsHR, IsRequestParticipant
 from ..serializers.serializers_hr import (
     RequestListSerializer, RequestDetailSerializer,
-    SendMessageSerializer, UpdateStatusSerializer
+    SendMessageSerializer, UpdateStatusSerializer, RequestMessageSerializer
 )
-from ..websocket.ws_utils import notify_new_message
+from ..pagination import MessageIdPagination
+from ..serializers.serializers_read import MarkReadSerializer, ReadStateSerializer
+from ..services.inbox import filter_requests, filter_statuses
+from ..services.messages import create_message
+from ..services.outbox import enqueue_status
 
 
 class HRRequestListView(APIView):
-    """Список заявок адресованных HR"""
+    """Инбокс HR: фильтры, keyset-пагинация и счетчики по статусам"""
     permission_classes = [IsAuthenticated, IsHR]
 
     @extend_schema(
-        responses={200: RequestListSerializer(many=True)},
-        description="Get list of all requests assigned to this HR",
+        parameters=[
+            OpenApiParameter(
+                name="status",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Comma-separated statuses: OPEN, IN_PROGRESS, CLOSED",
+                required=False
+            ),
+            OpenApiParameter(
+                name="type",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Request type ID",
+                required=False
+            ),
+            OpenApiParameter(
+                name="employee",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Employee ID",
+                required=False
+            ),
+            OpenApiParameter(
+                name="start_date",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Requests created on or after this date (YYYY-MM-DD)",
+                required=False
+            ),
+            OpenApiParameter(
+                name="end_date",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Requests created on or before this date (YYYY-MM-DD)",
+                required=False
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Opaque cursor from next/previous links",
+                required=False
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Page size (default 30, max 100)",
+                required=False
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Page of requests, most recent activity first, with status counts",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "next": {"type": "string", "nullable": True},
+                        "previous": {"type": "string", "nullable": True},
+                        "results": {"type": "array", "items": {"type": "object"}},
+                        "counts": {
+                            "type": "object",
+                            "properties": {
+                                "total": {"type": "integer"},
+                                "OPEN": {"type": "integer"},
+                                "IN_PROGRESS": {"type": "integer"},
+                                "CLOSED": {"type": "integer"},
+                            }
+                        },
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Invalid parameters"),
+        },
+        description="Get requests assigned to this HR page by page (cursor pagination, most recent activity first). Supports filtering by status, type, employee and creation date range. counts holds per-status totals for the same filters except status, so badges stay correct while a status tab is selected.",
         summary="Get my assigned requests (HR only)"
     )
     def get(self, request):
-        requests = Request.objects.filter(
-            hr=request.user
-        ).select_related("type", "employee").annotate(
-            messages_count=Count("messages"),
-            last_message_at=Max("messages__created_at")
+        from django.db.models import Count, Q
+        from ..pagination import RequestCursorPagination
+        from ..services.read_state import unread_count_subquery
+
+        requests = Request.objects.filter(hr=request.user)
+        try:
+            requests = filter_requests(requests, request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Счетчики одним запросом (условная агрегация) - без учета фильтра по статусу
+        counts = requests.aggregate(
+            total=Count("id"),
+            **{
+                value: Count("id", filter=Q(status=value))
+                for value in Request.Status.values
+            }
         )
-        
-        serializer = RequestListSerializer(requests, many=True)
-        return Response(serializer.data)
+
+        try:
+            requests = filter_statuses(requests, request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = RequestCursorPagination()
+        page = paginator.paginate_queryset(
+            requests.select_related("type", "employee").annotate(
+                _unread_count=unread_count_subquery(request.user)
+            ),
+            request,
+            view=self
+        )
+        response = paginator.get_paginated_response(RequestListSerializer(page, many=True).data)
+        response.data["counts"] = counts
+        return response
 
 
 class HRRequestDetailView(APIView):
@@ -46,7 +149,7 @@ class HRRequestDetailView(APIView):
         obj = get_object_or_404(
             Request.objects.select_related(
                 "type", "employee", "employee__department"
-            ).prefetch_related("messages__sender"),
+            ),
             pk=pk,
             hr=user
         )
@@ -58,7 +161,7 @@ class HRRequestDetailView(APIView):
             200: RequestDetailSerializer,
             404: OpenApiResponse(description="Request not found")
         },
-        description="Get request details with all messages",
+        description="Get request details with the latest page of messages. Older messages are loaded via GET /messages/?before=<id>.",
         summary="Get request details (HR only)"
     )
     def get(self, request, pk):
@@ -80,14 +183,64 @@ class HRRequestMessageView(APIView):
         self.check_object_permissions(self.request, obj)
         return obj
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="before",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Return messages older than this message id",
+                required=False
+            ),
+            OpenApiParameter(
+                name="after",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Return messages newer than this message id",
+                required=False
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Page size (default 30, max 100)",
+                required=False
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Page of messages in chronological order",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "results": {"type": "array", "items": {"type": "object"}},
+                        "has_more": {"type": "boolean", "description": "Whether more messages exist in the requested direction"},
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Invalid cursor parameters"),
+            404: OpenApiResponse(description="Request not found")
+        },
+        description="Get messages of a request page by page. Without parameters returns the latest page; before=<id> pages back in history, after=<id> fetches messages newer than the given id.",
+        summary="Get request messages (HR only)"
+    )
+    def get(self, request, pk):
+        request_obj = self.get_object(pk, request.user)
+        paginator = MessageIdPagination()
+        page = paginator.paginate_queryset(
+            request_obj.messages.select_related("sender"), request
+        )
+        serializer = RequestMessageSerializer(page, many=True, context={"request": request})
+        return Response(paginator.get_paginated_data(serializer.data))
+
     @extend_schema(
         request=SendMessageSerializer,
         responses={
-            201: RequestDetailSerializer,
+            201: RequestMessageSerializer,
             400: OpenApiResponse(description="Validation error or request is closed"),
             404: OpenApiResponse(description="Request not found")
         },
-        description="Send a message to an existing request. Request must not be closed. You can send text, file, or both.",
+        description="Send a message to an existing request. Request must not be closed. You can send text, file, or both. Returns the created message only.",
         summary="Send message to request (HR only)"
     )
     def post(self, request, pk):
@@ -102,21 +255,18 @@ class HRRequestMessageView(APIView):
         
         serializer = SendMessageSerializer(data=request.data)
         if serializer.is_valid():
-            msg = RequestMessage.objects.create(
-                request=request_obj,
-                sender=request.user,
+            msg = create_message(
+                request_obj,
+                request.user,
                 **serializer.validated_data
             )
             
-            # Push в WebSocket
-            notify_new_message(request_obj.id, msg)
-            
-            # Возвращаем обновленную заявку
-            detail_serializer = RequestDetailSerializer(
-                request_obj,
+            # Возвращаем только созданное сообщение
+            message_serializer = RequestMessageSerializer(
+                msg,
                 context={"request": request}
             )
-            return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
+            return Response(message_serializer.data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -153,7 +303,9 @@ class HRRequestStatusView(APIView):
         serializer = UpdateStatusSerializer(data=request.data)
         if serializer.is_valid():
             request_obj.status = serializer.validated_data["status"]
-            request_obj.save(update_fields=["status"])
+            with transaction.atomic():
+                request_obj.save(update_fields=["status"])
+                enqueue_status(request_obj)
             
             detail_serializer = RequestDetailSerializer(
                 request_obj,
@@ -194,10 +346,150 @@ class HRRequestCloseView(APIView):
         
         request_obj.status = Request.Status.CLOSED
         request_obj.closed_at = timezone.now()
-        request_obj.save(update_fields=["status", "closed_at"])
+        with transaction.atomic():
+            request_obj.save(update_fields=["status", "closed_at"])
+            enqueue_status(request_obj)
         
         detail_serializer = RequestDetailSerializer(
             request_obj,
             context={"request": request}
         )
-        return Response(detail_serializer.data)
\ No newline at end of file
+        return Response(detail_serializer.data)
+
+
+class HRRequestSearchView(APIView):
+    """Полнотекстовый поиск по сообщениям заявок HR"""
+    permission_classes = [IsAuthenticated, IsHR]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Search query (min 2 characters). Supports \"phrases\", -exclusions and OR",
+                required=True
+            ),
+            OpenApiParameter(
+                name="request_id",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Search only within this request",
+                required=False
+            ),
+            OpenApiParameter(name="limit", type=int, location=OpenApiParameter.QUERY, required=False,
+                             description="Page size (default 20, max 50)"),
+            OpenApiParameter(name="offset", type=int, location=OpenApiParameter.QUERY, required=False),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Ranked page of matching messages; the first page also lists requests whose employee name matches",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "count": {"type": "integer"},
+                        "next": {"type": "string", "nullable": True},
+                        "previous": {"type": "string", "nullable": True},
+                        "results": {"type": "array", "items": {"type": "object"}},
+                        "requests": {"type": "array", "items": {"type": "object"}},
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Query is too short or request_id is invalid"),
+        },
+        description="Full-text search over messages of requests assigned to this HR, ranked by relevance. The first page also returns requests whose employee name/username contains the query.",
+        summary="Search my requests (HR only)"
+    )
+    def get(self, request):
+        from ..pagination import SearchPagination
+        from ..serializers.serializers_search import (
+            MessageSearchResultSerializer, RequestSearchResultSerializer
+        )
+        from ..services.search import MIN_QUERY_LENGTH, search_counterparts, search_messages
+
+        q = request.query_params.get("q", "").strip()
+        if len(q) < MIN_QUERY_LENGTH:
+            return Response(
+                {"detail": f"Query must be at least {MIN_QUERY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        requests = Request.objects.filter(hr=request.user)
+        request_id = request.query_params.get("request_id")
+        if request_id:
+            if not request_id.isdigit():
+                return Response({"detail": "Invalid request_id"}, status=status.HTTP_400_BAD_REQUEST)
+            requests = requests.filter(id=int(request_id))
+
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(search_messages(requests, q), request, view=self)
+        response = paginator.get_paginated_response(
+            MessageSearchResultSerializer(page, many=True).data
+        )
+
+        matched_requests = []
+        if not paginator.offset and not request_id:
+            matched_requests = RequestSearchResultSerializer(
+                search_counterparts(requests, q, "employee"),
+                many=True,
+                context={"counterpart": "employee"}
+            ).data
+        response.data["requests"] = matched_requests
+        return response
+
+
+class HRRequestReadView(APIView):
+    """Отметка сообщений заявки прочитанными"""
+    permission_classes = [IsAuthenticated, IsHR, IsRequestParticipant]
+
+    def get_object(self, pk, user):
+        obj = get_object_or_404(Request, pk=pk, hr=user)
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    @extend_schema(
+        request=MarkReadSerializer,
+        responses={
+            200: ReadStateSerializer,
+            404: OpenApiResponse(description="Request not found")
+        },
+        description="Mark messages of the request as read up to message_id (inclusive) or up to the last message if omitted. The read cursor never moves backwards.",
+        summary="Mark request as read (HR only)"
+    )
+    def post(self, request, pk):
+        from ..services.read_state import mark_read
+
+        request_obj = self.get_object(pk, request.user)
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        last_read_message_id, unread_count = mark_read(
+            request_obj, request.user, serializer.validated_data.get("message_id")
+        )
+        return Response({"last_read_message_id": last_read_message_id, "unread_count": unread_count})
+
+
+class HRUnreadSummaryView(APIView):
+    """Сводка непрочитанных сообщений по заявкам"""
+    permission_classes = [IsAuthenticated, IsHR]
+
+    @extend_schema(
+        responses={
+            200: OpenApiResponse(
+                description="Total unread messages and unread count per request (only requests with unread messages)",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "total": {"type": "integer"},
+                        "requests": {"type": "object", "additionalProperties": {"type": "integer"}},
+                    }
+                }
+            ),
+        },
+        description="Get unread badges for all requests of the user in one indexed query.",
+        summary="Get unread summary (HR only)"
+    )
+    def get(self, request):
+        from ..services.read_state import unread_summary
+
+        return Response(unread_summary(request.user))
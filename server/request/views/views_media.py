@@ -0,0 +1,72 @@
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.static import serve
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+from ..services.protected_media import THUMBS_DIR, has_access, verify_signature
+
+
+class ProtectedMediaView(APIView):
+    """
+    Авторизация доступа к вложениям и фото. Сам файл отдает nginx
+    (X-Accel-Redirect на internal location), воркер байты не стримит.
+    """
+    # Подпись в URL вместо JWT - ссылку можно открыть в <img>; сессия - для админки
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="u", type=int, location=OpenApiParameter.QUERY, required=False,
+                             description="Viewer user ID the URL was signed for"),
+            OpenApiParameter(name="exp", type=int, location=OpenApiParameter.QUERY, required=False,
+                             description="Expiry (unix time)"),
+            OpenApiParameter(name="sig", type=str, location=OpenApiParameter.QUERY, required=False,
+                             description="URL signature"),
+        ],
+        responses={
+            200: OpenApiResponse(description="File content (served by nginx)"),
+            404: OpenApiResponse(description="File not found, link expired or no access"),
+        },
+        description="Serve a request attachment or user photo. URLs come signed from the API and WebSocket payloads; access is re-checked on every download.",
+        summary="Download protected media"
+    )
+    def get(self, request, path):
+        if ".." in path.split("/") or path.startswith("/"):
+            raise Http404
+
+        params = request.query_params
+        if "sig" in params:
+            user_id = params.get("u", "")
+            if not verify_signature(path, user_id, params.get("exp", ""), params["sig"]):
+                raise Http404
+            if not has_access(path, int(user_id)):
+                raise Http404
+            # Имя превью - хеш содержимого, файл по нему никогда не меняется
+            if f"/{THUMBS_DIR}" in path:
+                cache_control = "private, max-age=31536000, immutable"
+            else:
+                cache_control = "private, max-age=3600"
+        elif request.user.is_authenticated and request.user.is_staff:
+            # Превью в админке
+            cache_control = "private, no-cache"
+        else:
+            raise Http404
+
+        if not settings.PROTECTED_MEDIA_X_ACCEL:
+            # Локальная разработка без nginx
+            response = serve(request._request, path, document_root=settings.MEDIA_ROOT)
+            response["Cache-Control"] = cache_control
+            return response
+
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = f"{settings.PROTECTED_MEDIA_INTERNAL_URL}{quote(path)}"
+        response["Cache-Control"] = cache_control
+        # Content-Type определит nginx по расширению файла
+        del response["Content-Type"]
+        return response
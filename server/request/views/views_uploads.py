@@ -0,0 +1,148 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from django.shortcuts import get_object_or_404
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+
+from ..models import Request, UploadSession
+from ..permissions import IsRequestParticipant
+from ..serializers.serializers_uploads import (
+    UploadInitSerializer, UploadCompleteSerializer, UploadSessionSerializer
+)
+from ..services.uploads import UploadError, init_upload, write_chunk, complete_upload
+
+
+def _upload_error_response(error):
+    """400 для некорректного запроса, 409 если клиенту нужно продолжить с другого смещения"""
+    data = {"detail": str(error)}
+    if error.offset is not None:
+        data["offset"] = error.offset
+        return Response(data, status=status.HTTP_409_CONFLICT)
+    return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+
+class UploadViewMixin:
+    """
+    Общая часть для employee и HR: role_field задается в urls.py
+    через as_view(role_field="employee" | "hr").
+    """
+    permission_classes = [IsAuthenticated, IsRequestParticipant]
+    role_field = "employee"
+
+    def get_request_obj(self, pk):
+        obj = get_object_or_404(Request, pk=pk, **{self.role_field: self.request.user})
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    def get_session(self, pk, upload_id):
+        return get_object_or_404(
+            UploadSession,
+            pk=upload_id,
+            request_id=self.get_request_obj(pk).id,
+            user=self.request.user
+        )
+
+
+class RequestUploadInitView(UploadViewMixin, APIView):
+    """Начало докачиваемой загрузки вложения"""
+
+    @extend_schema(
+        request=UploadInitSerializer,
+        responses={
+            201: UploadSessionSerializer,
+            400: OpenApiResponse(description="File is too large or request is closed"),
+            404: OpenApiResponse(description="Request not found")
+        },
+        description="Start a resumable attachment upload. Then PUT chunks of at most chunk_size bytes to /uploads/<id>/ with an Upload-Offset header and POST /uploads/<id>/complete/.",
+        summary="Start attachment upload"
+    )
+    def post(self, request, pk):
+        request_obj = self.get_request_obj(pk)
+        serializer = UploadInitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = init_upload(request_obj, request.user, **serializer.validated_data)
+        except UploadError as e:
+            return _upload_error_response(e)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class RequestUploadChunkView(UploadViewMixin, APIView):
+    """Статус загрузки и прием чанков"""
+
+    @extend_schema(
+        responses={200: UploadSessionSerializer, 404: OpenApiResponse(description="Upload not found")},
+        description="Get upload progress. offset is the number of acknowledged bytes: resume from it after a failure.",
+        summary="Get attachment upload status"
+    )
+    def get(self, request, pk, upload_id):
+        return Response(UploadSessionSerializer(self.get_session(pk, upload_id)).data)
+
+    @extend_schema(
+        request={"application/octet-stream": {"type": "string", "format": "binary"}},
+        parameters=[
+            OpenApiParameter(
+                name="Upload-Offset",
+                type=int,
+                location=OpenApiParameter.HEADER,
+                description="Byte offset of this chunk, must equal the current offset",
+                required=True
+            ),
+        ],
+        responses={
+            200: UploadSessionSerializer,
+            400: OpenApiResponse(description="Invalid chunk"),
+            409: OpenApiResponse(description="Offset mismatch: resume from the returned offset"),
+            411: OpenApiResponse(description="Content-Length is required"),
+        },
+        description="Upload the next chunk as the raw request body.",
+        summary="Upload attachment chunk"
+    )
+    def put(self, request, pk, upload_id):
+        session = self.get_session(pk, upload_id)
+
+        offset = request.headers.get("Upload-Offset", "")
+        if not offset.isdigit():
+            return Response({"detail": "Upload-Offset header is required"}, status=status.HTTP_400_BAD_REQUEST)
+        length = request.headers.get("Content-Length", "")
+        if not length.isdigit():
+            return Response({"detail": "Content-Length is required"}, status=status.HTTP_411_LENGTH_REQUIRED)
+
+        try:
+            # Тело читается потоком из request, request.data не трогаем
+            session = write_chunk(session.id, int(offset), request._request, int(length))
+        except UploadError as e:
+            return _upload_error_response(e)
+        return Response(UploadSessionSerializer(session).data)
+
+
+class RequestUploadCompleteView(UploadViewMixin, APIView):
+    """Завершение загрузки: файл прикрепляется к новому сообщению"""
+
+    @extend_schema(
+        request=UploadCompleteSerializer,
+        responses={
+            201: OpenApiResponse(description="Message with the attachment created"),
+            200: OpenApiResponse(description="Upload was already completed, returns the same message"),
+            400: OpenApiResponse(description="Request is closed"),
+            409: OpenApiResponse(description="Upload is not finished: resume from the returned offset"),
+        },
+        description="Finish the upload and send it as a message with optional text. Safe to retry.",
+        summary="Complete attachment upload"
+    )
+    def post(self, request, pk, upload_id):
+        session = self.get_session(pk, upload_id)
+        serializer = UploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            message, created = complete_upload(session.id, serializer.validated_data["text"])
+        except UploadError as e:
+            return _upload_error_response(e)
+
+        if self.role_field == "hr":
+            from ..serializers.serializers_hr import RequestMessageSerializer
+        else:
+            from ..serializers.serializers_employee import RequestMessageSerializer
+        data = RequestMessageSerializer(message, context={"request": request}).data
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
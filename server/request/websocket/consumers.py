@@ -1,41 +1,337 @@
+import logging
+import time
+
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from django.db.models import Q
+from urllib.parse import parse_qs
+
+from server.metrics import MetricsConsumerMixin
+from .ws_utils import Replayed, broadcast_message, chat_group, for_user, missed_messages, parse_since, user_group
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_LENGTH = 10000
+MAX_CLIENT_ID_LENGTH = 64
+
+
+@database_sync_to_async
+def _mark_read(request_id, user, message_id):
+    from request.models import Request
+    from request.services.read_state import mark_read
+
+    return mark_read(Request(pk=int(request_id)), user, message_id)
+
+
+async def send_read_ack(consumer, request_id, message_id):
+    """Handle a message.read frame: move the read cursor and ack with the new unread count"""
+    if message_id is not None and (
+        not isinstance(message_id, int) or isinstance(message_id, bool) or message_id < 1
+    ):
+        await consumer.send_json({"type": "error", "request_id": request_id, "detail": "message_id must be a positive integer"})
+        return
+    last_read_message_id, unread_count = await _mark_read(request_id, consumer.scope["user"], message_id)
+    await consumer.send_json({
+        "type": "read.ack",
+        "request_id": int(request_id),
+        "last_read_message_id": last_read_message_id,
+        "unread_count": unread_count,
+    })
 
 
-class ChatConsumer(AsyncJsonWebsocketConsumer):
+class ChatConsumer(MetricsConsumerMixin, AsyncJsonWebsocketConsumer):
     """
     WebSocket consumer for chat by request_id.
     Client connects to ws/chat/<request_id>/?token=<jwt_access>
+
+    Text messages can be sent directly over the socket:
+        -> {"type": "message.send", "client_id": "<uuid>", "text": "..."}
+        <- {"type": "message.ack", "client_id": "<uuid>", "duplicate": false, "message": {...}}
+        <- {"type": "error", "client_id": "<uuid>", "detail": "..."}
+    Read cursor (message_id is optional, defaults to the last message):
+        -> {"type": "message.read", "message_id": 42}
+        <- {"type": "read.ack", "request_id": 1, "last_read_message_id": 42, "unread_count": 0}
+    client_id is an idempotency key: resending the same frame after a
+    reconnect returns the already stored message. Files are still sent via REST.
+
+    Reconnect with ?since=<last_message_id> to get the missed messages first:
+        <- {...message...} x N
+        <- {"type": "replay.done", "last_id": 42, "has_more": false}
+    If has_more is true, the rest is fetched via GET .../messages/?after=<last_id>.
     """
 
     async def connect(self):
         self.request_id = self.scope["url_route"]["kwargs"]["request_id"]
-        self.room_group = f"chat_{self.request_id}"
+        self.room_group = chat_group(self.request_id)
         user = self.scope.get("user", AnonymousUser())
 
         if isinstance(user, AnonymousUser) or not await self._is_participant(user):
             await self.close()
             return
 
+        # Подписка до чтения из БД: сообщения, пришедшие во время replay, не потеряются
         await self.channel_layer.group_add(self.room_group, self.channel_name)
         await self.accept()
+        self.replayed = None
+
+        qs = parse_qs(self.scope.get("query_string", b"").decode())
+        since = parse_since((qs.get("since") or [None])[0])
+        if since is not None:
+            await self._replay(since)
 
     async def disconnect(self, code):
         await self.channel_layer.group_discard(self.room_group, self.channel_name)
 
+    async def _replay(self, since):
+        payloads, has_more = await database_sync_to_async(missed_messages)(self.request_id, since)
+        user_id = self.scope["user"].id
+        for payload in payloads:
+            await self.send_json(for_user(payload, user_id))
+        self.replayed = Replayed(payloads, since)
+        await self.send_json({"type": "replay.done", "last_id": self.replayed.last_id, "has_more": has_more})
+
     async def receive_json(self, content, **kwargs):
-        pass  # messages are sent via REST, not WS
+        if not isinstance(content, dict):
+            await self.send_json({"type": "error", "detail": "Invalid frame"})
+            return
+
+        if content.get("type") == "message.send":
+            await self._handle_send(content)
+        elif content.get("type") == "message.read":
+            await send_read_ack(self, self.request_id, content.get("message_id"))
+        else:
+            await self.send_json({
+                "type": "error",
+                "client_id": content.get("client_id"),
+                "detail": f"Unknown frame type: {content.get('type')}",
+            })
+
+    async def _handle_send(self, content):
+        started = time.perf_counter()
+        client_id = content.get("client_id")
+        text = content.get("text")
+
+        if not isinstance(client_id, str) or not client_id or len(client_id) > MAX_CLIENT_ID_LENGTH:
+            await self.send_json({"type": "error", "client_id": client_id, "detail": "client_id is required"})
+            return
+        if not isinstance(text, str) or not text.strip():
+            await self.send_json({"type": "error", "client_id": client_id, "detail": "text is required"})
+            return
+        if len(text) > MAX_TEXT_LENGTH:
+            await self.send_json({
+                "type": "error",
+                "client_id": client_id,
+                "detail": f"text is too long (max {MAX_TEXT_LENGTH} characters)",
+            })
+            return
+
+        request_obj, payload, created, error = await self._save_message(client_id, text)
+        if error:
+            await self.send_json({"type": "error", "client_id": client_id, "detail": error})
+            return
+
+        # Сначала сохранение, потом рассылка - повтор не даст дубля в группе.
+        # Транзакция уже закоммичена, поэтому рассылаем сразу, без outbox
+        if created:
+            from request.services.messages import message_preview
+            await broadcast_message(self.channel_layer, request_obj, payload, message_preview(text))
+
+        await self.send_json({
+            "type": "message.ack",
+            "client_id": client_id,
+            "duplicate": not created,
+            "message": for_user(payload, self.scope["user"].id),
+        })
+        logger.info(
+            f"WS message {payload['id']} in request {self.request_id} handled in "
+            f"{(time.perf_counter() - started) * 1000:.1f}ms (created={created})"
+        )
 
     async def chat_message(self, event):
         """Receive from channel_layer and send to WebSocket client"""
+        # Уже отправлено при replay
+        if self.replayed is not None:
+            if self.replayed.seen(event["data"]["id"]):
+                return
+            if self.replayed.done:
+                self.replayed = None
+        await self.send_json(for_user(event["data"], self.scope["user"].id))
+
+    async def chat_status(self, event):
         await self.send_json(event["data"])
 
+    async def chat_thumbnails(self, event):
+        await self.send_json(for_user(event["data"], self.scope["user"].id))
+
     @database_sync_to_async
     def _is_participant(self, user):
-        from request.models import Request
-        return Request.objects.filter(
-            Q(employee=user) | Q(hr=user),
-            pk=self.request_id,
-        ).exists()
+        from request.services.ws_cache import is_participant
+        return is_participant(self.request_id, user.id)
+
+    @database_sync_to_async
+    def _save_message(self, client_id, text):
+        """
+        Persist the message in one thread hop: status check, insert and
+        counter update run inside create_message's transaction.
+
+        Returns:
+            tuple (request, payload, created, error)
+        """
+        from request.models import Request, RequestMessage
+        from request.services.messages import create_message_idempotent
+        from .ws_utils import message_payload
+
+        user = self.scope["user"]
+        request_obj = Request.objects.filter(pk=self.request_id).only(
+            "id", "status", "employee_id", "hr_id"
+        ).first()
+        if request_obj is None:
+            return None, None, False, "Request not found"
+
+        if request_obj.status == Request.Status.CLOSED:
+            # Повтор уже сохраненного сообщения после закрытия заявки - просто подтверждаем
+            existing = RequestMessage.objects.filter(
+                sender_id=user.id, client_id=client_id, request_id=request_obj.id
+            ).first()
+            if existing:
+                return request_obj, message_payload(existing, sender=user), False, None
+            return request_obj, None, False, "Cannot send message to closed request"
+
+        message, created = create_message_idempotent(
+            request_obj, user, client_id, text=text, publish=False
+        )
+        if message.request_id != request_obj.id:
+            return request_obj, None, False, "client_id was already used in another request"
+        return request_obj, message_payload(message, sender=user), created, None
+
+
+class InboxConsumer(MetricsConsumerMixin, AsyncJsonWebsocketConsumer):
+    """
+    One socket per user for all of their requests: ws/inbox/?token=<jwt_access>
+
+    Always delivers compact events for every request of the user:
+        <- {"type": "message.new", "request_id": 1, "message_id": 10, "preview": "...", ...}
+        <- {"type": "request.status", "request_id": 1, "status": "CLOSED", "closed_at": "..."}
+
+    Full messages are delivered only for focused requests:
+        -> {"type": "subscribe", "request_id": 1}
+        -> {"type": "unsubscribe", "request_id": 1}
+        <- {"type": "chat.message", "request_id": 1, "message": {...}}
+        -> {"type": "message.read", "request_id": 1, "message_id": 42}
+        <- {"type": "read.ack", "request_id": 1, "last_read_message_id": 42, "unread_count": 0}
+    subscribe accepts an optional "since": <last_message_id> to replay missed
+    messages of that request, followed by {"type": "replay.done", "request_id": 1, ...}.
+    """
+
+    MAX_SUBSCRIPTIONS = 20
+
+    async def connect(self):
+        user = self.scope.get("user", AnonymousUser())
+        if isinstance(user, AnonymousUser):
+            await self.close()
+            return
+
+        self.user_group = user_group(user.id)
+        self.subscriptions = set()
+        self.replayed = {}
+        await self.channel_layer.group_add(self.user_group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if not hasattr(self, "user_group"):
+            return
+        await self.channel_layer.group_discard(self.user_group, self.channel_name)
+        for request_id in self.subscriptions:
+            await self.channel_layer.group_discard(chat_group(request_id), self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict):
+            await self.send_json({"type": "error", "detail": "Invalid frame"})
+            return
+
+        frame_type = content.get("type")
+        request_id = content.get("request_id")
+        if frame_type not in ("subscribe", "unsubscribe", "message.read"):
+            await self.send_json({"type": "error", "detail": f"Unknown frame type: {frame_type}"})
+            return
+        if not isinstance(request_id, int) or isinstance(request_id, bool):
+            await self.send_json({"type": "error", "detail": "request_id must be an integer"})
+            return
+
+        if frame_type == "message.read":
+            if not await self._is_participant(request_id):
+                await self.send_json({"type": "error", "request_id": request_id, "detail": "Request not found"})
+                return
+            await send_read_ack(self, request_id, content.get("message_id"))
+        elif frame_type == "subscribe":
+            await self._subscribe(request_id, parse_since(content.get("since")))
+        else:
+            await self._unsubscribe(request_id)
+
+    async def _subscribe(self, request_id, since=None):
+        if request_id not in self.subscriptions:
+            if len(self.subscriptions) >= self.MAX_SUBSCRIPTIONS:
+                await self.send_json({
+                    "type": "error",
+                    "request_id": request_id,
+                    "detail": f"Too many subscriptions (max {self.MAX_SUBSCRIPTIONS})",
+                })
+                return
+            if not await self._is_participant(request_id):
+                await self.send_json({"type": "error", "request_id": request_id, "detail": "Request not found"})
+                return
+            await self.channel_layer.group_add(chat_group(request_id), self.channel_name)
+            self.subscriptions.add(request_id)
+        await self.send_json({"type": "subscribed", "request_id": request_id})
+
+        if since is not None:
+            payloads, has_more = await database_sync_to_async(missed_messages)(request_id, since)
+            user_id = self.scope["user"].id
+            for payload in payloads:
+                await self.send_json({
+                    "type": "chat.message",
+                    "request_id": request_id,
+                    "message": for_user(payload, user_id),
+                })
+            replayed = self.replayed[request_id] = Replayed(payloads, since)
+            await self.send_json({
+                "type": "replay.done",
+                "request_id": request_id,
+                "last_id": replayed.last_id,
+                "has_more": has_more,
+            })
+
+    async def _unsubscribe(self, request_id):
+        if request_id in self.subscriptions:
+            await self.channel_layer.group_discard(chat_group(request_id), self.channel_name)
+            self.subscriptions.discard(request_id)
+            self.replayed.pop(request_id, None)
+        await self.send_json({"type": "unsubscribed", "request_id": request_id})
+
+    async def inbox_event(self, event):
+        await self.send_json(event["data"])
+
+    async def chat_message(self, event):
+        replayed = self.replayed.get(event["request_id"])
+        if replayed is not None:
+            if replayed.seen(event["data"]["id"]):
+                return
+            if replayed.done:
+                del self.replayed[event["request_id"]]
+        await self.send_json({
+            "type": "chat.message",
+            "request_id": event["request_id"],
+            "message": for_user(event["data"], self.scope["user"].id),
+        })
+
+    async def chat_status(self, event):
+        # Статус уже приходит через персональную группу
+        pass
+
+    async def chat_thumbnails(self, event):
+        await self.send_json(for_user(event["data"], self.scope["user"].id))
+
+    @database_sync_to_async
+    def _is_participant(self, request_id):
+        from request.services.ws_cache import is_participant
+        return is_participant(request_id, self.scope["user"].id)
@@ -2,19 +2,25 @@ from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import AccessToken
-from django.contrib.auth import get_user_model
 from urllib.parse import parse_qs
 
-User = get_user_model()
-
 
 @database_sync_to_async
 def get_user_from_token(token_str):
+    """
+    Validate the JWT locally and resolve the user from a short-lived cache,
+    so reconnect storms do not turn into one DB query per socket.
+    """
+    from ..services.ws_cache import get_user_snapshot
+
     try:
         token = AccessToken(token_str)
-        return User.objects.get(id=token["user_id"])
+        user = get_user_snapshot(token["user_id"])
     except Exception:
         return AnonymousUser()
+    if user is None or not user.is_active:
+        return AnonymousUser()
+    return user
 
 
 class JWTAuthMiddleware(BaseMiddleware):
@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r"ws/chat/(?P<request_id>\d+)/$", consumers.ChatConsumer.as_asgi()),
+    re_path(r"ws/inbox/$", consumers.InboxConsumer.as_asgi()),
 ]
@@ -1,32 +1,166 @@
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from django.conf import settings
-
-
-def _absolute_file_url(file_field):
-    """Build full URL for a file field so mobile clients can open it directly"""
-    if not file_field:
-        return None
-    url = file_field.url  # e.g. /media/request_files/doc.pdf
-    base = settings.BASE_BACKEND_URL  # e.g. http://185.5.206.121
-    return f"{base}{url}"
-
-
-def notify_new_message(request_id: int, message_obj):
-    """Push a new message to all WebSocket clients connected to this request"""
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"chat_{request_id}",
-        {
-            "type": "chat.message",
-            "data": {
-                "id": message_obj.id,
-                "sender": message_obj.sender.id,
-                "sender_username": message_obj.sender.username,
-                "sender_name": message_obj.sender.name,
-                "text": message_obj.text or "",
-                "file": _absolute_file_url(message_obj.file),
-                "created_at": message_obj.created_at.isoformat(),
-            },
-        },
+import asyncio
+
+
+# Сколько пропущенных сообщений отдаем по сокету при переподключении
+REPLAY_LIMIT = 100
+
+
+def message_payload(message_obj, sender=None):
+    """
+    WebSocket payload of a message; pass ``sender`` to avoid loading it from the DB.
+
+    ``file`` and ``thumbnails`` are filled per recipient by ``for_user`` -
+    links are signed for one viewer.
+    """
+    from ..services.thumbnails import thumbnail_paths
+
+    sender = sender or message_obj.sender
+    return {
+        "id": message_obj.id,
+        "sender": sender.id,
+        "sender_username": sender.username,
+        "sender_name": sender.name,
+        "text": message_obj.text or "",
+        "file": None,
+        "file_path": message_obj.file.name if message_obj.file else None,
+        "thumbnails": {},
+        "thumbnail_paths": thumbnail_paths(message_obj.file, message_obj.thumbnails),
+        "created_at": message_obj.created_at.isoformat(),
+        "client_id": message_obj.client_id,
+    }
+
+
+def for_user(payload, user_id):
+    """Payload as sent to one socket: signed file URLs instead of storage paths"""
+    from ..services.protected_media import signed_media_url
+    from ..services.thumbnails import signed_thumbnail_urls
+
+    data = dict(payload)
+    if "file_path" in data:
+        data["file"] = signed_media_url(data.pop("file_path"), user_id)
+    if "thumbnail_paths" in data:
+        data["thumbnails"] = signed_thumbnail_urls(data.pop("thumbnail_paths"), user_id)
+    return data
+
+
+def missed_messages(request_id, since, limit=REPLAY_LIMIT):
+    """
+    Payloads of messages with id > ``since`` in chronological order.
+
+    Returns:
+        tuple (payloads, has_more) - if has_more the client should page
+        through GET .../messages/?after=<last id> instead
+    """
+    from ..models import RequestMessage
+
+    page = list(
+        RequestMessage.objects.filter(request_id=request_id, id__gt=since)
+        .select_related("sender")
+        .order_by("id")[:limit + 1]
     )
+    return [message_payload(m) for m in page[:limit]], len(page) > limit
+
+
+class Replayed:
+    """
+    Ids sent to one socket during replay, to drop their live copies.
+
+    Ids are assigned at INSERT, not at commit: a message with a lower id can
+    commit after the replay query, so live events are matched against the
+    replayed ids, not against the last one. The set is dropped after the
+    first live event past ``last_id``.
+    """
+
+    def __init__(self, payloads, since):
+        self.ids = {payload["id"] for payload in payloads}
+        self.last_id = payloads[-1]["id"] if payloads else since
+
+    def seen(self, message_id):
+        """True if the message was already sent; False also means the filter is no longer needed"""
+        if message_id in self.ids:
+            return True
+        if message_id > self.last_id:
+            self.ids = None
+        return False
+
+    @property
+    def done(self):
+        return self.ids is None
+
+
+def parse_since(value):
+    """?since=<last_message_id> -> int or None if missing/invalid"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def chat_group(request_id):
+    return f"chat_{request_id}"
+
+
+def user_group(user_id):
+    """Per-user group used by the inbox socket (ws/inbox/)"""
+    return f"user_{user_id}"
+
+
+def inbox_message_event(request_id, payload, preview=""):
+    """Compact inbox event: enough to reorder the list and show a preview"""
+    return {
+        "type": "inbox.event",
+        "data": {
+            "type": "message.new",
+            "request_id": request_id,
+            "message_id": payload["id"],
+            "sender": payload["sender"],
+            "sender_name": payload["sender_name"],
+            "preview": preview,
+            "created_at": payload["created_at"],
+        },
+    }
+
+
+def message_events(request_obj, payload, preview=""):
+    """(group, event) pairs for a new message: the chat group and both participants' inboxes"""
+    events = [
+        (chat_group(request_obj.id), {"type": "chat.message", "request_id": request_obj.id, "data": payload}),
+    ]
+    inbox_event = inbox_message_event(request_obj.id, payload, preview)
+    for user_id in {request_obj.employee_id, request_obj.hr_id}:
+        events.append((user_group(user_id), inbox_event))
+    return events
+
+
+def status_events(request_obj):
+    """(group, event) pairs for a status change of the request"""
+    data = {
+        "type": "request.status",
+        "request_id": request_obj.id,
+        "status": request_obj.status,
+        "closed_at": request_obj.closed_at.isoformat() if request_obj.closed_at else None,
+    }
+    events = [(chat_group(request_obj.id), {"type": "chat.status", "data": data})]
+    for user_id in {request_obj.employee_id, request_obj.hr_id}:
+        events.append((user_group(user_id), {"type": "inbox.event", "data": data}))
+    return events
+
+
+def thumbnails_events(request_obj, message_id, paths):
+    """(group, event) pairs when thumbnails of an attachment become available"""
+    data = {
+        "type": "message.thumbnails",
+        "request_id": request_obj.id,
+        "message_id": message_id,
+        "thumbnail_paths": paths,
+    }
+    return [(chat_group(request_obj.id), {"type": "chat.thumbnails", "request_id": request_obj.id, "data": data})]
+
+
+async def broadcast_message(channel_layer, request_obj, payload, preview=""):
+    """Send a stored message to the chat group and to both participants' inboxes"""
+    await asyncio.gather(*(
+        channel_layer.group_send(group, event)
+        for group, event in message_events(request_obj, payload, preview)
+    ))
@@ -7,6 +7,10 @@ app = Celery('server')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+# Длительность задач в Prometheus (server.metrics)
+from .metrics import connect_celery_signals  # noqa: E402
+connect_celery_signals()
+
 # Настройки для задач
 app.conf.update(
     task_soft_time_limit=120,  # Мягкий лимит (предупреждение)
@@ -0,0 +1,281 @@
+"""
+Prometheus metrics: HTTP views, WebSocket consumers, AI calls and Celery tasks.
+
+Each process writes its samples to ``PROMETHEUS_MULTIPROC_DIR`` (mmap files,
+one per process), ``/metrics`` merges the files of every directory listed in
+``METRICS_MULTIPROC_DIRS`` - uvicorn workers and Celery workers of other
+containers included. Without ``PROMETHEUS_MULTIPROC_DIR`` metrics stay in the
+process (runserver, tests).
+"""
+import glob
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+# Счетчики запросов к БД текущего HTTP-запроса / WS-фрейма.
+# ContextVar переходит в потоки sync_to_async, поэтому считаются и запросы из database_sync_to_async
+_db_stats = ContextVar("metrics_db_stats", default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+AI_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 45, 120)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 30, 50, 100, 200, 500)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 180, 600, 3600, 10800)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status", ["route", "method", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["route", "method"], buckets=LATENCY_BUCKETS
+)
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries", "DB queries per HTTP request", ["route", "method"], buckets=QUERY_BUCKETS
+)
+HTTP_DB_TIME = Histogram(
+    "http_request_db_seconds", "DB time per HTTP request", ["route", "method"], buckets=LATENCY_BUCKETS
+)
+
+WS_CONNECTIONS = Counter(
+    "ws_connections_total", "WebSocket connections by consumer and outcome", ["consumer", "outcome"]
+)
+WS_DISCONNECTS = Counter("ws_disconnects_total", "Closed WebSocket connections", ["consumer"])
+WS_LATENCY = Histogram(
+    "ws_event_duration_seconds", "Handling time of WebSocket connect/receive/disconnect",
+    ["consumer", "event"], buckets=LATENCY_BUCKETS,
+)
+WS_DB_QUERIES = Histogram(
+    "ws_event_db_queries", "DB queries per WebSocket event", ["consumer", "event"], buckets=QUERY_BUCKETS
+)
+WS_DB_TIME = Histogram(
+    "ws_event_db_seconds", "DB time per WebSocket event", ["consumer", "event"], buckets=LATENCY_BUCKETS
+)
+
+AI_LATENCY = Histogram(
+    "ai_request_duration_seconds", "AI service calls by endpoint and outcome",
+    ["endpoint", "outcome"], buckets=AI_BUCKETS,
+)
+
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds", "Celery task run time by final state", ["task", "state"], buckets=TASK_BUCKETS
+)
+
+
+# --- БД ---
+
+class _DBStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _db_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+# Обертка ставится на каждое новое соединение, а не на время запроса:
+# так она видит соединения всех потоков, в которых выполняется запрос
+connection_created.connect(_install_wrapper, dispatch_uid="metrics_count_queries")
+
+
+@contextmanager
+def _track_db():
+    # Соединения, открытые до импорта модуля (в этом потоке)
+    for conn in connections.all(initialized_only=True):
+        _install_wrapper(None, conn)
+    stats = _DBStats()
+    token = _db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _db_stats.reset(token)
+
+
+# --- HTTP ---
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        # 404 без совпадения - одна метка, чтобы сканеры не раздували число серий
+        return "<unmatched>"
+    return "/" + match.route
+
+
+class MetricsMiddleware:
+    """Latency, status and DB queries of every request, labeled by the URL pattern"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with _track_db() as db:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        route, method = _route(request), request.method
+        HTTP_REQUESTS.labels(route, method, str(response.status_code)).inc()
+        HTTP_LATENCY.labels(route, method).observe(elapsed)
+        HTTP_DB_QUERIES.labels(route, method).observe(db.queries)
+        HTTP_DB_TIME.labels(route, method).observe(db.seconds)
+        return response
+
+
+# --- WebSocket ---
+
+class MetricsConsumerMixin:
+    """
+    Mix into a channels consumer (before the base class) to time its
+    connect/receive/disconnect handlers and count their DB queries.
+    """
+
+    async def _observed(self, event, handler, message):
+        name = type(self).__name__
+        started = time.perf_counter()
+        with _track_db() as db:
+            try:
+                return await handler(message)
+            finally:
+                WS_LATENCY.labels(name, event).observe(time.perf_counter() - started)
+                WS_DB_QUERIES.labels(name, event).observe(db.queries)
+                WS_DB_TIME.labels(name, event).observe(db.seconds)
+
+    async def websocket_connect(self, message):
+        await self._observed("connect", super().websocket_connect, message)
+
+    async def websocket_receive(self, message):
+        await self._observed("receive", super().websocket_receive, message)
+
+    async def websocket_disconnect(self, message):
+        WS_DISCONNECTS.labels(type(self).__name__).inc()
+        await self._observed("disconnect", super().websocket_disconnect, message)
+
+    async def accept(self, *args, **kwargs):
+        self._metrics_counted = True
+        WS_CONNECTIONS.labels(type(self).__name__, "accepted").inc()
+        await super().accept(*args, **kwargs)
+
+    async def close(self, *args, **kwargs):
+        # close() до accept() - отклоненное подключение
+        if not getattr(self, "_metrics_counted", False):
+            self._metrics_counted = True
+            WS_CONNECTIONS.labels(type(self).__name__, "rejected").inc()
+        await super().close(*args, **kwargs)
+
+
+# --- AI ---
+
+@contextmanager
+def observe_ai_call(endpoint, client_errors=()):
+    """
+    Time a call to the AI service. The outcome label is ``ok``, ``timeout``,
+    ``client_error`` (4xx or one of ``client_errors``), ``server_error`` (5xx)
+    or ``error``.
+    """
+    import requests
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except requests.Timeout:
+        outcome = "timeout"
+        raise
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else 500
+        outcome = "client_error" if status < 500 else "server_error"
+        raise
+    except client_errors:
+        outcome = "client_error"
+        raise
+    finally:
+        AI_LATENCY.labels(endpoint, outcome).observe(time.perf_counter() - started)
+
+
+# --- Celery ---
+
+_task_started = {}
+
+
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+
+
+def _worker_init(**kwargs):
+    # Файлы прошлого запуска воркера - до форка дочерних процессов
+    clear_multiprocess_dir()
+
+
+def connect_celery_signals():
+    from celery.signals import task_postrun, task_prerun, worker_init
+
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid="metrics_task_prerun")
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid="metrics_task_postrun")
+    worker_init.connect(_worker_init, weak=False, dispatch_uid="metrics_worker_init")
+
+
+# --- Экспозиция ---
+
+def clear_multiprocess_dir():
+    """Remove sample files of processes from a previous run of this service"""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+class _MultiDirCollector:
+    """MultiProcessCollector over several directories (one per service)"""
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def collect(self):
+        files = [f for path in self.paths for f in glob.glob(os.path.join(path, "*.db"))]
+        return MultiProcessCollector.merge(files, accumulate=True)
+
+
+def _registry():
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    registry.register(_MultiDirCollector(settings.METRICS_MULTIPROC_DIRS))
+    return registry
+
+
+def metrics_view(request):
+    """Prometheus text exposition; with METRICS_TOKEN set requires ``Authorization: Bearer <token>``"""
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: время ответа и запросы к БД всех остальных слоев
+    'server.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -149,6 +151,18 @@ WHITENOISE_AUTOREFRESH = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Вложения заявок и фото пользователей отдаются через /api/media/ (request/views/views_media.py):
+# Django проверяет доступ, файл отдает nginx из internal location
+PROTECTED_MEDIA_URL_TTL = int(os.getenv("PROTECTED_MEDIA_URL_TTL", "3600"))
+PROTECTED_MEDIA_INTERNAL_URL = "/protected-media/"
+PROTECTED_MEDIA_X_ACCEL = os.getenv("PROTECTED_MEDIA_X_ACCEL", "0" if DEBUG else "1") == "1"
+
+# Докачиваемые загрузки вложений заявок (request/services/uploads.py)
+REQUEST_UPLOAD_MAX_SIZE = int(os.getenv("REQUEST_UPLOAD_MAX_SIZE", str(100 * 1024 * 1024)))
+# Меньше client_max_body_size в nginx.conf
+REQUEST_UPLOAD_CHUNK_SIZE = int(os.getenv("REQUEST_UPLOAD_CHUNK_SIZE", str(5 * 1024 * 1024)))
+REQUEST_UPLOAD_PARTIAL_DIR = MEDIA_ROOT / 'uploads_partial'
+
 # IMPORTANT: custom user must be defined from start (before first migrate in new DB)
 AUTH_USER_MODEL = "accounts.User"
 
@@ -211,6 +225,17 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Локально без воркера задачи можно выполнять сразу в процессе
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "0") == "1"
+
+# Prometheus (server.metrics). Каждый процесс пишет в PROMETHEUS_MULTIPROC_DIR,
+# /metrics собирает файлы всех сервисов: web, celery, celery_exports
+METRICS_MULTIPROC_DIRS = [
+    d.strip() for d in os.getenv("METRICS_MULTIPROC_DIRS", os.getenv("PROMETHEUS_MULTIPROC_DIR", "")).split(",")
+    if d.strip()
+]
+# Если задан - /metrics требует Authorization: Bearer <token>
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 # Jazzmin minimal setup
 JAZZMIN_SETTINGS = {
@@ -229,11 +254,54 @@ JAZZMIN_SETTINGS = {
 }
 
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [os.getenv("REDIS_URL", "redis://redis:6379/0")],
+# Cache: локально в памяти для разработки, Redis в продакшене
+if DEBUG:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL", "redis://redis:6379/0"),
+            "KEY_PREFIX": "emotionsai",
+        }
+    }
+
+
+# Channel layer: "core" (списки Redis, с буфером на канал), "pubsub" (Redis Pub/Sub, без буфера)
+# или "memory" (только один процесс, для локальной отладки). Цифры - benchmarks/README.md
+CHANNEL_LAYER_BACKEND = os.getenv("CHANNEL_LAYER_BACKEND", "core")
+
+if CHANNEL_LAYER_BACKEND == "memory":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
         },
-    },
-}
\ No newline at end of file
+    }
+elif CHANNEL_LAYER_BACKEND == "pubsub":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {
+                "hosts": [os.getenv("REDIS_URL", "redis://redis:6379/0")],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [os.getenv("REDIS_URL", "redis://redis:6379/0")],
+                # Сообщений в очереди одного канала, дальше group_send их отбрасывает
+                "capacity": int(os.getenv("CHANNEL_LAYER_CAPACITY", "100")),
+                # Сколько секунд неполученное сообщение живет в канале
+                "expiry": int(os.getenv("CHANNEL_LAYER_EXPIRY", "60")),
+                # Через сколько секунд канал выпадает из группы без group_discard
+                "group_expiry": int(os.getenv("CHANNEL_LAYER_GROUP_EXPIRY", "86400")),
+            },
+        },
+    }
\ No newline at end of file